@@ -9,6 +9,8 @@ from model_components import ConstantApparentPowerModel, ConstantVoltageMagnitud
 from model_components import PowerLine
 from model_components import PowerNetwork
 
+from import_resources import load_matpower_case, load_psse_raw_case
+
 from plot_resources import Plotter
 
 from simulation_resources.numerical_methods import NewtonRhapson, RungeKutta45
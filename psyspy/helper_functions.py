@@ -1,7 +1,10 @@
 from logging import debug
+from os import rename
+from struct import unpack
+from zipfile import ZipFile, ZIP_STORED
 
-from matplotlib.pylab import cm
-from numpy import empty, linspace
+from numpy import empty, linspace, load, memmap, savez
+from numpy.lib.format import read_array, read_array_header_1_0, read_array_header_2_0, read_magic
 
 
 def set_initial_conditions(obj, state, initial_value=None):
@@ -75,3 +78,58 @@ def generate_n_colors(n, cmap):
         rgba = [int(255*ele) for ele in cmap(colorspace[i])]
         rgb = rgba[0:3]
         yield "#{0:02x}{1:02x}{2:02x}".format(*rgb), colorspace[i]
+
+
+def save_arrays_atomically(path, arrays):
+    """
+    Saves a dictionary of arrays to an .npz file at exactly the given path. The file is written under a temporary
+    name first and then renamed, so an interrupted save never leaves a truncated file behind.
+    """
+    temporary_path = '%s.tmp' % path
+    with open(temporary_path, 'wb') as npz_file:
+        savez(npz_file, **arrays)
+    rename(temporary_path, path)
+    return path
+
+
+def _get_stored_array_offset(npz_file, zip_info):
+    """
+    Returns the offset of the data of an uncompressed .npy member of an .npz file with its shape, order and dtype.
+    """
+    # the local file header is 30 bytes followed by the file name and extra field
+    npz_file.seek(zip_info.header_offset)
+    local_header = unpack('<IHHHHHIIIHH', npz_file.read(30))
+    npz_file.seek(zip_info.header_offset + 30 + local_header[9] + local_header[10])
+    if read_magic(npz_file) == (1, 0):
+        shape, fortran_order, dtype = read_array_header_1_0(npz_file)
+    else:
+        shape, fortran_order, dtype = read_array_header_2_0(npz_file)
+    return npz_file.tell(), shape, fortran_order, dtype
+
+
+def load_arrays(path, mmap_mode=None):
+    """
+    Loads the dictionary of arrays in an .npz file written by save_arrays_atomically. numpy does not memory-map the
+    members of .npz files, so if mmap_mode is given the members, which savez stores uncompressed, are memory-mapped
+    directly from the file; read-only maps of the same file are then shared by every process that loads it.
+    """
+    if mmap_mode is None:
+        npz_file = load(path)
+        try:
+            return dict(npz_file.items())
+        finally:
+            npz_file.close()
+
+    arrays = {}
+    with ZipFile(path, 'r') as zip_file, open(path, 'rb') as npz_file:
+        for zip_info in zip_file.infolist():
+            name = zip_info.filename[:-4] if zip_info.filename.endswith('.npy') else zip_info.filename
+            if zip_info.compress_type == ZIP_STORED:
+                offset, shape, fortran_order, dtype = _get_stored_array_offset(npz_file, zip_info)
+            if zip_info.compress_type != ZIP_STORED or dtype.hasobject is True or 0 in shape or shape == ():
+                # compressed, object, empty and scalar arrays cannot be mapped
+                arrays[name] = read_array(zip_file.open(zip_info))
+            else:
+                arrays[name] = memmap(path, dtype=dtype, mode=mmap_mode, offset=offset, shape=shape,
+                                      order='F' if fortran_order is True else 'C')
+    return arrays
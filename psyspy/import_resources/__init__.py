@@ -0,0 +1,3 @@
+from case_builder import CaseData, build_network
+from matpower_importer import load_matpower_case, read_matpower_case
+from psse_raw_importer import load_psse_raw_case, read_psse_raw_case
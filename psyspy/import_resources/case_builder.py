@@ -0,0 +1,171 @@
+from logging import debug, warning
+from math import radians
+
+from numpy import array
+
+from ..model_components import PSys
+from ..model_components.psys import NO_MODEL_BUS_TYPE, PQ_BUS_TYPE, PV_BUS_TYPE, SLACK_BUS_TYPE
+
+
+# MATPOWER and PSS/E number their bus types as in PSys.from_arrays, with 4 for isolated buses
+ISOLATED_BUS_TYPE = 4
+
+# reactance given to branches with zero impedance (e.g., bus ties), which cannot be represented by an admittance
+ZERO_IMPEDANCE_REACTANCE = 1e-4
+
+
+class CaseData(object):
+    """
+    Intermediate representation of a power flow case filled by the case file readers, bus powers are in MW/Mvar at
+    nominal voltage and angles in degrees. Records are:
+
+        buses       [number, type, Pd, Qd, Gs, Bs, Vm, Va, name]
+        generators  (bus number, Pg, Qg, Vg, in service)
+        branches    (from bus number, to bus number, r, x, total line charging b, in service)
+
+    with branch parameters in per unit on the system base.
+    """
+
+    def __init__(self, base_power=100.):
+        self.base_power = base_power
+        self.buses = []
+        self.generators = []
+        self.branches = []
+        self._bus_indices = {}
+
+
+    def add_bus(self, number, bus_type, Pd=0., Qd=0., Gs=0., Bs=0., Vm=1., Va=0., name=None):
+        self._bus_indices[number] = len(self.buses)
+        self.buses.append([number, bus_type, Pd, Qd, Gs, Bs, Vm, Va, name])
+
+
+    def get_bus(self, number):
+        try:
+            return self.buses[self._bus_indices[number]]
+        except KeyError:
+            raise ValueError('case refers to bus %s, which is not defined' % number)
+
+
+    def has_bus(self, number):
+        return number in self._bus_indices
+
+
+    def add_bus_load(self, number, Pd, Qd):
+        bus = self.get_bus(number)
+        bus[2] += Pd
+        bus[3] += Qd
+
+
+    def add_bus_shunt(self, number, Gs, Bs):
+        bus = self.get_bus(number)
+        bus[4] += Gs
+        bus[5] += Bs
+
+
+    def add_generator(self, bus_number, Pg, Qg, Vg, in_service=True):
+        self.generators.append((bus_number, Pg, Qg, Vg, in_service))
+
+
+    def add_branch(self, from_bus_number, to_bus_number, r, x, b=0., in_service=True):
+        self.branches.append((from_bus_number, to_bus_number, r, x, b, in_service))
+
+
+def _get_generation_by_bus(case):
+    """
+    Sums the in-service generation at each bus in per unit, the voltage setpoint is taken from the first generator.
+    """
+    base_power = float(case.base_power)
+    generation = {}
+    for bus_number, Pg, Qg, Vg, in_service in case.generators:
+        if in_service is False:
+            continue
+        Pg, Qg = Pg/base_power, Qg/base_power
+        try:
+            P, Q, V = generation[bus_number]
+            generation[bus_number] = (P + Pg, Q + Qg, V)
+        except KeyError:
+            generation[bus_number] = (Pg, Qg, Vg)
+    return generation
+
+
+def _get_bus_type_and_power(bus_type, P_load, Q_load, generation):
+    """
+    Returns the bus type and the power of the model (generated power for PV buses, consumed power for PQ buses) of a
+    case bus.
+    """
+    if generation is not None and bus_type in (PV_BUS_TYPE, SLACK_BUS_TYPE):
+        Pg, _, _ = generation
+        return bus_type, Pg - P_load, 0.
+
+    if bus_type in (PV_BUS_TYPE, SLACK_BUS_TYPE):
+        debug('Bus without an in-service generator treated as a PQ bus')
+
+    if generation is not None:
+        Pg, Qg, _ = generation
+        P_load -= Pg
+        Q_load -= Qg
+
+    if P_load != 0 or Q_load != 0:
+        return PQ_BUS_TYPE, P_load, Q_load
+
+    return NO_MODEL_BUS_TYPE, 0., 0.
+
+
+def build_network(case, optimal_ordering=True, solver_tolerance=0.00001):
+    """
+    Builds a PSys from case data with PSys.from_arrays. Slack and generator buses become PVBus instances
+    (ConstantVoltageMagnitudeRealPowerModel), buses with load or fixed generation PQBus instances
+    (ConstantApparentPowerModel) and the remaining buses plain buses. Isolated buses and out-of-service branches are
+    left out. The case bus name, or number if it has none, is kept as the name of each bus.
+    """
+    base_power = float(case.base_power)
+    generation = _get_generation_by_bus(case)
+
+    bus_columns = dict((column, []) for column in ['id', 'type', 'V0', 'theta0', 'P', 'Q', 'shunt_g', 'shunt_b'])
+    names = []
+    in_service_bus_numbers = set()
+    slack_bus_found = False
+    for number, bus_type, Pd, Qd, Gs, Bs, Vm, Va, name in case.buses:
+        if bus_type == ISOLATED_BUS_TYPE:
+            continue
+        bus_generation = generation.get(number)
+        bus_type, P, Q = _get_bus_type_and_power(bus_type, Pd/base_power, Qd/base_power, bus_generation)
+        if bus_type == SLACK_BUS_TYPE:
+            if slack_bus_found is True:
+                warning('Case has more than one slack bus, treating bus %s as a PV bus' % number)
+                bus_type = PV_BUS_TYPE
+            slack_bus_found = True
+        if bus_type in (PV_BUS_TYPE, SLACK_BUS_TYPE):
+            Vm = bus_generation[2]
+
+        for column, value in zip(['id', 'type', 'V0', 'theta0', 'P', 'Q', 'shunt_g', 'shunt_b'],
+                                 [number, bus_type, Vm, radians(Va), P, Q, Gs/base_power, Bs/base_power]):
+            bus_columns[column].append(value)
+        names.append(number if name is None else name)
+        in_service_bus_numbers.add(number)
+
+    branch_columns = dict((column, []) for column in ['from_id', 'to_id', 'r', 'x', 'charging_b'])
+    for from_bus_number, to_bus_number, r, x, b, in_service in case.branches:
+        if in_service is False:
+            continue
+        if from_bus_number not in in_service_bus_numbers or to_bus_number not in in_service_bus_numbers:
+            debug('Skipping branch from bus %s to bus %s, which connects an isolated bus' % (from_bus_number,
+                                                                                             to_bus_number))
+            continue
+        if r == 0 and x == 0:
+            debug('Branch from bus %s to bus %s has zero impedance, using a reactance of %e' % (
+                  from_bus_number, to_bus_number, ZERO_IMPEDANCE_REACTANCE))
+            x = ZERO_IMPEDANCE_REACTANCE
+        for column, value in zip(['from_id', 'to_id', 'r', 'x', 'charging_b'],
+                                 [from_bus_number, to_bus_number, r, x, b]):
+            branch_columns[column].append(value)
+
+    if slack_bus_found is False:
+        debug('Case has no slack bus with an in-service generator')
+
+    network = PSys.from_arrays(dict((column, array(values)) for column, values in bus_columns.iteritems()),
+                               dict((column, array(values)) for column, values in branch_columns.iteritems()),
+                               optimal_ordering=optimal_ordering, solver_tolerance=solver_tolerance)
+    for bus, name in zip(network.buses, names):
+        bus.name = name
+    return network
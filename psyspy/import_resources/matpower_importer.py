@@ -0,0 +1,97 @@
+from logging import debug, warning
+from re import compile as compile_regex
+
+from case_builder import CaseData, build_network
+
+
+_matrix_start = compile_regex(r'^\s*mpc\.(\w+)\s*=\s*\[(.*)$')
+_scalar_assignment = compile_regex(r'^\s*mpc\.(\w+)\s*=\s*([^\[\{;]+);')
+
+# MATPOWER column indices
+BUS_I, BUS_TYPE, PD, QD, GS, BS, VM, VA = 0, 1, 2, 3, 4, 5, 7, 8
+GEN_BUS, PG, QG, VG, GEN_STATUS = 0, 1, 2, 5, 7
+F_BUS, T_BUS, BR_R, BR_X, BR_B, TAP, SHIFT, BR_STATUS = 0, 1, 2, 3, 4, 8, 9, 10
+
+
+def _iterate_matrix_rows(lines, first_line):
+    """
+    Yields the rows of a matrix whose opening bracket has already been read, first_line holds whatever followed the
+    bracket. Rows end at semicolons or line breaks and the matrix at the closing bracket.
+    """
+    line = first_line
+    while True:
+        line = line.split('%', 1)[0]
+        matrix_ends = ']' in line
+        if matrix_ends is True:
+            line = line.split(']', 1)[0]
+        for row in line.split(';'):
+            values = row.replace(',', ' ').split()
+            if values != []:
+                yield [float(value) for value in values]
+        if matrix_ends is True:
+            return
+        try:
+            line = next(lines)
+        except StopIteration:
+            raise ValueError('MATPOWER case ends inside a matrix')
+
+
+def _add_bus(case, row):
+    case.add_bus(int(row[BUS_I]), int(row[BUS_TYPE]), Pd=row[PD], Qd=row[QD], Gs=row[GS], Bs=row[BS], Vm=row[VM],
+                 Va=row[VA])
+
+
+def _add_generator(case, row):
+    case.add_generator(int(row[GEN_BUS]), row[PG], row[QG], row[VG], in_service=row[GEN_STATUS] > 0)
+
+
+def _add_branch(case, row):
+    if len(row) > SHIFT and ((row[TAP] != 0 and row[TAP] != 1) or row[SHIFT] != 0):
+        warning('Ignoring off-nominal tap ratio and phase shift of branch from bus %i to bus %i' % (row[F_BUS],
+                                                                                                   row[T_BUS]))
+    case.add_branch(int(row[F_BUS]), int(row[T_BUS]), row[BR_R], row[BR_X], b=row[BR_B],
+                    in_service=len(row) <= BR_STATUS or row[BR_STATUS] > 0)
+
+
+_row_handlers = {
+    'bus': _add_bus,
+    'gen': _add_generator,
+    'branch': _add_branch
+}
+
+
+def read_matpower_case(path):
+    """
+    Reads a MATPOWER case file (format version 2) line by line into CaseData, the bus, gen and branch matrices are
+    parsed row by row as they are read and every other field (e.g., costs, bus names) is skipped.
+    """
+    case = CaseData()
+    with open(path, 'r') as case_file:
+        lines = iter(case_file)
+        for line in lines:
+            matrix_start = _matrix_start.match(line)
+            if matrix_start is not None:
+                name, first_line = matrix_start.groups()
+                add_row = _row_handlers.get(name)
+                for row in _iterate_matrix_rows(lines, first_line):
+                    if add_row is not None:
+                        add_row(case, row)
+                continue
+
+            scalar_assignment = _scalar_assignment.match(line)
+            if scalar_assignment is not None:
+                name, value = scalar_assignment.groups()
+                if name == 'baseMVA':
+                    case.base_power = float(value)
+                elif name == 'version' and value.strip().strip('\'"') != '2':
+                    debug('MATPOWER case format version %s, reading it as version 2' % value.strip())
+
+    return case
+
+
+def load_matpower_case(path, optimal_ordering=True, solver_tolerance=0.00001):
+    """
+    Returns a PSys built from a MATPOWER case file, see build_network.
+    """
+    return build_network(read_matpower_case(path), optimal_ordering=optimal_ordering,
+                         solver_tolerance=solver_tolerance)
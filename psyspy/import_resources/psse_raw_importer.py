@@ -0,0 +1,278 @@
+from logging import debug, warning
+from math import sqrt
+
+from case_builder import CaseData, build_network
+
+
+# order of the data sections of a version 33 RAW file, sections after the transformer data up to the switched shunt
+# data do not affect the power flow model built here and are skipped
+BUS_SECTION = 0
+LOAD_SECTION = 1
+FIXED_SHUNT_SECTION = 2
+GENERATOR_SECTION = 3
+BRANCH_SECTION = 4
+TRANSFORMER_SECTION = 5
+SWITCHED_SHUNT_SECTION = 16
+
+
+def _split_record(line):
+    """
+    Splits a comma separated record into its fields, quoted strings may contain commas and everything after a slash
+    outside quotes is a comment. Fields left empty are returned as None.
+    """
+    fields = []
+    field = []
+    quoted = False
+    for character in line.rstrip('\r\n'):
+        if character == '\'':
+            quoted = not quoted
+        elif quoted is True:
+            field.append(character)
+        elif character == ',':
+            fields.append(''.join(field).strip())
+            field = []
+        elif character == '/':
+            break
+        else:
+            field.append(character)
+    fields.append(''.join(field).strip())
+
+    if fields == ['']:
+        return []
+    return [None if value == '' else value for value in fields]
+
+
+def _get_float(fields, index, default=0.):
+    try:
+        value = fields[index]
+    except IndexError:
+        return default
+    if value is None:
+        return default
+    return float(value)
+
+
+def _get_int(fields, index, default=0):
+    return int(_get_float(fields, index, default))
+
+
+def _is_section_end(fields):
+    return fields != [] and fields[0] == '0'
+
+
+class _RawFileReader(object):
+    """
+    Streams the records of a RAW file section by section.
+    """
+
+    def __init__(self, raw_file):
+        self.lines = iter(raw_file)
+        self.section = BUS_SECTION
+        self.finished = False
+
+
+    def next_record(self):
+        """
+        Returns the fields of the next record of the current section, or None at the end of the section.
+        """
+        for line in self.lines:
+            fields = _split_record(line)
+            if fields == []:
+                continue
+            if fields[0] is not None and fields[0].upper() == 'Q':
+                self.finished = True
+                return None
+            if _is_section_end(fields) is True:
+                self.section += 1
+                return None
+            return fields
+        self.finished = True
+        return None
+
+
+    def next_line_fields(self):
+        """
+        Returns the fields of the next line, for records that span several lines.
+        """
+        try:
+            return _split_record(next(self.lines))
+        except StopIteration:
+            raise ValueError('RAW file ends inside a record')
+
+
+def _read_header(reader, case):
+    header = reader.next_line_fields()
+    case.base_power = _get_float(header, 1, 100.)
+    revision = _get_int(header, 2, 33)
+    if revision != 33:
+        warning('RAW file is revision %i, reading it as revision 33' % revision)
+    # two lines of case title
+    _ = reader.next_line_fields()
+    _ = reader.next_line_fields()
+
+
+def _add_bus(reader, case, fields):
+    name = fields[1].strip() if len(fields) > 1 and fields[1] is not None else None
+    case.add_bus(_get_int(fields, 0), _get_int(fields, 3, 1), Vm=_get_float(fields, 7, 1.), Va=_get_float(fields, 8),
+                 name=name)
+
+
+def _add_load(reader, case, fields):
+    if _get_int(fields, 2, 1) == 0:
+        return
+    # constant current loads are taken at nominal voltage, constant admittance loads become bus shunts
+    case.add_bus_load(_get_int(fields, 0), _get_float(fields, 5) + _get_float(fields, 7),
+                      _get_float(fields, 6) + _get_float(fields, 8))
+    case.add_bus_shunt(_get_int(fields, 0), _get_float(fields, 9), _get_float(fields, 10))
+
+
+def _add_fixed_shunt(reader, case, fields):
+    if _get_int(fields, 2, 1) == 0:
+        return
+    case.add_bus_shunt(_get_int(fields, 0), _get_float(fields, 3), _get_float(fields, 4))
+
+
+def _add_generator(reader, case, fields):
+    case.add_generator(_get_int(fields, 0), _get_float(fields, 2), _get_float(fields, 3), _get_float(fields, 6, 1.),
+                       in_service=_get_int(fields, 14, 1) != 0)
+
+
+def _add_branch(reader, case, fields):
+    # a negative to bus number marks the metered end
+    from_bus_number = _get_int(fields, 0)
+    to_bus_number = abs(_get_int(fields, 1))
+    in_service = _get_int(fields, 13, 1) != 0
+    case.add_branch(from_bus_number, to_bus_number, _get_float(fields, 3), _get_float(fields, 4),
+                    b=_get_float(fields, 5), in_service=in_service)
+
+    if in_service is True:
+        # line shunts are in per unit, bus shunts in MW/Mvar
+        case.add_bus_shunt(from_bus_number, case.base_power*_get_float(fields, 9),
+                           case.base_power*_get_float(fields, 10))
+        case.add_bus_shunt(to_bus_number, case.base_power*_get_float(fields, 11), case.base_power*_get_float(fields, 12))
+
+
+def _get_transformer_impedance(r, x, winding_base_power, impedance_code, system_base_power):
+    """
+    Returns the impedance of a winding pair in per unit on the system base given its impedance code CZ.
+    """
+    if impedance_code == 1:
+        return r, x
+    if impedance_code == 3:
+        # r is the load loss in watts and x the impedance magnitude, both on the winding base
+        r = r/(1e6*winding_base_power)
+        x = sqrt(max(x**2 - r**2, 0.))
+    return r*system_base_power/winding_base_power, x*system_base_power/winding_base_power
+
+
+def _is_off_nominal_winding(winding_fields, winding_data_code):
+    """
+    Indicates whether a transformer winding has a phase shift or an off-nominal ratio. Ratios in kV (winding data code
+    2) are taken relative to the nominal winding voltage, they are not checked if it is left at the bus base voltage.
+    """
+    ratio = _get_float(winding_fields, 0, 1.)
+    if winding_data_code == 2:
+        nominal_voltage = _get_float(winding_fields, 1)
+        ratio = ratio/nominal_voltage if nominal_voltage != 0 else 1.
+    return ratio != 1. or _get_float(winding_fields, 2) != 0.
+
+
+def _add_transformer(reader, case, fields):
+    """
+    Two-winding transformers span four lines and three-winding transformers five, the latter are modeled as three
+    branches connected to a star bus. Tap ratios and phase shifts are not modeled.
+    """
+    bus_numbers = [_get_int(fields, 0), abs(_get_int(fields, 1)), abs(_get_int(fields, 2))]
+    winding_data_code = _get_int(fields, 4, 1)
+    impedance_code = _get_int(fields, 5, 1)
+    magnetizing_code = _get_int(fields, 6, 1)
+    status = _get_int(fields, 11, 1)
+    is_three_winding = bus_numbers[2] != 0
+
+    impedance_fields = reader.next_line_fields()
+    winding_fields = [reader.next_line_fields() for _ in range(0, 3 if is_three_winding is True else 2)]
+    if status != 0 and any(_is_off_nominal_winding(winding, winding_data_code) for winding in winding_fields):
+        warning('Ignoring the off-nominal tap ratios and phase shifts of the transformer at buses %s' % bus_numbers)
+
+    if status != 0:
+        if magnetizing_code == 1:
+            case.add_bus_shunt(bus_numbers[0], case.base_power*_get_float(fields, 7),
+                               case.base_power*_get_float(fields, 8))
+        else:
+            debug('Ignoring the magnetizing admittance of the transformer at buses %s' % bus_numbers)
+
+    system_base_power = case.base_power
+    impedances = []
+    for k in range(0, 3 if is_three_winding is True else 1):
+        impedances.append(_get_transformer_impedance(_get_float(impedance_fields, 3*k),
+                                                     _get_float(impedance_fields, 3*k + 1),
+                                                     _get_float(impedance_fields, 3*k + 2, system_base_power),
+                                                     impedance_code, system_base_power))
+
+    if is_three_winding is False:
+        r, x = impedances[0]
+        case.add_branch(bus_numbers[0], bus_numbers[1], r, x, in_service=status != 0)
+        return
+
+    # winding impedances of the star equivalent from the impedances between windings 1-2, 2-3 and 3-1
+    (r12, x12), (r23, x23), (r31, x31) = impedances
+    winding_impedances = [(0.5*(r12 + r31 - r23), 0.5*(x12 + x31 - x23)),
+                          (0.5*(r12 + r23 - r31), 0.5*(x12 + x23 - x31)),
+                          (0.5*(r23 + r31 - r12), 0.5*(x23 + x31 - x12))]
+    # status 2, 3 and 4 take only winding 2, 3 and 1 out of service, respectively
+    out_of_service_winding = {0: None, 1: None, 2: 1, 3: 2, 4: 0}.get(status)
+
+    star_bus_number = -(len(case.buses) + 1)
+    while case.has_bus(star_bus_number) is True:
+        star_bus_number -= 1
+    case.add_bus(star_bus_number, 1, Vm=_get_float(impedance_fields, 9, 1.), Va=_get_float(impedance_fields, 10),
+                 name='%i-%i-%i star' % tuple(bus_numbers))
+    for k, (bus_number, (r, x)) in enumerate(zip(bus_numbers, winding_impedances)):
+        case.add_branch(bus_number, star_bus_number, r, x, in_service=status != 0 and k != out_of_service_winding)
+
+
+def _add_switched_shunt(reader, case, fields):
+    if _get_int(fields, 3, 1) == 0:
+        return
+    # switched shunts are held at their initial susceptance
+    case.add_bus_shunt(_get_int(fields, 0), 0., _get_float(fields, 9))
+
+
+_record_handlers = {
+    BUS_SECTION: _add_bus,
+    LOAD_SECTION: _add_load,
+    FIXED_SHUNT_SECTION: _add_fixed_shunt,
+    GENERATOR_SECTION: _add_generator,
+    BRANCH_SECTION: _add_branch,
+    TRANSFORMER_SECTION: _add_transformer,
+    SWITCHED_SHUNT_SECTION: _add_switched_shunt
+}
+
+
+def read_psse_raw_case(path):
+    """
+    Reads a PSS/E RAW file (revision 33) record by record into CaseData. Bus, load, fixed shunt, generator, branch,
+    transformer and switched shunt data are used, every other section is skipped.
+    """
+    case = CaseData()
+    with open(path, 'r') as raw_file:
+        reader = _RawFileReader(raw_file)
+        _read_header(reader, case)
+        while reader.finished is False:
+            section = reader.section
+            fields = reader.next_record()
+            if fields is None:
+                continue
+            add_record = _record_handlers.get(section)
+            if add_record is not None:
+                add_record(reader, case, fields)
+
+    return case
+
+
+def load_psse_raw_case(path, optimal_ordering=True, solver_tolerance=0.00001):
+    """
+    Returns a PSys built from a PSS/E RAW file, see build_network.
+    """
+    return build_network(read_psse_raw_case(path), optimal_ordering=optimal_ordering,
+                         solver_tolerance=solver_tolerance)
@@ -1,24 +1,29 @@
 from itertools import count
 
-from numpy import append
-
-from ..helper_functions import impedance_admittance_wrangler, set_initial_conditions
+from ..helper_functions import impedance_admittance_wrangler
 from ..exceptions import PowerLineError
+from network_arrays import DetachedRow, append_to_history, get_history_view, set_history
 
 
 class Branch(object):
     _power_line_ids = count(0)
+    # no per-instance dictionary, power flow histories are only allocated once a power flow is appended
+    __slots__ = ('_power_line_id', '_arrays', '_row', '_Pab_history', '_Qab_history', 'bus_a', 'bus_b')
     
     def __init__(self, bus_a=None, bus_b=None, z=(), y=()):
         self._power_line_id = self._power_line_ids.next() + 1
+
+        # current values are a row of the branch arrays of the network (see bind_to_arrays), earlier power flows are
+        # histories
+        self._arrays = DetachedRow(g=0., b=0., Pab=0., Qab=0.)
+        self._row = 0
+        self._Pab_history = None
+        self._Qab_history = None
         
         self.y = impedance_admittance_wrangler(z, y)
             
         self.bus_a = bus_a
         self.bus_b = bus_b
-        
-        set_initial_conditions(self, 'Pab', 0)
-        set_initial_conditions(self, 'Qab', 0)
 
         
     def __repr__(self):
@@ -62,6 +67,64 @@ class Branch(object):
 
     def get_id(self):
         return self._power_line_id
+
+
+    def bind_to_arrays(self, arrays, row):
+        """
+        Makes the branch a view of a row of the branch arrays of a network, which must already hold its current values.
+        A branch can only be a view of the arrays of one network.
+        """
+        if self.is_bound_to_arrays() is True and self._arrays is not arrays:
+            raise PowerLineError('power line with id %i is already part of another power network' % self._power_line_id)
+        self._arrays = arrays
+        self._row = row
+
+
+    def is_bound_to_arrays(self):
+        return isinstance(self._arrays, DetachedRow) is False
+
+
+    @property
+    def y(self):
+        return self._arrays.g[self._row], self._arrays.b[self._row]
+
+
+    @y.setter
+    def y(self, y):
+        self._arrays.g[self._row], self._arrays.b[self._row] = y
+
+
+    @property
+    def Pab(self):
+        """
+        Real power flow history, the last entry is the current real power flow. This is a view, assigning its last
+        entry changes the current real power flow.
+        """
+        return get_history_view(self._Pab_history, self._arrays.Pab, self._row)
+
+
+    @Pab.setter
+    def Pab(self, values):
+        try:
+            self._Pab_history = set_history(values, self._arrays.Pab, self._row)
+        except ValueError:
+            raise PowerLineError('real power flow history cannot be empty')
+
+
+    @property
+    def Qab(self):
+        """
+        Reactive power flow history, the last entry is the current reactive power flow, as a view like Pab.
+        """
+        return get_history_view(self._Qab_history, self._arrays.Qab, self._row)
+
+
+    @Qab.setter
+    def Qab(self, values):
+        try:
+            self._Qab_history = set_history(values, self._arrays.Qab, self._row)
+        except ValueError:
+            raise PowerLineError('reactive power flow history cannot be empty')
         
     
     def get_incident_buses(self):
@@ -78,12 +141,14 @@ class Branch(object):
 
         
     def append_real_power(self, P):
-        self.Pab = append(self.Pab, P)
+        self._Pab_history = append_to_history(self._Pab_history, float(self._arrays.Pab[self._row]))
+        self._arrays.Pab[self._row] = P
         return self.get_current_real_power()
 
         
     def append_reactive_power(self, Q):
-        self.Qab = append(self.Qab, Q)
+        self._Qab_history = append_to_history(self._Qab_history, float(self._arrays.Qab[self._row]))
+        self._arrays.Qab[self._row] = Q
         return self.get_current_reactive_power()
         
     
@@ -94,12 +159,12 @@ class Branch(object):
 
     
     def replace_real_power(self, P):
-        self.Pab[-1] = P
+        self._arrays.Pab[self._row] = P
         return self.get_current_real_power()
         
     
     def replace_reactive_power(self, Q):
-        self.Qab[-1] = Q
+        self._arrays.Qab[self._row] = Q
         return self.get_current_reactive_power()
 
         
@@ -108,8 +173,8 @@ class Branch(object):
 
 
     def get_current_real_power(self):
-        return self.Pab[-1]
+        return self._arrays.Pab[self._row]
         
 
     def get_current_reactive_power(self):
-        return self.Qab[-1]
+        return self._arrays.Qab[self._row]
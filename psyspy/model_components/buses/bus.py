@@ -2,15 +2,21 @@ from logging import debug, info, warning
 from itertools import count
 from math import pi
 
-from numpy import append, nan
+from numpy import zeros
 
 from ...exceptions import BusError, ModelError
-from ...helper_functions import impedance_admittance_wrangler, set_initial_conditions
+from ...helper_functions import impedance_admittance_wrangler
 from ..models import Model
+from ..network_arrays import DetachedRow, append_to_history, get_history_view, get_value_by_index, set_history
 
 
 class Bus(object):
     _bus_ids = count(0)
+    # networks hold up to millions of buses, so buses have no per-instance dictionary and histories are only allocated
+    # once something is appended to them
+    __slots__ = ('model', 'name', '_bus_id', '_arrays', '_row', '_V_history', '_theta_history', '_w',
+                 'is_voltage_polar_static_old', 'get_connected_bus_polar_voltage_from_network_method',
+                 'get_connected_bus_admittance_from_network_method', 'get_apparent_power_injected_from_network_method')
     
     def __init__(self, model=None, V0=None, theta0=None, shunt_z=(), shunt_y=(), name=None):
         if model is None:
@@ -21,6 +27,10 @@ class Bus(object):
             
         self.model = model
 
+        # current values are a row of the bus arrays of the network (see bind_to_arrays), earlier values are histories
+        self._arrays = DetachedRow(V=0., theta=0., shunt_g=0., shunt_b=0.)
+        self._row = 0
+
         if V0 is None:
             V0 = 1
         if theta0 is None:
@@ -32,10 +42,10 @@ class Bus(object):
                 
         self.shunt_y = impedance_admittance_wrangler(shunt_z, shunt_y)
         
-        self.model.set_get_bus_polar_voltage_method(self.get_current_voltage_polar)
-        self.model.set_update_bus_polar_voltage_method(self.update_voltage_polar)
-        
-        set_initial_conditions(self, 'w', 0)
+        # the model calls back into the bus it is bound to instead of holding bound methods of it
+        self.model.bind_to_bus(self)
+
+        self._w = None
         
         self.name = name
 
@@ -77,9 +87,81 @@ class Bus(object):
         return self._bus_id
 
 
+    def bind_to_arrays(self, arrays, row):
+        """
+        Makes the bus a view of a row of the bus arrays of a network, which must already hold its current values. A bus
+        can only be a view of the arrays of one network.
+        """
+        if self.is_bound_to_arrays() is True and self._arrays is not arrays:
+            raise BusError('bus with id %i is already part of another power network' % self._bus_id)
+        self._arrays = arrays
+        self._row = row
+
+
+    def is_bound_to_arrays(self):
+        return isinstance(self._arrays, DetachedRow) is False
+
+
+    @property
+    def V(self):
+        """
+        Voltage magnitude history, the last entry is the current voltage magnitude. This is a view, assigning its
+        last entry changes the current voltage magnitude.
+        """
+        return get_history_view(self._V_history, self._arrays.V, self._row)
+
+
+    @V.setter
+    def V(self, values):
+        try:
+            self._V_history = set_history(values, self._arrays.V, self._row)
+        except ValueError:
+            raise BusError('voltage magnitude history cannot be empty')
+
+
+    @property
+    def theta(self):
+        """
+        Voltage angle history, the last entry is the current voltage angle, as a view like V.
+        """
+        return get_history_view(self._theta_history, self._arrays.theta, self._row)
+
+
+    @theta.setter
+    def theta(self, values):
+        try:
+            self._theta_history = set_history(values, self._arrays.theta, self._row)
+        except ValueError:
+            raise BusError('voltage angle history cannot be empty')
+
+
+    @property
+    def w(self):
+        """
+        Frequency history, zero until one is assigned.
+        """
+        if self._w is None:
+            return zeros(1)
+        return self._w
+
+
+    @w.setter
+    def w(self, values):
+        self._w = values
+
+
+    @property
+    def shunt_y(self):
+        return self._arrays.shunt_g[self._row], self._arrays.shunt_b[self._row]
+
+
+    @shunt_y.setter
+    def shunt_y(self, shunt_y):
+        self._arrays.shunt_g[self._row], self._arrays.shunt_b[self._row] = shunt_y
+
+
     def set_get_connected_bus_polar_voltage_from_network_method(self, method):
         self.get_connected_bus_polar_voltage_from_network_method = method
-        self.model.set_get_connected_bus_polar_voltage_from_network_method(self.get_connected_bus_polar_voltage_from_network)
 
 
     def get_connected_bus_polar_voltage_from_network(self):
@@ -88,7 +170,6 @@ class Bus(object):
 
     def set_get_connected_bus_admittance_from_network_method(self, method):
         self.get_connected_bus_admittance_from_network_method = method
-        self.model.set_get_connected_bus_admittance_from_network_method(self.get_connected_bus_admittance_from_network)
 
 
     def get_connected_bus_admittance_from_network(self):
@@ -97,7 +178,6 @@ class Bus(object):
 
     def set_get_apparent_power_injected_from_network_method(self, method):
         self.get_apparent_power_injected_from_network_method = method
-        self.model.set_get_apparent_power_injected_from_network(self.get_apparent_power_injected_from_network)
 
 
     def get_apparent_power_injected_from_network(self):
@@ -128,10 +208,18 @@ class Bus(object):
         return self.model.get_dynamic_state_time_derivative_array(current_states=current_states)
 
 
+    def get_natural_time_scale(self):
+        return self.model.get_natural_time_scale()
+
+
     def get_apparent_power_derivatives(self):
         return self.model.get_apparent_power_derivatives()
 
 
+    def get_apparent_power_state_derivatives(self):
+        return self.model.get_apparent_power_state_derivatives()
+
+
     def get_current_dynamic_angular_velocity(self):
         return self.model.get_current_dynamic_angular_velocity()
 
@@ -177,8 +265,10 @@ class Bus(object):
             except IndexError:
                 V0 = None
                 theta0 = None
-        set_initial_conditions(self, 'V', V0)
-        set_initial_conditions(self, 'theta', theta0)
+        self._V_history = None
+        self._theta_history = None
+        self._arrays.V[self._row] = 0 if V0 is None else V0
+        self._arrays.theta[self._row] = 0 if theta0 is None else theta0
         return self.get_initial_voltage_polar()
 
 
@@ -207,17 +297,11 @@ class Bus(object):
         
         
     def get_voltage_magnitude_by_index(self, index):
-        try:
-            return self.V[index]
-        except IndexError:
-            return nan
+        return get_value_by_index(self._V_history, self._arrays.V[self._row], index)
             
     
     def get_voltage_angle_by_index(self, index):
-        try:
-            return self.theta[index]
-        except IndexError:
-            return nan
+        return get_value_by_index(self._theta_history, self._arrays.theta[self._row], index)
 
 
     def update_voltage_polar(self, Vpolar, replace=False):
@@ -253,22 +337,24 @@ class Bus(object):
 
 
     def _replace_voltage_magnitude(self, V):
-        self.V[-1] = V
+        self._arrays.V[self._row] = V
         return self.get_current_voltage_magnitude()
         
     
     def _replace_voltage_angle(self, theta):
-        self.theta[-1] = theta
+        self._arrays.theta[self._row] = theta
         return self.get_current_voltage_angle()
         
         
     def _append_voltage_magnitude(self, V):
-        self.V = append(self.V, V)
+        self._V_history = append_to_history(self._V_history, float(self._arrays.V[self._row]))
+        self._arrays.V[self._row] = V
         return self.get_current_voltage_magnitude()
         
     
     def _append_voltage_angle(self, theta):
-        self.theta = append(self.theta, theta)
+        self._theta_history = append_to_history(self._theta_history, float(self._arrays.theta[self._row]))
+        self._arrays.theta[self._row] = theta
         return self.get_current_voltage_angle()
         
     
@@ -277,7 +363,7 @@ class Bus(object):
         
     
     def reset_voltage_to_zero_angle(self):
-        self.set_initial_voltage_polar((self.V[-1], 0.0))
+        self.set_initial_voltage_polar((self.get_current_voltage_magnitude(), 0.0))
 
 
     def _voltage_helper(self, V=None, theta=None):
@@ -321,7 +407,7 @@ class Bus(object):
 
 
     def unmake_slack_bus(self):
-        self.restore_is_voltage_polar_static()
+        self.model.restore_voltage_polar_static()
 
 
     def restore_is_voltage_polar_static(self):
@@ -329,20 +415,24 @@ class Bus(object):
             v_static_old, theta_static_old = self.is_voltage_polar_static_old
         except AttributeError:
             debug('cannot restore is_voltage_polar_static, no previous values available')
+            return
         
-        if v_static_old is True:
+        self.set_is_voltage_polar_static(v_static_old, theta_static_old)
+
+
+    def set_is_voltage_polar_static(self, v_static, theta_static):
+        if v_static is True:
             self.model.make_voltage_magnitude_static()
         else:
             self.model.unmake_voltage_magnitude_static()
             
-        if theta_static_old is True:
+        if theta_static is True:
             self.model.make_voltage_angle_static()
         else:
             self.model.unmake_voltage_angle_static()
         
-        v_static, theta_static = self.is_voltage_polar_static()
-        if v_static != v_static_old or theta_static != theta_static_old:
-            raise BusError('could not restore is_voltage_polar_static')
+        if self.is_voltage_polar_static() != (v_static, theta_static):
+            raise BusError('could not set is_voltage_polar_static')
         
 
     def has_dynamic_model(self):
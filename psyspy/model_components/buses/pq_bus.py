@@ -7,6 +7,7 @@ from ..models.static_models import ConstantApparentPowerModel
 
 
 class PQBus(Bus):
+    __slots__ = ()
     
     def __init__(self, P=None, Q=None, V0=None, theta0=None, shunt_z=(), shunt_y=(), name=None):
         
@@ -4,6 +4,7 @@ from ..models.static_models import ConstantVoltageMagnitudeRealPowerModel
 
 
 class PVBus(Bus):
+    __slots__ = ('_bus_type',)
     
     def __init__(self, P=None, V=None, theta0=None, shunt_z=(), shunt_y=(), name=None):
         
@@ -1,13 +1,27 @@
 from itertools import count
 from logging import debug, info, warning
 
-from numpy import zeros
+from numpy import append, zeros
 
 from ...exceptions import ModelError
-from IPython import embed
+
+# methods of the bus a model is bound to, called when the corresponding method has not been set on the model
+_BUS_METHOD_NAMES = {
+    '_update_bus_polar_voltage_method': 'update_voltage_polar',
+    '_get_bus_polar_voltage_method': 'get_current_voltage_polar',
+    '_get_apparent_power_injected_by_network_method': 'get_apparent_power_injected_from_network',
+    '_get_connected_bus_admittance_from_network_method': 'get_connected_bus_admittance_from_network',
+    '_get_connected_bus_polar_voltage_from_network_method': 'get_connected_bus_polar_voltage_from_network'
+}
 
 class Model(object):
     _model_ids = count(0)
+    # time scale of the model's dynamics in seconds, used to pick its rate in multi-rate integration; None integrates
+    # the model at the base time step
+    natural_time_scale = None
+    # one model per bus, so models have no per-instance dictionary (subclasses that do not declare __slots__ get one)
+    __slots__ = ('_model_id', 'voltage_magnitude_static', 'voltage_angle_static', '_voltage_polar_static_old',
+                 'is_dynamic', 'is_generator', 'is_load', '_bus', '_setpoint_change_times') + tuple(sorted(_BUS_METHOD_NAMES))
     
     def __init__(self, voltage_magnitude_static=False, voltage_angle_static=False,
 					   is_dynamic=False, is_generator=False, is_load=False):
@@ -25,6 +39,10 @@ class Model(object):
         if check_boolean_parameter(voltage_angle_static) is True:
             self.voltage_angle_static = voltage_angle_static
 
+        self._voltage_polar_static_old = None
+
+        if check_boolean_parameter(is_dynamic) is True:
+            self.is_dynamic = is_dynamic
 
         if check_boolean_parameter(is_generator) is True:
             self.is_generator = is_generator
@@ -32,10 +50,10 @@ class Model(object):
         if check_boolean_parameter(is_load) is True:
             self.is_load = is_load
             
+        self._bus = None
         self._get_bus_polar_voltage_method = None
         self._get_apparent_power_injected_by_network_method = None
-        self._get_polar_voltage_of_connected_buses_method = None
-        self._setpoint_change_time = zeros(1)
+        self._setpoint_change_times = None
 
 
     def __repr__(self):
@@ -48,6 +66,82 @@ class Model(object):
                 return '<Model %i>' % self._model_id
 
 
+    @property
+    def _setpoint_change_time(self):
+        """
+        Times at which the setpoint changed, starting at 0, only allocated once the setpoint changes.
+        """
+        if self._setpoint_change_times is None:
+            return zeros(1)
+        return self._setpoint_change_times
+
+
+    @_setpoint_change_time.setter
+    def _setpoint_change_time(self, times):
+        self._setpoint_change_times = times
+
+
+    def append_setpoint_change_time(self, t):
+        self._setpoint_change_times = append(self._setpoint_change_time, t)
+
+
+    def is_voltage_magnitude_static(self):
+        return self.voltage_magnitude_static
+
+
+    def is_voltage_angle_static(self):
+        return self.voltage_angle_static
+
+
+    def make_voltage_magnitude_static(self):
+        self.voltage_magnitude_static = True
+        return self.voltage_magnitude_static
+
+
+    def unmake_voltage_magnitude_static(self):
+        self.voltage_magnitude_static = False
+        return self.voltage_magnitude_static
+
+
+    def make_voltage_angle_static(self):
+        self.voltage_angle_static = True
+        return self.voltage_angle_static
+
+
+    def unmake_voltage_angle_static(self):
+        self.voltage_angle_static = False
+        return self.voltage_angle_static
+
+
+    def make_voltage_polar_static(self):
+        """
+        Makes both the voltage magnitude and angle static, e.g., for the slack bus, keeping the previous flags for
+        restore_voltage_polar_static.
+        """
+        if self._voltage_polar_static_old is None:
+            self._voltage_polar_static_old = (self.voltage_magnitude_static, self.voltage_angle_static)
+        return self.make_voltage_magnitude_static(), self.make_voltage_angle_static()
+
+
+    def restore_voltage_polar_static(self):
+        """
+        Restores the static flags from before make_voltage_polar_static.
+        """
+        if self._voltage_polar_static_old is None:
+            raise ModelError('cannot restore static flags of model %i, they were not changed' % self._model_id)
+        self.voltage_magnitude_static, self.voltage_angle_static = self._voltage_polar_static_old
+        self._voltage_polar_static_old = None
+        return self.voltage_magnitude_static, self.voltage_angle_static
+
+
+    def bind_to_bus(self, bus):
+        """
+        Binds the model to the bus it is connected to, the methods of the bus are used for the callbacks to the bus and
+        network that have not been set explicitly.
+        """
+        self._bus = bus
+
+
     def set_update_bus_polar_voltage_method(self, method):
         self._update_bus_polar_voltage_method = method
 
@@ -105,10 +199,11 @@ class Model(object):
 
 
     def _get_method_from_parent_object(self, method_name, attribute_error_message, callable_error_message):
-        if hasattr(self, method_name) is True:
-            method = getattr(self, method_name)
-        else:
-            raise AttributeError(attribute_error_message)
+        method = getattr(self, method_name, None)
+        if method is None:
+            if self._bus is None:
+                raise AttributeError(attribute_error_message)
+            method = getattr(self._bus, _BUS_METHOD_NAMES[method_name])
 
         if hasattr(method, '__call__') is True:
             return method
@@ -116,6 +211,10 @@ class Model(object):
             raise TypeError(callable_error_message)
 
 
+    def get_natural_time_scale(self):
+        return self.natural_time_scale
+
+
     def get_apparent_power_injection(self):
         try:
             P = self._get_real_power_injection()
@@ -159,3 +258,19 @@ class Model(object):
 
         return dP_dtheta, dP_dV, dQ_dtheta, dQ_dV
 
+
+    def get_apparent_power_state_derivatives(self):
+        try:
+            dP_dx = self._dP_dx_model()
+        except AttributeError:
+            debug('Could not get derivative of real power wrt dynamic states for model %i, defaulting to dP_dx=0' % (self._model_id))
+            dP_dx = 0
+
+        try:
+            dQ_dx = self._dQ_dx_model()
+        except AttributeError:
+            debug('Could not get derivative of reactive power wrt dynamic states for model %i, defaulting to dQ_dx=0' % (self._model_id))
+            dQ_dx = 0
+
+        return dP_dx, dQ_dx
+
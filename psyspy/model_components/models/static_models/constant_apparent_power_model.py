@@ -5,6 +5,7 @@ from static_model import StaticModel
 
 
 class ConstantApparentPowerModel(StaticModel):
+    __slots__ = ('P', 'Q')
     
     def __init__(self, P=None, Q=None):
         set_initial_conditions(self, 'P', P)
@@ -4,6 +4,7 @@ from static_model import StaticModel
 
 
 class ConstantVoltageMagnitudeRealPowerModel(StaticModel):
+    __slots__ = ('P',)
     
     def __init__(self, P=None):
         set_initial_conditions(self, 'P', P)
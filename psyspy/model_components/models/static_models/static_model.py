@@ -4,6 +4,7 @@ from ..model import Model
 
 
 class StaticModel(Model):
+    __slots__ = ()
     
     def __init__(self, voltage_magnitude_static=False, voltage_angle_static=False):
 
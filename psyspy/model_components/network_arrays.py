@@ -0,0 +1,168 @@
+from numpy import array, asarray, atleast_1d, empty, nan, ndarray, zeros
+
+# columns of the bus and branch arrays of a network, one entry per bus or branch
+BUS_COLUMNS = ('V', 'theta', 'shunt_g', 'shunt_b')
+BRANCH_COLUMNS = ('g', 'b', 'Pab', 'Qab')
+
+# initial capacity of a history, histories double their capacity when full
+HISTORY_CAPACITY = 16
+
+
+class HistoryBuffer(object):
+    """
+    Earlier values of one quantity of a bus or branch, e.g., its voltage magnitudes, in a preallocated array followed
+    by one spare entry where views of the history place the current value, which is kept in the network arrays.
+    """
+    __slots__ = ('values', 'size')
+
+    def __init__(self, values=(), capacity=HISTORY_CAPACITY):
+        values = asarray(values, dtype=float).ravel()
+        self.values = empty(max(capacity, values.shape[0] + 1))
+        self.values[0:values.shape[0]] = values
+        self.size = values.shape[0]
+
+
+    def append(self, value):
+        # one entry is always kept free for the current value
+        if self.size + 1 == self.values.shape[0]:
+            values = empty(2*self.values.shape[0])
+            values[0:self.size] = self.values[0:self.size]
+            self.values = values
+        self.values[self.size] = value
+        self.size += 1
+
+
+class HistoryView(ndarray):
+    """
+    View of a history followed by the current value, as returned by the V, theta, Pab and Qab properties of buses and
+    power lines. Item assignments that change the current value are written through to the network arrays.
+    """
+
+    def __array_finalize__(self, obj):
+        self._current_value_target = getattr(obj, '_current_value_target', None)
+
+
+    def __array_wrap__(self, array, context=None):
+        # results of arithmetic on a history are plain arrays or scalars, not views of it
+        array = ndarray.__array_wrap__(self, array, context).view(ndarray)
+        return array[()] if array.ndim == 0 else array
+
+
+    def __setitem__(self, key, value):
+        if self._current_value_target is None:
+            ndarray.__setitem__(self, key, value)
+            return
+        history, column, row = self._current_value_target
+        current_value = history.values[history.size]
+        ndarray.__setitem__(self, key, value)
+        if history.values[history.size] != current_value:
+            column[row] = history.values[history.size]
+
+
+def get_history_view(history, column, row):
+    """
+    Returns the history followed by the current value column[row] as a view, without copying the history.
+    """
+    if history is None:
+        return column[row:row + 1]
+    history.values[history.size] = column[row]
+    view = history.values[0:history.size + 1].view(HistoryView)
+    view._current_value_target = (history, column, row)
+    return view
+
+
+def set_history(values, column, row):
+    """
+    Writes the last of values to column[row] and returns a history of the others, None if there are none.
+    """
+    values = atleast_1d(asarray(values, dtype=float))
+    if values.shape[0] == 0:
+        raise ValueError('history cannot be empty')
+    history = HistoryBuffer(values[0:-1]) if values.shape[0] > 1 else None
+    column[row] = values[-1]
+    return history
+
+
+def append_to_history(history, value):
+    """
+    Appends value to a history and returns it, histories are None until their first value so elements that are never
+    simulated do not allocate them.
+    """
+    if history is None:
+        history = HistoryBuffer()
+    history.append(value)
+    return history
+
+
+def get_value_by_index(history, current_value, index):
+    """
+    Returns the value at index of the history followed by the current value, nan if there is none.
+    """
+    size = 0 if history is None else history.size
+    if index < 0:
+        index += size + 1
+    if index == size:
+        return current_value
+    elif 0 <= index < size:
+        return history.values[index]
+    return nan
+
+
+class NetworkArrays(object):
+    """
+    Struct-of-arrays storage for the current values of the buses or branches of a network, one dense float column per
+    quantity with a row per element in the order the elements were added. The columns are attributes of the same name
+    (e.g., arrays.V) and are writable views, so solvers read and write them directly. Adding rows may reallocate the
+    columns, views taken before that no longer refer to the network.
+    """
+
+    def __init__(self, column_names, capacity=16):
+        self.column_names = tuple(column_names)
+        self.size = 0
+        self._buffers = dict((name, zeros(max(capacity, 1))) for name in self.column_names)
+        self._update_column_views()
+
+
+    def __len__(self):
+        return self.size
+
+
+    def _update_column_views(self):
+        for name in self.column_names:
+            setattr(self, name, self._buffers[name][0:self.size])
+
+
+    def add_rows(self, num_rows=1, **values):
+        """
+        Adds num_rows rows with the given column values (scalars or sequences of num_rows values, missing columns are
+        zero) and returns the index of the first one. Capacity is doubled as needed so adding elements one at a time
+        stays linear.
+        """
+        first_row = self.size
+        capacity = self._buffers[self.column_names[0]].shape[0]
+        if first_row + num_rows > capacity:
+            capacity = max(2*capacity, first_row + num_rows)
+            for name in self.column_names:
+                buffer = zeros(capacity)
+                buffer[0:first_row] = self._buffers[name][0:first_row]
+                self._buffers[name] = buffer
+
+        for name, value in values.iteritems():
+            try:
+                self._buffers[name][first_row:first_row + num_rows] = value
+            except KeyError:
+                raise ValueError('no column named %s' % name)
+        self.size = first_row + num_rows
+        self._update_column_views()
+        return first_row
+
+
+class DetachedRow(object):
+    """
+    Storage of a bus or branch that is not part of a network yet. It has the columns of NetworkArrays as one-element
+    arrays, so elements index their values the same way whether or not they are in a network.
+    """
+
+    def __init__(self, **values):
+        for name, value in values.iteritems():
+            setattr(self, name, array([value], dtype=float))
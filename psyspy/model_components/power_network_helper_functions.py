@@ -1,5 +1,7 @@
 from math import cos, sin
 
+from numpy import bincount, cos as np_cos, sin as np_sin
+
 
 def fp_fq_helper(P_injected, Q_injected, Vpolar_i, Yii, admittance_matrix_index_bus_id_mapping,
                  voltage_list, connected_bus_ids, interconnection_admittance_list):
@@ -122,6 +124,22 @@ def compute_apparent_power_injected_from_network(Vpolar_i, Yii, admittance_matri
     return P, Q
 
 
+def compute_apparent_powers_injected_from_network(V, theta, self_admittances, rows, V_connected, theta_connected,
+                                                  interconnection_admittances):
+    """
+    Array version of compute_apparent_power_injected_from_network for several buses. Entry k of the connected bus
+    arrays is a bus connected to the bus in row rows[k].
+    """
+    angles = theta[rows] - theta_connected
+    G, B = interconnection_admittances[:, 0], interconnection_admittances[:, 1]
+    num_buses = V.shape[0]
+    P = V*(self_admittances[:, 0]*V + bincount(rows, weights=V_connected*(G*np_cos(angles) - B*np_sin(angles)),
+                                               minlength=num_buses))
+    Q = V*(self_admittances[:, 1]*V + bincount(rows, weights=V_connected*(G*np_sin(angles) + B*np_cos(angles)),
+                                               minlength=num_buses))
+    return P, Q
+
+
 def is_slack_bus(voltage_is_static):
     if voltage_is_static[0] is True and voltage_is_static[1] is True:
         return True
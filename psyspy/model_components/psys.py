@@ -1,33 +1,75 @@
-from itertools import count
+from logging import debug
+from itertools import combinations, count
 from operator import itemgetter
 from os.path import join as path_join
-from math import cos, sin
 
-from joblib import Parallel, delayed
-from networkx import Graph
-from numpy import append, array, zeros, frompyfunc, set_printoptions, inf, hstack, empty
+from numpy import append, array, zeros, frompyfunc, set_printoptions, inf, hstack, empty, load, ones, arange, argsort, \
+                  asarray, bincount, column_stack, concatenate, cos, cumsum, in1d, isfinite, repeat, searchsorted, sin, \
+                  unique
 from numpy.linalg import norm, cond
-from scipy.sparse import lil_matrix
-from scipy.sparse.linalg import spsolve
-try:
-    from prettytable import PrettyTable
-except ImportError:
-    print_table_enabled = False
+from scipy.sparse import bmat, coo_matrix, csc_matrix, csr_matrix, diags, lil_matrix
+from scipy.sparse.linalg import splu, spsolve
 
 from ..exceptions import PowerNetworkError
-from buses import Bus
+from ..helper_functions import load_arrays, save_arrays_atomically
+from buses import Bus, PQBus, PVBus
 from models import KuramotoOscillatorModel
+from network_arrays import BRANCH_COLUMNS, BUS_COLUMNS, NetworkArrays
 from power_line import PowerLine
-from power_network_helper_functions import fp_fq_helper, connected_bus_helper, jacobian_hij_helper, jacobian_nij_helper, \
+from sensitivity_factors import SensitivityFactors
+from power_network_helper_functions import connected_bus_helper, jacobian_hij_helper, jacobian_nij_helper, \
                                            jacobian_kij_helper, jacobian_lij_helper, jacobian_diagonal_helper, \
-                                           compute_apparent_power_injected_from_network, compute_jacobian_row_by_bus
+                                           compute_apparent_powers_injected_from_network, compute_jacobian_row_by_bus
 from ..simulation_resources import NewtonRhapson
-from IPython import embed
+
+# version of the file format written by PSys.save, increased whenever the arrays saved change
+NETWORK_FILE_FORMAT_VERSION = 1
+
+# bus types in the bus tables of PSys.from_arrays, numbered as in MATPOWER with 0 for buses without a model
+NO_MODEL_BUS_TYPE = 0
+PQ_BUS_TYPE = 1
+PV_BUS_TYPE = 2
+SLACK_BUS_TYPE = 3
+
+
+def _get_table_column(table, name, length=None, default=None):
+    """
+    Returns a column of a structured array or dict of columns as an array, filled with default if the table does not
+    have the column. Columns without a default are required.
+    """
+    try:
+        return asarray(table[name])
+    except (KeyError, ValueError):
+        if default is None:
+            raise PowerNetworkError('table is missing the %s column' % name)
+    return default*ones(length)
+
+
+def _get_jacobian_indices(voltage_is_static_list):
+    """
+    Returns the first row of the Jacobian of each bus in admittance matrix order, None for buses with static voltage.
+    """
+    jacobian_indices = []
+    current_index = 0
+    for voltage_is_static in voltage_is_static_list:
+        if voltage_is_static[0] is True and voltage_is_static[1] is True:
+            jacobian_indices.append(None)
+        else:
+            jacobian_indices.append(current_index)
+            if voltage_is_static[0] is True:
+                current_index += 1
+            else:
+                current_index += 2
+    return jacobian_indices
+
 
 class PSys(object):
     
     def __init__(self, buses=[], power_lines=[], solver_tolerance=0.00001):
-        self.graph_model = Graph()
+        # current bus and power line values, the buses and power lines are views of their rows
+        self.bus_arrays = NetworkArrays(BUS_COLUMNS)
+        self.branch_arrays = NetworkArrays(BRANCH_COLUMNS)
+
         self.buses = []
         for bus in buses:
             self.add_bus(bus)
@@ -37,6 +79,7 @@ class PSys(object):
                 raise TypeError('power lines must be a list of instances of PowerLine type or a subclass thereof')
 
         self.power_lines = []
+        self._bind_power_lines(power_lines)
         self.power_lines.extend(power_lines)
 
         set_printoptions(linewidth=175)
@@ -128,12 +171,11 @@ class PSys(object):
             raise TypeError('buses must be a list of instances of Bus type or a subclass thereof')
         else:
             if self.bus_in_network(bus) is False:
-                bus.set_get_apparent_power_injected_from_network_method(self.compute_apparent_power_injected_from_network)
-                bus.set_get_connected_bus_admittance_from_network_method(self._get_connected_bus_admittances_by_bus_id)
-                bus.set_get_connected_bus_polar_voltage_from_network_method(self._get_connected_bus_polar_voltage_by_bus_id)
-                self.buses.append(bus)
+                self._bind_buses([bus])
+                self._attach_bus(bus)
                 # need to regenerate this mapping each time a new bus is added
                 self.generate_buses_index_bus_id_mapping()
+                self.invalidate_kron_reduction()
                 if is_slack_bus is not False:
                     current_slack_bus = self.get_slack_bus()
                     if current_slack_bus is not None:
@@ -143,8 +185,116 @@ class PSys(object):
             return bus.get_id()
 
 
+    def _get_bus_callbacks(self):
+        # the same bound methods are given to every bus rather than a new one per bus
+        try:
+            return self._bus_callbacks
+        except AttributeError:
+            self._bus_callbacks = (self.compute_apparent_power_injected_from_network,
+                                   self._get_connected_bus_admittances_by_bus_id,
+                                   self._get_connected_bus_polar_voltage_by_bus_id)
+            return self._bus_callbacks
+
+
+    def _attach_bus(self, bus):
+        get_apparent_power_injected, get_connected_bus_admittance, get_connected_bus_polar_voltage = \
+            self._get_bus_callbacks()
+        bus.set_get_apparent_power_injected_from_network_method(get_apparent_power_injected)
+        bus.set_get_connected_bus_admittance_from_network_method(get_connected_bus_admittance)
+        bus.set_get_connected_bus_polar_voltage_from_network_method(get_connected_bus_polar_voltage)
+        self.buses.append(bus)
+
+
+    def _bind_buses(self, buses):
+        """
+        Copies the current values of buses joining the network into new rows of the bus arrays and makes the buses
+        views of those rows. Buses already in a network are rejected before any row is added.
+        """
+        for bus in buses:
+            if bus.is_bound_to_arrays() is True:
+                raise PowerNetworkError('bus with id %i is already part of a power network' % bus.get_id())
+        voltages = array([bus.get_current_voltage_polar() for bus in buses], dtype=float).reshape((-1, 2))
+        shunts = array([bus.shunt_y for bus in buses], dtype=float).reshape((-1, 2))
+        first_row = self.bus_arrays.add_rows(len(buses), V=voltages[:, 0], theta=voltages[:, 1], shunt_g=shunts[:, 0],
+                                             shunt_b=shunts[:, 1])
+        for row, bus in enumerate(buses, first_row):
+            bus.bind_to_arrays(self.bus_arrays, row)
+
+
+    def _bind_power_lines(self, power_lines):
+        """
+        Power line counterpart of _bind_buses.
+        """
+        for power_line in power_lines:
+            if power_line.is_bound_to_arrays() is True:
+                raise PowerNetworkError('power line with id %i is already part of a power network' % power_line.get_id())
+        admittances = array([power_line.y for power_line in power_lines], dtype=float).reshape((-1, 2))
+        flows = array([power_line.get_current_complex_power() for power_line in power_lines], dtype=float).reshape((-1, 2))
+        first_row = self.branch_arrays.add_rows(len(power_lines), g=admittances[:, 0], b=admittances[:, 1],
+                                                Pab=flows[:, 0], Qab=flows[:, 1])
+        for row, power_line in enumerate(power_lines, first_row):
+            power_line.bind_to_arrays(self.branch_arrays, row)
+
+
+    def get_bus_arrays(self):
+        """
+        Returns the struct-of-arrays storage of the current bus values (columns V, theta, shunt_g and shunt_b, in the
+        order of the bus list), which solvers may read and write directly.
+        """
+        return self.bus_arrays
+
+
+    def get_branch_arrays(self):
+        """
+        Returns the struct-of-arrays storage of the current power line values (columns g, b, Pab and Qab, in the order
+        of the power line list).
+        """
+        return self.branch_arrays
+
+
+    def add_buses(self, buses, slack_bus=None):
+        """
+        Bulk version of add_bus for large networks, e.g., from the case importers. The bus id mapping is regenerated
+        once after all buses are added instead of after each one. Returns the ids of the buses.
+        """
+        existing_bus_ids = set(self.get_buses_index_bus_id_mapping())
+        new_buses = []
+        for bus in buses:
+            if isinstance(bus, Bus) is False:
+                raise TypeError('buses must be a list of instances of Bus type or a subclass thereof')
+            if bus.get_id() not in existing_bus_ids:
+                new_buses.append(bus)
+                existing_bus_ids.add(bus.get_id())
+        self._bind_buses(new_buses)
+        for bus in new_buses:
+            self._attach_bus(bus)
+
+        self.generate_buses_index_bus_id_mapping()
+        self.invalidate_kron_reduction()
+        if slack_bus is not None:
+            self.set_slack_bus(slack_bus)
+        return [bus.get_id() for bus in buses]
+
+
     def add_power_line(self, power_line):
+        self._bind_power_lines([power_line])
         self.power_lines.append(power_line)
+        self.invalidate_kron_reduction()
+
+
+    def connect_bus_pairs(self, bus_pairs, admittances):
+        """
+        Bulk version of connect_buses, creates a power line with admittance (g, b) between each pair of buses, which
+        must already be in the network. Returns the new power lines.
+        """
+        if len(bus_pairs) != len(admittances):
+            raise ValueError('each pair of buses must have an admittance')
+
+        power_lines = [PowerLine(bus_a, bus_b, y=y) for (bus_a, bus_b), y in zip(bus_pairs, admittances)]
+        self._bind_power_lines(power_lines)
+        self.power_lines.extend(power_lines)
+        self.invalidate_kron_reduction()
+        return power_lines
 
 
     def connect_buses(self, bus_a, bus_b, z=(), y=()):
@@ -156,11 +306,124 @@ class PSys(object):
         return power_line
 
 
+    @classmethod
+    def from_arrays(cls, bus_table, branch_table, optimal_ordering=True, solver_tolerance=0.00001,
+                    build_admittance_matrix=True):
+        """
+        Builds a network from a bus table and a branch table, each a structured array or a dict of equal length
+        columns. The bus table has columns id and type (see the bus type constants) and optionally V0, theta0, P, Q,
+        shunt_g and shunt_b. PQ buses consume P and Q, PV and slack buses inject P at voltage magnitude V0. The branch
+        table has columns from_id and to_id, either r and x or g and b, and optionally charging_b, which is split
+        equally between the shunts of the end buses. Both tables are validated as a whole, the buses are named after
+        their ids and, unless build_admittance_matrix is False, the admittance matrix is built from the tables in the
+        same pass.
+        """
+        bus_ids = _get_table_column(bus_table, 'id')
+        num_buses = bus_ids.shape[0]
+        bus_types = _get_table_column(bus_table, 'type').astype(int)
+        V0 = _get_table_column(bus_table, 'V0', num_buses, 1.)
+        theta0 = _get_table_column(bus_table, 'theta0', num_buses, 0.)
+        P = _get_table_column(bus_table, 'P', num_buses, 0.)
+        Q = _get_table_column(bus_table, 'Q', num_buses, 0.)
+        shunt_g = _get_table_column(bus_table, 'shunt_g', num_buses, 0.)
+        shunt_b = _get_table_column(bus_table, 'shunt_b', num_buses, 0.).astype(float)
+
+        if unique(bus_ids).shape[0] != num_buses:
+            raise PowerNetworkError('bus ids in the bus table must be unique')
+        if not in1d(bus_types, [NO_MODEL_BUS_TYPE, PQ_BUS_TYPE, PV_BUS_TYPE, SLACK_BUS_TYPE]).all():
+            raise PowerNetworkError('unknown bus type in the bus table')
+        if (bus_types == SLACK_BUS_TYPE).sum() > 1:
+            raise PowerNetworkError('bus table can have at most one slack bus')
+        if not isfinite(concatenate([V0, theta0, P, Q, shunt_g, shunt_b])).all() or (V0 <= 0).any():
+            raise PowerNetworkError('bus table has invalid voltages, powers or shunts')
+
+        # positions of the branch end buses in the bus table
+        bus_order = argsort(bus_ids)
+        end_indices = []
+        for column in ['from_id', 'to_id']:
+            end_ids = _get_table_column(branch_table, column)
+            sorted_positions = searchsorted(bus_ids, end_ids, sorter=bus_order).clip(0, max(num_buses - 1, 0))
+            if num_buses == 0 or (bus_ids[bus_order[sorted_positions]] != end_ids).any():
+                raise PowerNetworkError('branch table refers to buses that are not in the bus table')
+            end_indices.append(bus_order[sorted_positions])
+        from_indices, to_indices = end_indices
+        num_branches = from_indices.shape[0]
+        if (from_indices == to_indices).any():
+            raise PowerNetworkError('branches must connect two different buses')
+
+        try:
+            g = _get_table_column(branch_table, 'g').astype(float)
+            b = _get_table_column(branch_table, 'b').astype(float)
+        except PowerNetworkError:
+            r = _get_table_column(branch_table, 'r')
+            x = _get_table_column(branch_table, 'x')
+            impedance_mag_squared = r**2 + x**2
+            if (impedance_mag_squared == 0).any():
+                raise PowerNetworkError('branches must have nonzero impedance')
+            g = r/impedance_mag_squared
+            b = -x/impedance_mag_squared
+        charging_b = _get_table_column(branch_table, 'charging_b', num_branches, 0.)
+        if not isfinite(concatenate([g, b, charging_b])).all():
+            raise PowerNetworkError('branch table has invalid admittances')
+        shunt_b += bincount(from_indices, weights=0.5*charging_b, minlength=num_buses) + \
+                   bincount(to_indices, weights=0.5*charging_b, minlength=num_buses)
+
+        buses = []
+        slack_bus = None
+        # columns are converted to lists once, indexing arrays element by element is much slower
+        bus_columns = [column.tolist() for column in [bus_ids, bus_types, V0, theta0, P, Q, shunt_g, shunt_b]]
+        for bus_id, bus_type, V0_i, theta0_i, P_i, Q_i, shunt_g_i, shunt_b_i in zip(*bus_columns):
+            shunt_y = (shunt_g_i, shunt_b_i)
+            if bus_type == PQ_BUS_TYPE:
+                bus = PQBus(P=P_i, Q=Q_i, V0=V0_i, theta0=theta0_i, shunt_y=shunt_y)
+            elif bus_type == NO_MODEL_BUS_TYPE:
+                bus = Bus(V0=V0_i, theta0=theta0_i, shunt_y=shunt_y)
+            else:
+                bus = PVBus(P=P_i, V=V0_i, theta0=theta0_i, shunt_y=shunt_y)
+                if bus_type == SLACK_BUS_TYPE:
+                    slack_bus = bus
+            bus.name = bus_id
+            buses.append(bus)
+
+        network = cls(solver_tolerance=solver_tolerance)
+        _ = network.add_buses(buses, slack_bus=slack_bus)
+        _ = network.connect_bus_pairs([(buses[i], buses[j]) for i, j in zip(from_indices.tolist(), to_indices.tolist())],
+                                      [(gij, bij) for gij, bij in zip(g.tolist(), b.tolist())])
+
+        if build_admittance_matrix is False:
+            return network
+
+        # admittance matrix index of each bus, Tinney scheme #2 orders buses by incidence count and then by id
+        if optimal_ordering is True:
+            incidence_counts = bincount(concatenate([from_indices, to_indices]), minlength=num_buses)
+            matrix_order = argsort(incidence_counts, kind='mergesort')
+        else:
+            matrix_order = arange(num_buses)
+        matrix_indices = empty(num_buses, dtype=int)
+        matrix_indices[matrix_order] = arange(num_buses)
+        network.admittance_matrix_index_bus_id_mapping = {
+            'optimal_ordering': optimal_ordering,
+            'mapping': [buses[i].get_id() for i in matrix_order]
+        }
+
+        i = matrix_indices[from_indices]
+        j = matrix_indices[to_indices]
+        rows = concatenate([i, j, i, j, matrix_indices])
+        columns = concatenate([i, j, j, i, matrix_indices])
+        G = coo_matrix((concatenate([g, g, -g, -g, shunt_g]), (rows, columns)), shape=(num_buses, num_buses))
+        B = coo_matrix((concatenate([-b, -b, b, b, -shunt_b]), (rows, columns)), shape=(num_buses, num_buses))
+        _, _ = network.save_admittance_matrix(G=lil_matrix(G.tocsr()), B=lil_matrix(B.tocsr()))
+
+        return network
+
+
     def generate_buses_index_bus_id_mapping(self):
         mapping = []
         for bus in self.buses:
             mapping.append(bus.get_id())
         self.buses_index_bus_id_mapping = mapping
+        # reverse lookup so finding a bus by its id does not scan the mapping
+        self.buses_index_by_bus_id = dict((bus_id, index) for index, bus_id in enumerate(mapping))
         return mapping
 
 
@@ -173,11 +436,14 @@ class PSys(object):
 
     
     def get_bus_by_id(self, bus_id):
-        buses_index_bus_id_mapping = self.get_buses_index_bus_id_mapping()
         try:
-            index_of_bus = buses_index_bus_id_mapping.index(bus_id)
-            return self.buses[index_of_bus]
-        except ValueError:
+            buses_index_by_bus_id = self.buses_index_by_bus_id
+        except AttributeError:
+            _ = self.generate_buses_index_bus_id_mapping()
+            buses_index_by_bus_id = self.buses_index_by_bus_id
+        try:
+            return self.buses[buses_index_by_bus_id[bus_id]]
+        except KeyError:
             return None
 
 
@@ -389,6 +655,8 @@ class PSys(object):
 
         self.G = G
         self.B = B
+        # the admittance matrix is regenerated whenever the topology or a line impedance changes
+        self.invalidate_kron_reduction()
         return self.G, self.B
 
 
@@ -411,8 +679,22 @@ class PSys(object):
         return G, B
 
 
+    def get_graph_model(self):
+        """
+        Returns the networkx graph of the network, networkx is only imported when the graph is first requested.
+        """
+        try:
+            return self.graph_model
+        except AttributeError:
+            from networkx import Graph
+            self.graph_model = Graph()
+            return self.graph_model
+
+
     def print_admittance_matrix(self):
-        if 'print_table_enabled' in globals() and print_table_enabled is False:
+        try:
+            from prettytable import PrettyTable
+        except ImportError:
             print 'Cannot print admittance matrix, please install PrettyTable to enable this feature.'
         else:
             table_header = ["bus"]
@@ -544,14 +826,23 @@ class PSys(object):
 
 
     def _get_admittance_matrix_index_from_bus_id(self, bus_id_to_find):
-        admittance_matrix_index_bus_id_mapping = self.get_admittance_matrix_index_bus_id_mapping()
+        return self._get_admittance_matrix_index_by_bus_id().get(bus_id_to_find)
+
 
+    def _get_admittance_matrix_index_by_bus_id(self):
+        """
+        Returns a dictionary of the admittance matrix index of each bus id, kept until the mapping changes.
+        """
+        mapping = self.get_admittance_matrix_index_bus_id_mapping()
         try:
-            index_of_bus_id = admittance_matrix_index_bus_id_mapping.index(bus_id_to_find)
-        except ValueError:
-            index_of_bus_id = None
-        
-        return index_of_bus_id
+            cached_mapping, admittance_matrix_index_by_bus_id = self._admittance_matrix_index_by_bus_id
+            if cached_mapping is mapping:
+                return admittance_matrix_index_by_bus_id
+        except AttributeError:
+            pass
+        admittance_matrix_index_by_bus_id = dict((bus_id, index) for index, bus_id in enumerate(mapping))
+        self._admittance_matrix_index_by_bus_id = (mapping, admittance_matrix_index_by_bus_id)
+        return admittance_matrix_index_by_bus_id
         
         
     def get_admittance_value_from_bus_ids(self, bus_id_i, bus_id_j):
@@ -566,43 +857,284 @@ class PSys(object):
         G, B = self.get_admittance_matrix()
 
         return G[i, j], B[i, j]
+
+
+    def get_kuramoto_coupling_matrix(self, kron_reduced=False, keep=None):
+        """
+        Returns the sparse matrix of coupling strengths K_ij = Vi*Vj*|Bij| between distinct buses, ordered as in the
+        admittance matrix, e.g., for integrating oscillator ensembles with VectorizedEnsembleIntegrator. With
+        kron_reduced the coupling is between the buses kept by kron_reduce(keep), in the order of its 'bus_ids'.
+        """
+        if kron_reduced is True:
+            kron_reduction = self.kron_reduce(keep=keep)
+            B = kron_reduction['B']
+            bus_ids = kron_reduction['bus_ids']
+        else:
+            _, B = self.get_admittance_matrix(generate_on_exception=True)
+            bus_ids = self.get_admittance_matrix_index_bus_id_mapping()
+        V = array([self.get_bus_by_id(bus_id).get_current_voltage_magnitude() for bus_id in bus_ids])
+
+        # off-diagonal entries of B hold the (negative) line susceptances
+        K = -1*csr_matrix(B)
+        K.setdiag(0)
+        K.eliminate_zeros()
+        return diags(V).dot(K).dot(diags(V)).tocsr()
         
         
+    def invalidate_kron_reduction(self):
+        self.kron_reduction = None
+
+
+    def _get_kron_reduction_bus_ids(self, keep):
+        keep_bus_ids = []
+        for bus in keep:
+            if isinstance(bus, Bus) is True:
+                bus = bus.get_id()
+            if self.get_bus_by_id(bus) is None:
+                raise PowerNetworkError('cannot keep bus with id %s in the reduced network, it is not in this network' % bus)
+            keep_bus_ids.append(bus)
+        return keep_bus_ids
+
+
+    def _get_kron_reduction_load_injections(self, eliminated_bus_ids):
+        load_injections = zeros((len(eliminated_bus_ids), 2))
+        for k, bus_id in enumerate(eliminated_bus_ids):
+            bus = self.get_bus_by_id(bus_id)
+            if bus.is_voltage_magnitude_static() is True or bus.has_dynamic_model() is True:
+                raise PowerNetworkError('cannot eliminate bus with id %i, only buses with constant power or no loads can '
+                                        'be represented by a constant impedance' % bus_id)
+            load_injections[k, :] = bus.get_apparent_power_injection()
+        return load_injections
+
+
+    def kron_reduce(self, keep=None):
+        """
+        Eliminates every bus not in keep (buses or bus ids, the buses with dynamic models by default) from the network
+        equations with the sparse Schur complement Y_kk - Y_ke Y_ee^-1 Y_ek of the admittance matrix. Loads at
+        eliminated buses, e.g., ConstantApparentPowerModel loads, are represented by the constant impedance that draws
+        their power at the current voltage magnitude.
+
+        Returns a dictionary with the reduced conductance and susceptance matrices 'G' and 'B' (same sign convention
+        as the full ones), the ids of the kept buses in their order 'bus_ids' and the fraction of nonzero entries
+        'density'. The result is cached until the topology or admittance matrix changes, a different set of buses is
+        kept, or the power of an eliminated load changes.
+        """
+        if keep is None:
+            keep = self.get_buses_with_dynamic_models()
+        keep_bus_ids = self._get_kron_reduction_bus_ids(keep)
+
+        admittance_matrix_index_bus_id_mapping = self.get_admittance_matrix_index_bus_id_mapping()
+        kept_bus_ids = set(keep_bus_ids)
+        eliminated_bus_ids = [bus_id for bus_id in admittance_matrix_index_bus_id_mapping if bus_id not in kept_bus_ids]
+        load_injections = self._get_kron_reduction_load_injections(eliminated_bus_ids)
+
+        try:
+            kron_reduction = self.kron_reduction
+        except AttributeError:
+            kron_reduction = None
+        if kron_reduction is not None and kron_reduction['bus_ids'] == keep_bus_ids and \
+           (kron_reduction['load_injections'] == load_injections).all():
+            return kron_reduction
+
+        G, B = self.get_admittance_matrix(generate_on_exception=True)
+        Y = csc_matrix(G, dtype=complex) - 1j*csc_matrix(B, dtype=complex)
+
+        admittance_matrix_indices = dict((bus_id, index) for index, bus_id
+                                         in enumerate(admittance_matrix_index_bus_id_mapping))
+        keep_indices = array([admittance_matrix_indices[bus_id] for bus_id in keep_bus_ids], dtype=int)
+        eliminated_indices = array([admittance_matrix_indices[bus_id] for bus_id in eliminated_bus_ids], dtype=int)
+
+        Y_kk = Y[keep_indices, :][:, keep_indices]
+        if eliminated_indices.shape[0] == 0:
+            Y_reduced = Y_kk.toarray()
+        else:
+            V = self.bus_arrays.V[self._get_bus_positions(eliminated_bus_ids)]
+            # a load drawing S = -(P + jQ) is the admittance conj(S)/V^2
+            load_admittances = (-load_injections[:, 0] + 1j*load_injections[:, 1])/V**2
+            Y_ee = Y[eliminated_indices, :][:, eliminated_indices] + diags(load_admittances, format='csc')
+            Y_ek = Y[eliminated_indices, :][:, keep_indices]
+            Y_ke = Y[keep_indices, :][:, eliminated_indices]
+            # a sparse right hand side is solved one column at a time, Y_ek is never densified
+            Y_ee_inv_Y_ek = spsolve(csc_matrix(Y_ee), csc_matrix(Y_ek))
+            if len(keep_bus_ids) == 1:
+                # a single column comes back as a dense vector
+                Y_ee_inv_Y_ek = csc_matrix(Y_ee_inv_Y_ek.reshape((-1, 1)))
+            Y_reduced = (Y_kk - Y_ke.dot(Y_ee_inv_Y_ek)).toarray()
+
+        G_reduced = csr_matrix(Y_reduced.real)
+        B_reduced = csr_matrix(-Y_reduced.imag)
+        num_kept = len(keep_bus_ids)
+        density = float(csr_matrix(Y_reduced).nnz)/max(num_kept**2, 1)
+        debug('Kron reduction onto %i of %i buses, reduced admittance matrix density %.3f' %
+              (num_kept, len(admittance_matrix_index_bus_id_mapping), density))
+
+        self.kron_reduction = {
+            'G': G_reduced,
+            'B': B_reduced,
+            'bus_ids': keep_bus_ids,
+            'density': density,
+            'load_injections': load_injections
+        }
+        return self.kron_reduction
+
+
+    def _get_sensitivity_factors_topology(self):
+        bus_ids = self.get_buses_index_bus_id_mapping()
+        reference_bus_id = self.get_slack_bus_id()
+        if reference_bus_id is None:
+            reference_bus_id = self.get_voltage_angle_reference_bus_id()
+        if reference_bus_id is None:
+            reference_bus_id = bus_ids[0]
+        lines = tuple([(power_line.get_id(), power_line.bus_a.get_id(), power_line.bus_b.get_id(), tuple(power_line.y))
+                       for power_line in self.power_lines])
+        return tuple(bus_ids), reference_bus_id, lines
+
+
+    def get_sensitivity_factors(self):
+        """
+        Returns the SensitivityFactors (PTDFs and LODFs) of the network's current topology. The factorization and every
+        factor computed so far are cached until the buses, lines, line admittances or slack bus change.
+        """
+        topology = self._get_sensitivity_factors_topology()
+        try:
+            if self.sensitivity_factors_topology == topology:
+                return self.sensitivity_factors
+        except AttributeError:
+            pass
+
+        bus_ids, reference_bus_id, lines = topology
+        # the topology was taken with the bus id mapping, so the bus index is current
+        bus_positions = self.buses_index_by_bus_id
+        self.sensitivity_factors = SensitivityFactors(list(bus_ids), [line_id for line_id, _, _, _ in lines],
+                                                      [bus_positions[bus_a_id] for _, bus_a_id, _, _ in lines],
+                                                      [bus_positions[bus_b_id] for _, _, bus_b_id, _ in lines],
+                                                      # b is negative for inductive lines
+                                                      [-y[1] for _, _, _, y in lines],
+                                                      bus_positions[reference_bus_id])
+        self.sensitivity_factors_topology = topology
+        return self.sensitivity_factors
+
+
+    def get_ptdf(self, power_line_ids=None):
+        """
+        Returns the PTDFs of the given (by default all) power lines, with one column per bus in the order of
+        get_buses_index_bus_id_mapping.
+        """
+        return self.get_sensitivity_factors().get_ptdf(line_ids=power_line_ids)
+
+
+    def get_lodf(self, monitored_power_line_ids=None, outage_power_line_ids=None):
+        return self.get_sensitivity_factors().get_lodf(monitored_line_ids=monitored_power_line_ids,
+                                                       outage_line_ids=outage_power_line_ids)
+
+
+    def get_line_outage_contingencies(self, num_outages=1):
+        """
+        Returns every combination of num_outages power line ids, e.g., num_outages=2 for N-2 screening.
+        """
+        return list(combinations([power_line.get_id() for power_line in self.power_lines], num_outages))
+
+
+    def screen_contingencies(self, limits, contingencies=None, monitored_power_line_ids=None):
+        """
+        Screens line outage contingencies (all N-1 outages by default) with LODFs starting from the current real power
+        flows and returns the ones that need a full AC power flow, see SensitivityFactors.screen_contingencies.
+        """
+        if contingencies is None:
+            contingencies = self.get_line_outage_contingencies()
+        base_flows = array([power_line.get_current_real_power() for power_line in self.power_lines])
+        return self.get_sensitivity_factors().screen_contingencies(base_flows, contingencies, limits,
+                                                                   monitored_line_ids=monitored_power_line_ids)
+
+
+    def _get_bus_positions(self, bus_ids):
+        _ = self.get_buses_index_bus_id_mapping()
+        return array([self.buses_index_by_bus_id[bus_id] for bus_id in bus_ids], dtype=int)
+
+
+    def _get_admittance_matrix_bus_positions(self):
+        """
+        Returns the position in the bus list, and so in the bus arrays, of the bus at each admittance matrix index.
+        """
+        mapping = self.get_admittance_matrix_index_bus_id_mapping()
+        try:
+            cached_mapping, num_buses, positions = self._admittance_matrix_bus_positions
+            if cached_mapping is mapping and num_buses == len(self.buses):
+                return positions
+        except AttributeError:
+            pass
+        positions = self._get_bus_positions(mapping)
+        self._admittance_matrix_bus_positions = (mapping, len(self.buses), positions)
+        return positions
+
+
+    def _get_voltage_vector_indices(self):
+        """
+        Returns the bus array rows of the voltage angles and magnitudes in the power flow state vector and their slots
+        in it. Buses enter in admittance matrix order with their angle followed by their magnitude, PV buses with only
+        their angle and the slack bus not at all. The indices are kept until the static vars list changes.
+        """
+        mapping = self.get_admittance_matrix_index_bus_id_mapping()
+        positions = self._get_admittance_matrix_bus_positions()
+        try:
+            voltage_is_static_list = self.voltage_is_static_list
+        except AttributeError:
+            voltage_is_static_list = None
+        else:
+            try:
+                cached_mapping, cached_voltage_is_static_list, indices = self._voltage_vector_indices
+                if cached_mapping is mapping and cached_voltage_is_static_list is voltage_is_static_list:
+                    return indices
+            except AttributeError:
+                pass
+
+        if voltage_is_static_list is None:
+            voltage_is_static = array([self.buses[position].is_voltage_polar_static() for position in positions.tolist()],
+                                      dtype=bool).reshape((-1, 2))
+        else:
+            voltage_is_static = array(list(voltage_is_static_list), dtype=bool).reshape((-1, 2))
+
+        in_vector = ~(voltage_is_static[:, 0] & voltage_is_static[:, 1])
+        has_magnitude = ~voltage_is_static[in_vector, 0]
+        theta_rows = positions[in_vector]
+        theta_slots = cumsum(1 + has_magnitude) - (1 + has_magnitude)
+        indices = (theta_rows, theta_slots, theta_rows[has_magnitude], theta_slots[has_magnitude] + 1,
+                   int(in_vector.sum() + has_magnitude.sum()))
+        if voltage_is_static_list is not None:
+            self._voltage_vector_indices = (mapping, voltage_is_static_list, indices)
+        return indices
+
+
     def _get_current_voltage_vector(self):
         # don't need the output, just need to ensure a slack bus has been selected
         _ = self.get_slack_bus_id()
-        voltage_vector = array([])
-        for bus_id in self.get_admittance_matrix_index_bus_id_mapping():
-            bus = self.get_bus_by_id(bus_id)
-            if self.is_slack_bus_by_id(bus_id) is True:
-                continue
-            V, theta = bus.get_current_voltage_polar()
-            # if self.is_voltage_angle_reference_bus_by_id(bus_id) is False:
-            voltage_vector = append(voltage_vector, [theta])
-            if bus.is_pv_bus() is False:
-                voltage_vector = append(voltage_vector, [V])
-
+        theta_rows, theta_slots, V_rows, V_slots, size = self._get_voltage_vector_indices()
+        voltage_vector = empty(size)
+        voltage_vector[theta_slots] = self.bus_arrays.theta[theta_rows]
+        voltage_vector[V_slots] = self.bus_arrays.V[V_rows]
         return voltage_vector
         
     
     def _save_new_voltages_from_vector(self, new_voltage_vector, replace=True):
-        i = 0
-        for bus_id in self.get_admittance_matrix_index_bus_id_mapping():
-            bus = self.get_bus_by_id(bus_id)
-            if self.is_slack_bus(bus) is True:
-                continue
-
-            if bus.is_pv_bus() is True:
-                # if this is a pv bus we only want to update the voltage angle
-                bus.update_voltage_angle(new_voltage_vector[i], replace=replace)
-            else:
-                # all other buses update both the voltage magnitude and angle
-                bus.update_voltage_polar((new_voltage_vector[i+1], new_voltage_vector[i]), replace=replace)
-                i += 1
-
-            i += 1
+        theta_rows, theta_slots, V_rows, V_slots, _ = self._get_voltage_vector_indices()
+        if replace is True:
+            self.bus_arrays.theta[theta_rows] = new_voltage_vector[theta_slots]
+            self.bus_arrays.V[V_rows] = new_voltage_vector[V_slots]
+        else:
+            # histories are kept by the buses
+            for row, theta in zip(theta_rows.tolist(), new_voltage_vector[theta_slots].tolist()):
+                self.buses[row].update_voltage_angle(theta, replace=False)
+            for row, V in zip(V_rows.tolist(), new_voltage_vector[V_slots].tolist()):
+                self.buses[row].update_voltage_magnitude(V, replace=False)
             
     
+    def get_current_voltage_angles(self):
+        """
+        Returns an array of the current voltage angles of all buses, in the same order as the bus list.
+        """
+        return self.bus_arrays.theta.copy()
+
+
     def reset_voltages_to_flat_profile(self):
         for bus in self.buses:
             if(bus.is_pv_bus() is False):
@@ -613,39 +1145,53 @@ class PSys(object):
 
 
     def _generate_function_vector(self):
-        function_vector = array([])
-        admittance_matrix_index_bus_id_mapping = self.get_admittance_matrix_index_bus_id_mapping()
+        voltage_is_static_list, _, _, _, _, _ = self._get_static_vars_list()
+        self_admittances, _, rows, indices, admittances = self._get_static_vars_arrays()
+        positions = self._get_admittance_matrix_bus_positions()
 
-        (voltage_is_static_list, _, connected_bus_ids_list, interconnection_admittance_list,
-         self_admittance_list, _) = self._get_static_vars_list()
+        V = self.bus_arrays.V[positions]
+        theta = self.bus_arrays.theta[positions]
+        P_network, Q_network = compute_apparent_powers_injected_from_network(V, theta, self_admittances, rows,
+                                                                             V[indices], theta[indices], admittances)
+        injections = array([self.buses[position].get_apparent_power_injection() for position in positions.tolist()],
+                           dtype=float).reshape((-1, 2))
 
-        voltage_list, _ = self._get_varying_vars_list(admittance_matrix_index_bus_id_mapping)
+        # the real power mismatch is only in the function vector if the voltage angle is not static, the reactive
+        # power mismatch if the voltage magnitude is not static, buses enter in admittance matrix order
+        mismatches = column_stack((P_network - injections[:, 0], Q_network - injections[:, 1]))
+        voltage_is_static = array(list(voltage_is_static_list), dtype=bool).reshape((-1, 2))
+        return mismatches[~voltage_is_static[:, ::-1]]
 
-        for index, bus_id in enumerate(admittance_matrix_index_bus_id_mapping):
-            
-            voltage_magnitude_is_static, voltage_angle_is_static = voltage_is_static_list[index]
-            
-            # does not enter the function vector if the voltage magnitude and angle are static
-            if voltage_magnitude_is_static is True and voltage_angle_is_static is True:
-                continue
-                
-            Vpolar_i = voltage_list[index]
-            Yii = self_admittance_list[index]
-            
-            P_injected, Q_injected = self.get_bus_by_id(bus_id).get_apparent_power_injection()
-            
-            fp, fq = fp_fq_helper(P_injected, Q_injected, Vpolar_i, Yii,
-                                  admittance_matrix_index_bus_id_mapping,
-                                  voltage_list, connected_bus_ids_list[index],
-                                  interconnection_admittance_list[index])
 
-            if voltage_angle_is_static is False:
-                function_vector = append(function_vector, fp)
-            
-            if voltage_magnitude_is_static is False:
-                function_vector = append(function_vector, fq)
-        # print function_vector
-        return function_vector
+    def _get_static_vars_arrays(self):
+        """
+        Returns the self admittances of the static vars list and, in CSR layout by admittance matrix index (with the
+        row of every entry), the admittance matrix indices of the connected buses and the interconnection admittances,
+        as arrays. They are kept until the static vars list changes.
+        """
+        _, _, connected_bus_ids_list, interconnection_admittance_list, self_admittance_list, _ = \
+            self._get_static_vars_list()
+        mapping = self.get_admittance_matrix_index_bus_id_mapping()
+        try:
+            cached_mapping, cached_connected_bus_ids_list, static_vars_arrays = self._static_vars_arrays
+            if cached_mapping is mapping and cached_connected_bus_ids_list is connected_bus_ids_list:
+                return static_vars_arrays
+        except AttributeError:
+            pass
+
+        admittance_matrix_index_by_bus_id = self._get_admittance_matrix_index_by_bus_id()
+        num_connected_buses = [len(connected_bus_ids) for connected_bus_ids in connected_bus_ids_list]
+        indptr = cumsum([0] + num_connected_buses, dtype=int)
+        rows = repeat(arange(len(num_connected_buses)), num_connected_buses)
+        indices = array([admittance_matrix_index_by_bus_id[bus_id] for connected_bus_ids in connected_bus_ids_list
+                         for bus_id in connected_bus_ids], dtype=int)
+        admittances = array([y for interconnection_admittance in interconnection_admittance_list
+                             for y in interconnection_admittance], dtype=float).reshape((-1, 2))
+        self_admittances = array(list(self_admittance_list), dtype=float).reshape((-1, 2))
+
+        static_vars_arrays = (self_admittances, indptr, rows, indices, admittances)
+        self._static_vars_arrays = (mapping, connected_bus_ids_list, static_vars_arrays)
+        return static_vars_arrays
 
 
     def _generate_jacobian_matrix(self):
@@ -665,11 +1211,11 @@ class PSys(object):
         n = num_buses*2 - num_pv_buses
 
         J = zeros((n, n))
-        Parallel()(delayed(compute_jacobian_row_by_bus)
-                   (J, index, voltage_is_static_list, has_dynamic_model_list, connected_bus_ids_list,
-                    jacobian_indices, admittance_matrix_index_bus_id_mapping,
-                    interconnection_admittance_list, self_admittance_list, voltage_list,
-                    dgr_derivatives) for index, _ in enumerate(admittance_matrix_index_bus_id_mapping))
+        for index in xrange(len(admittance_matrix_index_bus_id_mapping)):
+            compute_jacobian_row_by_bus(J, index, voltage_is_static_list, has_dynamic_model_list, connected_bus_ids_list,
+                                        jacobian_indices, admittance_matrix_index_bus_id_mapping,
+                                        interconnection_admittance_list, self_admittance_list, voltage_list,
+                                        dgr_derivatives)
 
         # no need to save as sparse matrix if there's only one element, and it breaks spsolve
         if n > 1:
@@ -678,21 +1224,25 @@ class PSys(object):
 
 
     def _get_varying_vars_list(self, index_bus_id_mapping=None):
-        if index_bus_id_mapping is None:
-            index_bus_id_mapping = self.get_admittance_matrix_index_bus_id_mapping()
-        return frompyfunc(self._varying_var_helper, 1, 2)(index_bus_id_mapping)
-
-
-    def _varying_var_helper(self, bus_id):
-        bus = self.get_bus_by_id(bus_id)
-        Vpolar = bus.get_current_voltage_polar()
-        
-        if bus.has_dynamic_model() is True and bus.is_pv_bus() is False:
-            dgr_derivatives = bus.get_apparent_power_derivatives()
+        """
+        Returns the polar voltage of each bus in index_bus_id_mapping (by default the admittance matrix order), read
+        from the bus arrays, and the apparent power derivatives of its model if it is dynamic and not a PV bus.
+        """
+        if index_bus_id_mapping is None or index_bus_id_mapping is self.get_admittance_matrix_index_bus_id_mapping():
+            positions = self._get_admittance_matrix_bus_positions()
         else:
-            dgr_derivatives = ()
+            positions = self._get_bus_positions(index_bus_id_mapping)
+
+        voltage_list = zip(self.bus_arrays.V[positions].tolist(), self.bus_arrays.theta[positions].tolist())
+        dgr_derivatives = []
+        for position in positions.tolist():
+            bus = self.buses[position]
+            if bus.has_dynamic_model() is True and bus.is_pv_bus() is False:
+                dgr_derivatives.append(bus.get_apparent_power_derivatives())
+            else:
+                dgr_derivatives.append(())
 
-        return Vpolar, dgr_derivatives
+        return voltage_list, dgr_derivatives
 
         
     def save_static_vars_list(self, index_bus_id_mapping=None):
@@ -738,17 +1288,7 @@ class PSys(object):
         (voltage_is_static_list, has_dynamic_model_list, connected_bus_ids_list, interconnection_admittance_list, 
          self_admittance_list) = frompyfunc(self._static_var_helper, 1, 5)(index_bus_id_mapping)
         
-        jacobian_indices = []
-        current_index = 0
-        for index, bus_id in enumerate(index_bus_id_mapping):
-            if voltage_is_static_list[index][0] is True and voltage_is_static_list[index][1] is True:
-                jacobian_indices.append(None)
-            else:
-                jacobian_indices.append(current_index)
-                if voltage_is_static_list[index][0] is True:
-                    current_index += 1
-                else:
-                    current_index += 2   
+        jacobian_indices = _get_jacobian_indices(voltage_is_static_list)
 
         return (voltage_is_static_list, has_dynamic_model_list, connected_bus_ids_list,
                 interconnection_admittance_list, self_admittance_list, jacobian_indices)
@@ -765,6 +1305,56 @@ class PSys(object):
                 connected_bus_ids, interconnection_admittance, self_admittance)
 
 
+    def save_static_vars_list_from_admittance_matrix(self, jacobian_indices=None):
+        """
+        Builds the static vars list from the sparsity pattern of the admittance matrix instead of from the power lines,
+        for networks whose admittance matrix is loaded rather than generated.
+        """
+        mapping = self.get_admittance_matrix_index_bus_id_mapping()
+        G, B = self.get_admittance_matrix()
+        G = csr_matrix(G)
+        B = csr_matrix(B)
+        pattern = csr_matrix(abs(G) + abs(B))
+        pattern.eliminate_zeros()
+        pattern.sort_indices()
+        rows, columns = pattern.nonzero()
+        g = asarray(G[rows, columns]).ravel().tolist()
+        b = asarray(B[rows, columns]).ravel().tolist()
+
+        voltage_is_static_list = []
+        has_dynamic_model_list = []
+        connected_bus_ids_list = []
+        interconnection_admittance_list = []
+        self_admittance_list = []
+        for i, bus_id in enumerate(mapping):
+            bus = self.get_bus_by_id(bus_id)
+            voltage_is_static_list.append(bus.is_voltage_polar_static())
+            has_dynamic_model_list.append(bus.has_dynamic_model())
+            connected_bus_ids = []
+            interconnection_admittance = []
+            self_admittance = (0., 0.)
+            for k in range(pattern.indptr[i], pattern.indptr[i + 1]):
+                j = pattern.indices[k]
+                if j == i:
+                    self_admittance = (g[k], b[k])
+                else:
+                    connected_bus_ids.append(mapping[j])
+                    interconnection_admittance.append((g[k], b[k]))
+            connected_bus_ids_list.append(connected_bus_ids)
+            interconnection_admittance_list.append(interconnection_admittance)
+            self_admittance_list.append(self_admittance)
+
+        if jacobian_indices is None:
+            jacobian_indices = _get_jacobian_indices(voltage_is_static_list)
+
+        self.voltage_is_static_list = voltage_is_static_list
+        self.has_dynamic_model_list = has_dynamic_model_list
+        self.connected_bus_ids_list = connected_bus_ids_list
+        self.interconnection_admittance_list = interconnection_admittance_list
+        self.self_admittance_list = self_admittance_list
+        self.jacobian_indices = jacobian_indices
+
+
     def solve_power_flow(self, optimal_ordering=True, append=True, force_static_var_recompute=False):
         # need to check if ordering has changed since admittance matrix was last generated
         if optimal_ordering != self.is_admittance_matrix_index_bus_id_mapping_optimal():
@@ -789,14 +1379,58 @@ class PSys(object):
         
         
     def _compute_and_save_line_power_flows(self, append=True):
-        for power_line in self.power_lines:
-            P, Q = self._compute_line_power_flow(power_line)
-            if append is True:
-                power_line.append_complex_power(P, Q)
-            elif append is False:
-                power_line.replace_complex_power(P, Q)
-            else:
-                raise PowerNetworkError('cannot compute power flows, append kwarg must be True or False')
+        if append is not True and append is not False:
+            raise PowerNetworkError('cannot compute power flows, append kwarg must be True or False')
+
+        P, Q = self._compute_line_power_flows()
+        if append is True:
+            # histories are kept by the power lines
+            for power_line, Pij, Qij in zip(self.power_lines, P.tolist(), Q.tolist()):
+                power_line.append_complex_power(Pij, Qij)
+        else:
+            self.branch_arrays.Pab[:] = P
+            self.branch_arrays.Qab[:] = Q
+
+
+    def _get_power_line_bus_positions(self):
+        """
+        Returns the positions in the bus list of the two buses of every power line, one row per power line.
+        """
+        try:
+            num_power_lines, num_buses, positions = self._power_line_bus_positions
+            if num_power_lines == len(self.power_lines) and num_buses == len(self.buses):
+                return positions
+        except AttributeError:
+            pass
+        _ = self.get_buses_index_bus_id_mapping()
+        positions = array([(self.buses_index_by_bus_id[power_line.bus_a.get_id()],
+                            self.buses_index_by_bus_id[power_line.bus_b.get_id()])
+                           for power_line in self.power_lines], dtype=int).reshape((-1, 2))
+        self._power_line_bus_positions = (len(self.power_lines), len(self.buses), positions)
+        return positions
+
+
+    def _compute_line_power_flows(self):
+        """
+        Vectorized _compute_line_power_flow, returns arrays of the real and reactive power flowing from the first to
+        the second bus of every power line.
+        """
+        bus_positions = self._get_admittance_matrix_bus_positions()
+        matrix_indices = empty(bus_positions.shape[0], dtype=int)
+        matrix_indices[bus_positions] = arange(bus_positions.shape[0])
+        power_line_bus_positions = self._get_power_line_bus_positions()
+        a = power_line_bus_positions[:, 0]
+        b = power_line_bus_positions[:, 1]
+
+        G, B = self.get_admittance_matrix()
+        Gij = asarray(csr_matrix(G)[matrix_indices[a], matrix_indices[b]]).ravel()
+        Bij = asarray(csr_matrix(B)[matrix_indices[a], matrix_indices[b]]).ravel()
+        Vi = self.bus_arrays.V[a]
+        Vj = self.bus_arrays.V[b]
+        thetaij = self.bus_arrays.theta[a] - self.bus_arrays.theta[b]
+        Pij = -Gij*Vi**2 + Vi*Vj*(Gij*cos(thetaij) - Bij*sin(thetaij))
+        Qij = -Bij*Vi**2 + Vi*Vj*(Gij*sin(thetaij) + Bij*cos(thetaij))
+        return Pij, Qij
 
             
     def _compute_line_power_flow(self, power_line):
@@ -812,22 +1446,21 @@ class PSys(object):
 
     
     def compute_apparent_power_injected_from_network(self, bus):
-        admittance_matrix_index_bus_id_mapping = self.get_admittance_matrix_index_bus_id_mapping()
-
-        _, _, connected_bus_ids_list, interconnection_admittance_list, self_admittance, _ = self._get_static_vars_list()
-
-        voltage_list, _ = self._get_varying_vars_list(admittance_matrix_index_bus_id_mapping)
-
-        bus_id = bus.get_id()
-        index = admittance_matrix_index_bus_id_mapping.index(bus_id)
-                
-        Vpolar_i = voltage_list[index]
-        Yii = self_admittance[index]
-        
-        return compute_apparent_power_injected_from_network(Vpolar_i, Yii,
-                                                            admittance_matrix_index_bus_id_mapping,
-                                                            voltage_list, connected_bus_ids_list[index],
-                                                            interconnection_admittance_list[index])
+        self_admittances, indptr, _, indices, admittances = self._get_static_vars_arrays()
+        positions = self._get_admittance_matrix_bus_positions()
+        index = self._get_admittance_matrix_index_from_bus_id(bus.get_id())
+        connected = slice(indptr[index], indptr[index + 1])
+        # only the voltages of the bus and its connected buses are read
+        bus_position = positions[index:(index + 1)]
+        connected_bus_positions = positions[indices[connected]]
+        P, Q = compute_apparent_powers_injected_from_network(self.bus_arrays.V[bus_position],
+                                                             self.bus_arrays.theta[bus_position],
+                                                             self_admittances[index:(index + 1)],
+                                                             zeros(connected_bus_positions.shape[0], dtype=int),
+                                                             self.bus_arrays.V[connected_bus_positions],
+                                                             self.bus_arrays.theta[connected_bus_positions],
+                                                             admittances[connected])
+        return P[0], Q[0]
 
 
     def get_buses_with_dynamic_models(self):
@@ -910,34 +1543,502 @@ class PSys(object):
         return state_array[k:(k+num_states)]
 
 
-    def get_dynamic_state_time_derivative_array(self, current_states=None):
-        dynamic_state_derivatives = empty(0)
+    def _get_dynamic_state_slices(self):
+        """
+        Returns the bus id and the start and stop position of the states of each bus in the dynamic state array. The
+        slices are kept until the dynamic state mapping is rebuilt.
+        """
         try:
             dynamic_state_bus_index_mapping = self.dynamic_state_bus_index_mapping
         except AttributeError:
             raise AttributeError('FILL IN')
-        
+
+        try:
+            cached_mapping, dynamic_state_slices = self._dynamic_state_slices
+            if cached_mapping is dynamic_state_bus_index_mapping:
+                return dynamic_state_slices
+        except AttributeError:
+            pass
+
+        num_states = [num_states for _, num_states in dynamic_state_bus_index_mapping]
+        stops = cumsum(num_states, dtype=int).tolist()
+        dynamic_state_slices = [(bus_id, stop - num_states_i, stop) for (bus_id, num_states_i), stop
+                                in zip(dynamic_state_bus_index_mapping, stops)]
+        self._dynamic_state_slices = (dynamic_state_bus_index_mapping, dynamic_state_slices)
+        return dynamic_state_slices
+
+
+    def get_dynamic_state_time_derivative_array(self, current_states=None, bus_ids=None):
+        """
+        Returns the time derivatives of the dynamic states, of all buses or only of those in the set bus_ids, for the
+        current bus voltages.
+        """
         if current_states is None:
             current_states = self.get_current_dynamic_states()
-            
-        for bus_id, num_states in dynamic_state_bus_index_mapping:
-            current_states_i = self._parse_current_dynamic_state_array(current_states, bus_id, num_states)
-            dynamic_state_derivatives_i = self.get_bus_by_id(bus_id).get_dynamic_state_time_derivative_array(current_states=current_states_i)
-            dynamic_state_derivatives = hstack((dynamic_state_derivatives, dynamic_state_derivatives_i))
-        
-        return dynamic_state_derivatives
+
+        dynamic_state_derivatives = []
+        for bus_id, start, stop in self._get_dynamic_state_slices():
+            if bus_ids is not None and bus_id not in bus_ids:
+                continue
+            dynamic_state_derivatives.append(self.get_bus_by_id(bus_id).get_dynamic_state_time_derivative_array(
+                current_states=current_states[start:stop]))
+
+        if dynamic_state_derivatives == []:
+            return empty(0)
+        return hstack(dynamic_state_derivatives)
 
 
     def update_dynamic_states(self, numerical_integration_method):
         current_states = self.get_current_dynamic_states()
         updated_states = numerical_integration_method(current_states, self.get_dynamic_state_time_derivative_array)
-        for bus_id, num_states in self.dynamic_state_bus_index_mapping:
-            updated_states_i = self._parse_current_dynamic_state_array(updated_states, bus_id, num_states)
-            self.get_bus_by_id(bus_id).save_new_dynamic_state_array(updated_states_i)
+        for bus_id, start, stop in self._get_dynamic_state_slices():
+            self.get_bus_by_id(bus_id).save_new_dynamic_state_array(updated_states[start:stop])
+
+
+    def get_dynamic_state_indices(self, bus_ids):
+        """
+        Returns the positions in the dynamic state array of the states of the given buses, in the array's order.
+        """
+        indices = []
+        for bus_id, start, stop in self._get_dynamic_state_slices():
+            if bus_id in bus_ids:
+                indices.extend(range(start, stop))
+        return array(indices, dtype=int)
+
+
+    def prepare_for_multirate_dynamic_state_update(self, multirate_integrator):
+        """
+        Groups the buses with dynamic models by the rate the integrator assigns to their models' natural time scales
+        and starts the integrator from the current dynamic states.
+        """
+        current_states = self.get_current_dynamic_states()
+        self.rate_group_bus_ids = {}
+        for bus in self.get_buses_with_dynamic_models():
+            rate = multirate_integrator.get_rate(bus.get_natural_time_scale())
+            self.rate_group_bus_ids.setdefault(rate, set()).add(bus.get_id())
+
+        multirate_integrator.set_rate_groups(dict([(rate, self.get_dynamic_state_indices(bus_ids)) for rate, bus_ids
+                                                   in self.rate_group_bus_ids.iteritems()]))
+        multirate_integrator.initialize(current_states)
+        self._num_multirate_steps = 0
+
 
+    def _get_rate_group_dynamic_state_time_derivative_array(self, current_states, rate, t):
+        if t == 0.:
+            return self.get_dynamic_state_time_derivative_array(current_states=current_states,
+                                                                bus_ids=self.rate_group_bus_ids[rate])
 
-    def update_algebraic_states(self, admittance_matrix_recompute_required=False):
+        # t is in base steps after the start of the step, the bus voltages are extrapolated along their change over
+        # the previous base step
+        V, theta, V_slope, theta_slope = self._multirate_voltage_slopes
+        self.bus_arrays.V[:] = V + t*V_slope
+        self.bus_arrays.theta[:] = theta + t*theta_slope
+        try:
+            return self.get_dynamic_state_time_derivative_array(current_states=current_states,
+                                                                bus_ids=self.rate_group_bus_ids[rate])
+        finally:
+            self.bus_arrays.V[:] = V
+            self.bus_arrays.theta[:] = theta
+
+
+    def update_dynamic_states_multirate(self, multirate_integrator):
+        """
+        Advances the dynamic states by one base step of the multi-rate integrator. The models are coupled through the
+        bus voltages, which are only solved for at the end of each base step, so the models see them extrapolated
+        linearly from the last two power flows, e.g., over the whole step of a slow group. The voltages are held
+        constant for the first two steps after the integrator was (re)started, so that a jump caused by an event at the
+        restart is not extrapolated.
+        """
+        V, theta = self.bus_arrays.V.copy(), self.bus_arrays.theta.copy()
+        self._num_multirate_steps += 1
+        if self._num_multirate_steps > 2:
+            V_previous, theta_previous = self._multirate_voltages
+            self._multirate_voltage_slopes = (V, theta, V - V_previous, theta - theta_previous)
+        else:
+            self._multirate_voltage_slopes = (V, theta, zeros(V.shape[0]), zeros(theta.shape[0]))
+        self._multirate_voltages = (V, theta)
+
+        current_states = self.get_current_dynamic_states()
+        updated_states = multirate_integrator.step(current_states,
+                                                   self._get_rate_group_dynamic_state_time_derivative_array)
+        for bus_id, start, stop in self._get_dynamic_state_slices():
+            self.get_bus_by_id(bus_id).save_new_dynamic_state_array(updated_states[start:stop])
+
+
+    def update_algebraic_states(self, admittance_matrix_recompute_required=False, append=True):
+        """
+        Solves the network equations for the current dynamic states. With append=False the bus voltages and line flows
+        are overwritten in place instead of extending their histories.
+        """
         if admittance_matrix_recompute_required is True:
             _, _ = self.save_admittance_matrix()
         if self.is_homogenous_kuramoto() is False:
-            _ = n.solve_power_flow(force_static_var_recompute=force_static_var_recompute, append=append)
+            _ = self.solve_power_flow(force_static_var_recompute=admittance_matrix_recompute_required, append=append)
+
+
+    def _get_voltage_vector_bus_ids(self):
+        """
+        Returns the id of the bus each entry of the voltage vector of the power flow belongs to, from the same static
+        voltage flags as _get_voltage_vector_indices.
+        """
+        theta_rows, theta_slots, V_rows, V_slots, size = self._get_voltage_vector_indices()
+        rows = empty(size, dtype=int)
+        rows[theta_slots] = theta_rows
+        rows[V_slots] = V_rows
+        bus_ids = self.get_buses_index_bus_id_mapping()
+        return [bus_ids[row] for row in rows.tolist()]
+
+
+    def _get_function_vector_rows_by_bus_id(self):
+        """
+        Returns a dictionary of the rows of the real and reactive power mismatch of each bus in the function vector of
+        the power flow, None if the mismatch is not part of it.
+        """
+        voltage_is_static_list, _, _, _, _, _ = self._get_static_vars_list()
+        function_vector_rows = {}
+        i = 0
+        for index, bus_id in enumerate(self.get_admittance_matrix_index_bus_id_mapping()):
+            voltage_magnitude_is_static, voltage_angle_is_static = voltage_is_static_list[index]
+            p_row, q_row = None, None
+            if voltage_angle_is_static is False:
+                p_row = i
+                i += 1
+            if voltage_magnitude_is_static is False:
+                q_row = i
+                i += 1
+            function_vector_rows[bus_id] = (p_row, q_row)
+        return function_vector_rows
+
+
+    def get_linearized_dynamic_equations(self, perturbation=1e-6):
+        """
+        Linearizes dx/dt = f(x, y), 0 = g(x, y) around the current operating point, where x is the dynamic state array
+        and y the voltage vector of the power flow, and returns the sparse blocks f_x, f_y, g_x and g_y. g_y is the
+        power flow Jacobian and g_x comes from the models' derivatives of their power injections, f_x and f_y are
+        forward differences of each model's state derivatives with respect to its own states and the voltages of its
+        own and connected buses.
+        """
+        current_states = self.get_current_dynamic_states()
+        current_derivatives = self.get_dynamic_state_time_derivative_array(current_states=current_states)
+        num_states = current_states.shape[0]
+
+        f_x = lil_matrix((num_states, num_states))
+        k = 0
+        for bus_id, num_states_i in self.dynamic_state_bus_index_mapping:
+            bus = self.get_bus_by_id(bus_id)
+            current_states_i = current_states[k:(k + num_states_i)]
+            for j in range(0, num_states_i):
+                perturbed_states_i = current_states_i.copy()
+                perturbed_states_i[j] += perturbation
+                f_x[k:(k + num_states_i), k + j] = ((bus.get_dynamic_state_time_derivative_array(
+                    current_states=perturbed_states_i) - current_derivatives[k:(k + num_states_i)])/perturbation)[:, None]
+            k += num_states_i
+
+        theta_rows, theta_slots, V_rows, V_slots, num_voltages = self._get_voltage_vector_indices()
+        voltage_columns = [None]*num_voltages
+        for name, rows, slots in [('theta', theta_rows, theta_slots), ('V', V_rows, V_slots)]:
+            for row, slot in zip(rows.tolist(), slots.tolist()):
+                voltage_columns[slot] = (name, row)
+
+        # a bus voltage only enters the state derivatives of its own and connected buses' models, the connected buses
+        # are read from the sparsity pattern of the admittance matrix, by bus position
+        G, B = self.get_admittance_matrix()
+        pattern = csr_matrix(abs(csr_matrix(G)) + abs(csr_matrix(B)))
+        pattern.eliminate_zeros()
+        positions = self._get_admittance_matrix_bus_positions()
+        connected_positions = {}
+        for i, position in enumerate(positions.tolist()):
+            connected_positions[position] = set(positions[pattern.indices[pattern.indptr[i]:pattern.indptr[i + 1]]]
+                                                .tolist() + [position])
+
+        _ = self.get_buses_index_bus_id_mapping()
+        dynamic_state_slices = dict([(self.buses_index_by_bus_id[bus_id], (bus_id, start, stop)) for bus_id, start, stop
+                                     in self._get_dynamic_state_slices()])
+
+        f_y = lil_matrix((num_states, num_voltages))
+        for j, (name, position) in enumerate(voltage_columns):
+            affected_slices = sorted([dynamic_state_slices[affected_position] for affected_position
+                                      in connected_positions[position] if affected_position in dynamic_state_slices],
+                                     key=itemgetter(1))
+            if affected_slices == []:
+                continue
+            rows = concatenate([arange(start, stop) for _, start, stop in affected_slices])
+            # only the perturbed bus voltage is changed, in place
+            voltages = getattr(self.bus_arrays, name)
+            voltage = voltages[position]
+            voltages[position] = voltage + perturbation
+            try:
+                perturbed_derivatives = self.get_dynamic_state_time_derivative_array(
+                    current_states=current_states, bus_ids=set([bus_id for bus_id, _, _ in affected_slices]))
+            finally:
+                voltages[position] = voltage
+            for row, derivative in zip(rows.tolist(), ((perturbed_derivatives - current_derivatives[rows])/perturbation)
+                                       .tolist()):
+                f_y[row, j] = derivative
+
+        g_y = csr_matrix(self._generate_jacobian_matrix())
+
+        function_vector_rows = self._get_function_vector_rows_by_bus_id()
+        g_x = lil_matrix((g_y.shape[0], num_states))
+        k = 0
+        for bus_id, num_states_i in self.dynamic_state_bus_index_mapping:
+            dP_dx, dQ_dx = self.get_bus_by_id(bus_id).get_apparent_power_state_derivatives()
+            p_row, q_row = function_vector_rows.get(bus_id, (None, None))
+            # the mismatch is network injection minus model injection
+            if p_row is not None:
+                g_x[p_row, k:(k + num_states_i)] = -dP_dx*ones(num_states_i)
+            if q_row is not None:
+                g_x[q_row, k:(k + num_states_i)] = -dQ_dx*ones(num_states_i)
+            k += num_states_i
+
+        return csr_matrix(f_x), csr_matrix(f_y), csr_matrix(g_x), g_y
+
+
+    def get_state_matrix(self, kron_elimination=None, max_kron_elimination_states=1000, perturbation=1e-6):
+        """
+        Returns the state matrix A and the matrix E of the linearized system E dz/dt = A z around the current
+        operating point. With Kron elimination of the algebraic variables, A = f_x - f_y g_y^-1 g_x is the reduced
+        state matrix of the dynamic states, in CSR format, and E is None, otherwise A and E are the sparse descriptor
+        pair of the dynamic states followed by the voltage vector. By default the algebraic variables are eliminated if
+        there are at most max_kron_elimination_states dynamic states.
+        """
+        f_x, f_y, g_x, g_y = self.get_linearized_dynamic_equations(perturbation=perturbation)
+        num_states = f_x.shape[0]
+
+        if kron_elimination is None:
+            kron_elimination = num_states <= max_kron_elimination_states
+
+        if g_y.shape[0] == 0:
+            return f_x, None
+
+        if kron_elimination is True:
+            g_y_lu = splu(csc_matrix(g_y))
+            A = f_x - f_y.dot(g_y_lu.solve(g_x.toarray()))
+            return csr_matrix(A), None
+
+        A = bmat([[f_x, f_y], [g_x, g_y]], format='csr')
+        E = diags(hstack((ones(num_states), zeros(g_y.shape[0]))), format='csr')
+        return A, E
+
+
+    def get_state_checkpoint(self):
+        """
+        Returns a dictionary of arrays holding the complete numeric state of the network: bus voltages, line flows,
+        static voltage flags, slack and reference buses, the admittance matrix and its bus ordering and the dynamic
+        state vector. Buses and power lines are referred to by their position in the network, so a checkpoint can be
+        restored into an identically constructed network in another process.
+        """
+        _ = self.get_buses_index_bus_id_mapping()
+
+        def get_bus_position(bus_id):
+            if bus_id is None:
+                return -1
+            return self.buses_index_by_bus_id[bus_id]
+
+        checkpoint = {}
+        checkpoint['bus_voltages'] = column_stack((self.bus_arrays.V, self.bus_arrays.theta))
+        checkpoint['bus_voltage_is_static'] = array([bus.is_voltage_polar_static() for bus in self.buses], dtype=bool)
+        checkpoint['power_line_flows'] = column_stack((self.branch_arrays.Pab, self.branch_arrays.Qab))
+        checkpoint['slack_bus_position'] = array(get_bus_position(self.get_slack_bus_id()))
+        slack_bus = self.get_slack_bus()
+        if slack_bus is not None:
+            checkpoint['slack_bus_voltage_was_static'] = array(slack_bus.is_voltage_polar_static_old, dtype=bool)
+        checkpoint['reference_bus_position'] = array(get_bus_position(self.get_voltage_angle_reference_bus_id()))
+
+        admittance_matrix_index_bus_id_mapping = self.get_admittance_matrix_index_bus_id_mapping(suppress_exception=True)
+        if admittance_matrix_index_bus_id_mapping is not None:
+            checkpoint['admittance_matrix_bus_positions'] = array([get_bus_position(bus_id) for bus_id
+                                                                   in admittance_matrix_index_bus_id_mapping])
+            optimal_ordering = self.is_admittance_matrix_index_bus_id_mapping_optimal()
+            checkpoint['admittance_matrix_optimal_ordering'] = array(-1 if optimal_ordering is None
+                                                                     else int(optimal_ordering))
+            try:
+                G, B = self.get_admittance_matrix()
+                for name, matrix in [('G', G), ('B', B)]:
+                    matrix = csr_matrix(matrix)
+                    checkpoint['%s_data' % name] = matrix.data
+                    checkpoint['%s_indices' % name] = matrix.indices
+                    checkpoint['%s_indptr' % name] = matrix.indptr
+            except PowerNetworkError:
+                pass
+
+        if len(self.get_buses_with_dynamic_models()) > 0:
+            checkpoint['dynamic_states'] = self.get_current_dynamic_states()
+            checkpoint['dynamic_state_bus_positions'] = array([(get_bus_position(bus_id), num_states) for bus_id, num_states
+                                                               in self.dynamic_state_bus_index_mapping], dtype=int)
+        return checkpoint
+
+
+    def restore_state_checkpoint(self, checkpoint):
+        """
+        Restores a checkpoint created by get_state_checkpoint without recomputing the power flow or the admittance
+        matrix. Values overwrite the current entries of the bus and power line histories.
+        """
+        if checkpoint['bus_voltages'].shape[0] != len(self.buses) or \
+           checkpoint['power_line_flows'].shape[0] != len(self.power_lines):
+            raise PowerNetworkError('checkpoint does not match the buses and power lines of this power network')
+
+        bus_ids = self.get_buses_index_bus_id_mapping()
+
+        def get_bus_id(bus_position):
+            bus_position = int(bus_position)
+            if bus_position < 0:
+                return None
+            return bus_ids[bus_position]
+
+        self.bus_arrays.V[:] = checkpoint['bus_voltages'][:, 0]
+        self.bus_arrays.theta[:] = checkpoint['bus_voltages'][:, 1]
+        # the slack bus is unset before the flags are restored and set again after, so that its model keeps the flags
+        # from before it became the slack bus and a later unset_slack_bus can restore them
+        self.unset_slack_bus()
+        for bus, voltage_is_static in zip(self.buses, checkpoint['bus_voltage_is_static'].tolist()):
+            if bus.is_voltage_polar_static() != (voltage_is_static[0], voltage_is_static[1]):
+                bus.set_is_voltage_polar_static(voltage_is_static[0], voltage_is_static[1])
+
+        slack_bus_id = get_bus_id(checkpoint['slack_bus_position'])
+        if slack_bus_id is not None:
+            slack_bus = self.get_bus_by_id(slack_bus_id)
+            # checkpoints without the flags from before are restored with the slack bus flags as they are
+            if 'slack_bus_voltage_was_static' in checkpoint:
+                v_static_old, theta_static_old = checkpoint['slack_bus_voltage_was_static'].tolist()
+                slack_bus.set_is_voltage_polar_static(v_static_old, theta_static_old)
+            _ = self.set_slack_bus(slack_bus)
+
+        self.branch_arrays.Pab[:] = checkpoint['power_line_flows'][:, 0]
+        self.branch_arrays.Qab[:] = checkpoint['power_line_flows'][:, 1]
+
+        self.reference_bus_id = get_bus_id(checkpoint['reference_bus_position'])
+
+        if 'admittance_matrix_bus_positions' in checkpoint:
+            optimal_ordering = int(checkpoint['admittance_matrix_optimal_ordering'])
+            self.admittance_matrix_index_bus_id_mapping = {
+                'optimal_ordering': None if optimal_ordering < 0 else bool(optimal_ordering),
+                'mapping': [get_bus_id(position) for position in checkpoint['admittance_matrix_bus_positions']]
+            }
+            if 'G_data' in checkpoint:
+                n = len(self.buses)
+                G, B = [lil_matrix(csr_matrix((checkpoint['%s_data' % name], checkpoint['%s_indices' % name],
+                                               checkpoint['%s_indptr' % name]), shape=(n, n))) for name in ['G', 'B']]
+                _, _ = self.save_admittance_matrix(G=G, B=B)
+                self.save_static_vars_list_from_admittance_matrix()
+
+        if 'dynamic_states' in checkpoint:
+            self.dynamic_state_bus_index_mapping = [(get_bus_id(position), int(num_states)) for position, num_states
+                                                    in checkpoint['dynamic_state_bus_positions']]
+            dynamic_states = checkpoint['dynamic_states']
+            for bus_id, start, stop in self._get_dynamic_state_slices():
+                self.get_bus_by_id(bus_id).save_new_dynamic_state_array(dynamic_states[start:stop])
+
+
+    def save_state_checkpoint(self, path):
+        return save_arrays_atomically(path, self.get_state_checkpoint())
+
+
+    def load_state_checkpoint(self, path):
+        checkpoint_file = load(path)
+        try:
+            self.restore_state_checkpoint(dict(checkpoint_file.items()))
+        finally:
+            checkpoint_file.close()
+
+
+    def _get_bus_table_type(self, bus):
+        if isinstance(bus, PVBus) is True:
+            return SLACK_BUS_TYPE if self.is_slack_bus(bus) is True else PV_BUS_TYPE
+        if isinstance(bus, PQBus) is True:
+            return PQ_BUS_TYPE
+        if bus.has_dynamic_model() is False and bus.has_generator_model() is False and bus.has_load_model() is False:
+            return NO_MODEL_BUS_TYPE
+        raise PowerNetworkError('bus with id %i has a model that cannot be saved, only PQ, PV and slack buses and '
+                                'buses without a model are supported' % bus.get_id())
+
+
+    def save(self, path):
+        """
+        Saves the network to a versioned .npz file that PSys.load reads back without rebuilding it: the bus and branch
+        tables of PSys.from_arrays, the state checkpoint (voltages, line flows, slack bus, the admittance matrix in CSR
+        form and its bus ordering) and the Jacobian row of each bus. Buses keep their names.
+        """
+        network_arrays = self.get_state_checkpoint()
+        network_arrays['format_version'] = array(NETWORK_FILE_FORMAT_VERSION)
+
+        network_arrays['bus_types'] = array([self._get_bus_table_type(bus) for bus in self.buses], dtype=int)
+        network_arrays['bus_powers'] = array([(bus.model.P[-1] if isinstance(bus, (PQBus, PVBus)) else 0.,
+                                               bus.model.Q[-1] if isinstance(bus, PQBus) else 0.)
+                                              for bus in self.buses], dtype=float).reshape((-1, 2))
+        network_arrays['bus_shunts'] = column_stack((self.bus_arrays.shunt_g, self.bus_arrays.shunt_b))
+        names = [bus.name for bus in self.buses]
+        network_arrays['bus_name_is_number'] = array([isinstance(name, (int, long)) for name in names], dtype=bool)
+        network_arrays['bus_names'] = array([u'' if name is None else unicode(name) for name in names], dtype=unicode)
+
+        network_arrays['branch_bus_positions'] = self._get_power_line_bus_positions()
+        network_arrays['branch_admittances'] = column_stack((self.branch_arrays.g, self.branch_arrays.b))
+
+        if 'G_data' in network_arrays:
+            jacobian_indices = self._get_static_vars_list()[5]
+            network_arrays['jacobian_indices'] = array([-1 if index is None else index for index in jacobian_indices],
+                                                       dtype=int)
+
+        return save_arrays_atomically(path, network_arrays)
+
+
+    @classmethod
+    def load(cls, path, mmap_mode=None, solver_tolerance=0.00001):
+        """
+        Loads a network saved by PSys.save. With mmap_mode (e.g., 'r') the arrays of the file, including the
+        admittance matrix, are memory-mapped instead of read, so worker processes loading the same file share them.
+        """
+        network_arrays = load_arrays(path, mmap_mode=mmap_mode)
+        try:
+            format_version = int(network_arrays['format_version'])
+        except KeyError:
+            raise PowerNetworkError('%s is not a saved power network' % path)
+        if format_version != NETWORK_FILE_FORMAT_VERSION:
+            raise PowerNetworkError('%s has network file format version %i, only version %i is supported' %
+                                    (path, format_version, NETWORK_FILE_FORMAT_VERSION))
+
+        bus_voltages = network_arrays['bus_voltages']
+        bus_powers = network_arrays['bus_powers']
+        bus_shunts = network_arrays['bus_shunts']
+        bus_table = {
+            'id': arange(bus_voltages.shape[0]),
+            'type': network_arrays['bus_types'],
+            'V0': bus_voltages[:, 0],
+            'theta0': bus_voltages[:, 1],
+            'P': bus_powers[:, 0],
+            'Q': bus_powers[:, 1],
+            'shunt_g': bus_shunts[:, 0],
+            'shunt_b': bus_shunts[:, 1]
+        }
+        branch_bus_positions = network_arrays['branch_bus_positions']
+        branch_admittances = network_arrays['branch_admittances']
+        branch_table = {
+            'from_id': branch_bus_positions[:, 0],
+            'to_id': branch_bus_positions[:, 1],
+            'g': branch_admittances[:, 0],
+            'b': branch_admittances[:, 1]
+        }
+        network = cls.from_arrays(bus_table, branch_table, solver_tolerance=solver_tolerance,
+                                  build_admittance_matrix=False)
+
+        for bus, name, name_is_number in zip(network.buses, network_arrays['bus_names'].tolist(),
+                                             network_arrays['bus_name_is_number'].tolist()):
+            if name_is_number is True:
+                bus.name = int(name)
+            else:
+                bus.name = None if name == u'' else name
+
+        # the admittance matrix is restored as CSR on the loaded (possibly memory-mapped) arrays, not regenerated, the
+        # other entries are read element by element and are viewed as plain arrays
+        checkpoint = dict((name, asarray(value)) for name, value in network_arrays.iteritems()
+                          if name.startswith('G_') is False and name.startswith('B_') is False)
+        network.restore_state_checkpoint(checkpoint)
+        if 'G_data' in network_arrays:
+            n = len(network.buses)
+            G, B = [csr_matrix((network_arrays['%s_data' % name], network_arrays['%s_indices' % name],
+                                network_arrays['%s_indptr' % name]), shape=(n, n)) for name in ['G', 'B']]
+            _, _ = network.save_admittance_matrix(G=G, B=B)
+            network.save_static_vars_list_from_admittance_matrix(
+                jacobian_indices=[None if index < 0 else index for index in network_arrays['jacobian_indices'].tolist()])
+
+        return network
@@ -0,0 +1,186 @@
+from logging import warning
+
+from numpy import array, eye, isnan, nan, zeros
+from numpy.linalg import det, solve
+from scipy.sparse import csc_matrix, csr_matrix, diags
+from scipy.sparse.linalg import splu
+
+
+def _get_positions(indices):
+    return dict((index, position) for position, index in enumerate(indices))
+
+
+class SensitivityFactors(object):
+    """
+    Linear (DC power flow) sensitivities of the real power flows on power lines to bus injections and line outages.
+    The reduced susceptance matrix (the slack bus row and column removed) is factorized once; power transfer
+    distribution factors (PTDFs) are computed for the requested lines only, one solve per line, and cached, as are the
+    flow transfers of outaged lines used for line outage distribution factors (LODFs). Lines and buses are referred
+    to by their index in line_ids and bus_ids.
+    """
+
+    def __init__(self, bus_ids, line_ids, from_bus_indices, to_bus_indices, line_susceptances, slack_bus_index,
+                 islanding_tolerance=1e-8):
+        self.bus_ids = bus_ids
+        self.line_ids = line_ids
+        self.line_indices_by_line_id = dict((line_id, l) for l, line_id in enumerate(line_ids))
+        self.from_bus_indices = array(from_bus_indices, dtype=int)
+        self.to_bus_indices = array(to_bus_indices, dtype=int)
+        self.slack_bus_index = slack_bus_index
+        self.islanding_tolerance = islanding_tolerance
+
+        num_buses = len(bus_ids)
+        num_lines = len(line_ids)
+        rows = range(0, num_lines)*2
+        columns = list(self.from_bus_indices) + list(self.to_bus_indices)
+        incidence = csr_matrix(([1.]*num_lines + [-1.]*num_lines, (rows, columns)), shape=(num_lines, num_buses))
+
+        # line flows are Bf*theta and injections Bbus*theta
+        self.Bf = diags(line_susceptances).dot(incidence).tocsr()
+        Bbus = incidence.T.dot(self.Bf).tocsc()
+
+        self.non_slack_bus_indices = array([i for i in range(0, num_buses) if i != slack_bus_index], dtype=int)
+        self._reduced_B_lu = splu(csc_matrix(Bbus[self.non_slack_bus_indices, :][:, self.non_slack_bus_indices]))
+
+        self._ptdf_rows = {}
+        self._outage_transfers = {}
+
+
+    def get_line_index(self, line_id):
+        try:
+            return self.line_indices_by_line_id[line_id]
+        except KeyError:
+            raise KeyError('no power line with id %s' % line_id)
+
+
+    def _get_line_indices(self, line_ids):
+        if line_ids is None:
+            return range(0, len(self.line_ids))
+        return [self.get_line_index(line_id) for line_id in line_ids]
+
+
+    def _solve(self, rhs):
+        """
+        Solves Bbus*theta = rhs with the slack bus angle fixed at zero, for one or several columns of rhs.
+        """
+        theta = zeros(rhs.shape)
+        theta[self.non_slack_bus_indices] = self._reduced_B_lu.solve(rhs[self.non_slack_bus_indices])
+        return theta
+
+
+    def get_ptdf(self, line_ids=None):
+        """
+        Returns the (lines x buses) PTDFs of the given lines (all lines by default, in which case every missing row is
+        computed with a single multi-column solve). Entry (l, i) is the change in the flow on line l when bus i
+        injects one unit of power that is withdrawn at the slack bus.
+        """
+        line_indices = self._get_line_indices(line_ids)
+        missing_line_indices = [l for l in line_indices if l not in self._ptdf_rows]
+        if missing_line_indices != []:
+            # Bbus is symmetric, so the rows of Bf*Bbus^-1 are solves with the rows of Bf
+            ptdf_rows = self._solve(self.Bf[missing_line_indices, :].T.toarray())
+            for k, l in enumerate(missing_line_indices):
+                self._ptdf_rows[l] = ptdf_rows[:, k]
+
+        return array([self._ptdf_rows[l] for l in line_indices]).reshape((len(line_indices), len(self.bus_ids)))
+
+
+    def _get_outage_transfers(self, outage_line_indices):
+        """
+        Returns the (buses x outages) bus angles caused by transferring one unit of power across each outaged line.
+        """
+        missing_line_indices = [l for l in outage_line_indices if l not in self._outage_transfers]
+        if missing_line_indices != []:
+            rhs = zeros((len(self.bus_ids), len(missing_line_indices)))
+            for k, l in enumerate(missing_line_indices):
+                rhs[self.from_bus_indices[l], k] = 1.
+                rhs[self.to_bus_indices[l], k] = -1.
+            transfers = self._solve(rhs)
+            for k, l in enumerate(missing_line_indices):
+                self._outage_transfers[l] = transfers[:, k]
+
+        return array([self._outage_transfers[l] for l in outage_line_indices]).T
+
+
+    def get_lodf(self, monitored_line_ids=None, outage_line_ids=None):
+        """
+        Returns the (monitored lines x outaged lines) LODFs, the fraction of an outaged line's pre-outage flow that
+        moves onto each monitored line. Outages that island the network have NaN factors.
+        """
+        monitored_line_indices = self._get_line_indices(monitored_line_ids)
+        outage_line_indices = self._get_line_indices(outage_line_ids)
+
+        transfers = self._get_outage_transfers(outage_line_indices)
+        monitored_ptdf = self.Bf[monitored_line_indices, :].dot(transfers)
+        outage_ptdf = array([self.Bf[l, :].dot(transfers[:, k])[0] for k, l in enumerate(outage_line_indices)])
+
+        denominator = 1. - outage_ptdf
+        islanding = abs(denominator) < self.islanding_tolerance
+        denominator[islanding] = nan
+        lodf = monitored_ptdf/denominator
+
+        monitored_positions = _get_positions(monitored_line_indices)
+        for k, l in enumerate(outage_line_indices):
+            if l in monitored_positions:
+                lodf[monitored_positions[l], k] = -1.
+        return lodf
+
+
+    def get_post_outage_flows(self, base_flows, outage_line_ids, monitored_line_ids=None):
+        """
+        Returns the real power flows on the monitored lines after the simultaneous outage of outage_line_ids (e.g.,
+        one line for N-1, two for N-2), given the pre-outage flows on all lines. Returns NaN flows if the outage
+        islands the network.
+        """
+        monitored_line_indices = self._get_line_indices(monitored_line_ids)
+        return self._get_post_outage_flows(base_flows, self._get_line_indices(outage_line_ids), monitored_line_indices,
+                                           _get_positions(monitored_line_indices))
+
+
+    def _get_post_outage_flows(self, base_flows, outage_line_indices, monitored_line_indices, monitored_positions):
+        """
+        get_post_outage_flows for lines already resolved to their indices, monitored_positions maps the index of each
+        monitored line to its position in monitored_line_indices.
+        """
+        transfers = self._get_outage_transfers(outage_line_indices)
+        monitored_ptdf = self.Bf[monitored_line_indices, :].dot(transfers)
+        outage_ptdf = self.Bf[outage_line_indices, :].dot(transfers)
+
+        # the outaged lines cannot carry a transfer between the two sides of an island
+        remaining_transfer = eye(len(outage_line_indices)) - outage_ptdf
+        if abs(det(remaining_transfer)) < self.islanding_tolerance:
+            return nan*zeros(len(monitored_line_indices))
+        outage_transfers = solve(remaining_transfer, base_flows[outage_line_indices])
+
+        post_outage_flows = base_flows[monitored_line_indices] + monitored_ptdf.dot(outage_transfers)
+        for l in outage_line_indices:
+            if l in monitored_positions:
+                post_outage_flows[monitored_positions[l]] = 0.
+        return post_outage_flows
+
+
+    def screen_contingencies(self, base_flows, contingencies, limits, monitored_line_ids=None):
+        """
+        Screens contingencies, each a sequence of the ids of the lines that are outaged together, and returns the
+        flagged ones (those that overload a monitored line or island the network) as a list of
+        (contingency, overloaded line ids, post-outage flows) tuples to be checked with a full AC power flow. limits
+        holds the flow limit of every monitored line.
+        """
+        monitored_line_indices = self._get_line_indices(monitored_line_ids)
+        monitored_line_ids = [self.line_ids[l] for l in monitored_line_indices]
+        monitored_positions = _get_positions(monitored_line_indices)
+        limits = array(limits, dtype=float)
+
+        flagged = []
+        for contingency in contingencies:
+            post_outage_flows = self._get_post_outage_flows(base_flows, self._get_line_indices(contingency),
+                                                            monitored_line_indices, monitored_positions)
+            if isnan(post_outage_flows).any():
+                warning('Outage of lines %s islands the network' % (list(contingency),))
+                flagged.append((contingency, monitored_line_ids, post_outage_flows))
+                continue
+            overloaded = abs(post_outage_flows) > limits
+            if overloaded.any():
+                flagged.append((contingency, [line_id for line_id, is_overloaded in zip(monitored_line_ids, overloaded)
+                                              if is_overloaded], post_outage_flows))
+        return flagged
@@ -1 +1,3 @@
+from data_wrangler import DataManager
 from plotter import Plotter
+from series_export import downsample, export_series
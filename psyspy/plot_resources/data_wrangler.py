@@ -1,27 +1,337 @@
-from os import getcwd
+from json import dump as json_dump, load as json_load
+from logging import debug
+from os import fsync, getcwd, makedirs
+from os.path import exists, join as path_join
+from struct import pack
 from tempfile import mkdtemp
 
-from numpy import dump, load
+from numpy import arange, array, ascontiguousarray, dtype as numpy_dtype, inf, load, maximum, minimum, ones, searchsorted, \
+                  zeros
+
+# every channel file starts with a fixed-size .npy header so the row count can be rewritten in place as chunks are
+# appended, total header size must be a multiple of 16 to keep the data aligned
+NPY_MAGIC = '\x93NUMPY\x01\x00'
+NPY_HEADER_SIZE = 128
+INDEX_FILE_NAME = 'index.json'
+
+# metadata entries holding the ids of the network elements in the columns of channels of each element type
+ELEMENT_IDS_METADATA_KEYS = {'bus': 'bus_ids', 'power_line': 'power_line_ids'}
+
+# rows read at a time when reducing channels, so memory use does not depend on the length of the channel
+DEFAULT_CHUNK_SIZE = 65536
+
+
+def write_npy_header(file_handle, data_type, num_rows, num_columns=None):
+    if num_columns is None:
+        shape = '(%i,)' % num_rows
+    else:
+        shape = '(%i, %i)' % (num_rows, num_columns)
+    header = "{'descr': '%s', 'fortran_order': False, 'shape': %s, }" % (numpy_dtype(data_type).str, shape)
+    header_length = NPY_HEADER_SIZE - len(NPY_MAGIC) - 2
+    header = header.ljust(header_length - 1) + '\n'
+    file_handle.seek(0)
+    file_handle.write(NPY_MAGIC + pack('<H', header_length) + header)
+
 
 class DataManager(object):
-    
-    def __init__(self, network, temporary=False, directory=None):
-        if temporary is False and directory is None:
-            directory = getcwd()
-            
+    """
+    On-disk store for simulation results. Each channel is an append-only .npy file whose header is kept up to date
+    as chunks are written, and an index.json file records the channels, their row counts and any metadata. Because
+    both are updated on every flush, a run that crashes leaves readable partial results behind. Channels are read back
+    lazily as read-only memory maps.
+
+    Channels are time-major, one row per recorded time, and the columns of bus and power line channels hold the
+    elements listed in the bus_ids and power_line_ids metadata. query selects time windows and elements without
+    reading the rest of a channel and reduce computes summaries chunk by chunk, so results larger than memory can be
+    post-processed.
+    """
+
+    def __init__(self, network=None, temporary=False, directory=None):
         if temporary is True:
-            directory = mkdtemp()
             if directory is not None:
-                print "Temporary kwarg is True and directory specified, the specified directory will be ignored"
-            
+                debug('Temporary kwarg is True and directory specified, the specified directory will be ignored')
+            directory = mkdtemp()
+        elif directory is None:
+            directory = getcwd()
+
+        if exists(directory) is False:
+            makedirs(directory)
+
         self.save_dir = directory
-        
         self.network = network
 
-    
+        index_path = path_join(self.save_dir, INDEX_FILE_NAME)
+        if exists(index_path) is True:
+            with open(index_path, 'r') as index_file:
+                self.index = json_load(index_file)
+        else:
+            self.index = {'channels': {}, 'metadata': {}, 'complete': False}
+
+        self._channel_maps = {}
+
+
+    def _get_channel_path(self, name):
+        return path_join(self.save_dir, self.index['channels'][name]['file'])
+
+
+    def _save_index(self):
+        with open(path_join(self.save_dir, INDEX_FILE_NAME), 'w') as index_file:
+            json_dump(self.index, index_file, indent=2, sort_keys=True)
+
+
+    def set_metadata(self, key, value):
+        self.index['metadata'][key] = value
+        self._save_index()
+
+
+    def get_metadata(self, key):
+        return self.index['metadata'].get(key)
+
+
+    def get_channel_names(self):
+        return sorted(self.index['channels'].keys())
+
+
+    def create_channel(self, name, num_columns=None, data_type='float64', element_type=None):
+        """
+        Creates an empty channel. Rows appended to it must have num_columns elements, or be scalars if num_columns is
+        None. element_type ('bus' or 'power_line') says which network elements the columns belong to.
+        """
+        if element_type is not None and element_type not in ELEMENT_IDS_METADATA_KEYS:
+            raise ValueError('unknown element type %s' % element_type)
+        self.index['channels'][name] = {'file': '%s.npy' % name,
+                                        'dtype': numpy_dtype(data_type).str,
+                                        'num_columns': num_columns,
+                                        'num_rows': 0,
+                                        'element_type': element_type}
+        self.index['complete'] = False
+        self._channel_maps.pop(name, None)
+        with open(self._get_channel_path(name), 'wb') as channel_file:
+            write_npy_header(channel_file, data_type, 0, num_columns)
+        self._save_index()
+
+
+    def append_to_channel(self, name, rows, save_index=True):
+        try:
+            channel = self.index['channels'][name]
+        except KeyError:
+            raise KeyError('no channel named %s, it must be created before data is appended' % name)
+
+        rows = ascontiguousarray(rows, dtype=channel['dtype'])
+        if channel['num_columns'] is not None and (rows.ndim != 2 or rows.shape[1] != channel['num_columns']):
+            raise ValueError('rows appended to channel %s must have %i columns' % (name, channel['num_columns']))
+
+        num_rows = channel['num_rows'] + rows.shape[0]
+        with open(self._get_channel_path(name), 'r+b') as channel_file:
+            channel_file.seek(0, 2)
+            channel_file.write(rows.tobytes())
+            write_npy_header(channel_file, channel['dtype'], num_rows, channel['num_columns'])
+            channel_file.flush()
+            fsync(channel_file.fileno())
+        channel['num_rows'] = num_rows
+        self._channel_maps.pop(name, None)
+
+        if save_index is True:
+            self._save_index()
+
+
+    def flush_chunk(self, chunk):
+        """
+        Appends one chunk, a dictionary mapping channel names to rows, and updates the index once for all of them.
+        """
+        for name, rows in chunk.iteritems():
+            self.append_to_channel(name, rows, save_index=False)
+        self._save_index()
+
+
+    def mark_complete(self):
+        self.index['complete'] = True
+        self._save_index()
+
+
+    def is_complete(self):
+        return self.index['complete']
+
+
+    def get_channel(self, name):
+        """
+        Returns the channel as a read-only memory map, only the rows recorded in the index are included. Maps are
+        opened when first requested and kept until the channel is appended to.
+        """
+        try:
+            return self._channel_maps[name]
+        except KeyError:
+            pass
+        try:
+            num_rows = self.index['channels'][name]['num_rows']
+        except KeyError:
+            raise KeyError('no channel named %s' % name)
+        channel_map = load(self._get_channel_path(name), mmap_mode='r')[0:num_rows]
+        self._channel_maps[name] = channel_map
+        return channel_map
+
+
+    def get_time_vector(self):
+        return self.get_channel('time')
+
+
+    def get_row_range(self, start_time=None, end_time=None):
+        """
+        Returns the first row at or after start_time and the row after the last one at or before end_time, found by
+        binary search on the time channel so only a few of its pages are read.
+        """
+        t = self.get_time_vector()
+        start_row = 0 if start_time is None else int(searchsorted(t, start_time, side='left'))
+        end_row = t.shape[0] if end_time is None else int(searchsorted(t, end_time, side='right'))
+        return start_row, max(start_row, end_row)
+
+
+    def get_element_ids(self, name):
+        """
+        Returns the ids of the network elements in the columns of a channel, or None if its columns are not elements.
+        """
+        try:
+            element_type = self.index['channels'][name].get('element_type')
+        except KeyError:
+            raise KeyError('no channel named %s' % name)
+        if element_type is None:
+            return None
+        return self.get_metadata(ELEMENT_IDS_METADATA_KEYS[element_type])
+
+
+    def get_columns(self, name, element_ids=None):
+        """
+        Returns the columns of the given elements of a channel as a slice if they are adjacent and in order, so
+        selecting them gives a view, or as a list of column indices otherwise.
+        """
+        if element_ids is None:
+            return slice(None)
+        channel_element_ids = self.get_element_ids(name)
+        if channel_element_ids is None:
+            raise ValueError('columns of channel %s do not belong to network elements' % name)
+        column_by_element_id = dict((element_id, column) for column, element_id in enumerate(channel_element_ids))
+        try:
+            columns = [column_by_element_id[element_id] for element_id in element_ids]
+        except KeyError, error:
+            raise KeyError('element %s was not recorded in channel %s' % (error.args[0], name))
+        if columns != [] and columns == range(columns[0], columns[0] + len(columns)):
+            return slice(columns[0], columns[0] + len(columns))
+        return columns
+
+
+    def query(self, name, start_time=None, end_time=None, element_ids=None):
+        """
+        Returns the rows of a channel between start_time and end_time (inclusive), restricted to the columns of
+        element_ids if given. The result is a view of the memory-mapped channel unless the elements are not adjacent
+        columns, in which case only the selected window is read.
+        """
+        start_row, end_row = self.get_row_range(start_time, end_time)
+        channel = self.get_channel(name)[start_row:end_row]
+        if element_ids is None:
+            return channel
+        if channel.ndim != 2:
+            raise ValueError('channel %s has no columns to select' % name)
+        return channel[:, self.get_columns(name, element_ids)]
+
+
+    def iterate_chunks(self, name, start_time=None, end_time=None, element_ids=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Yields the first row and the values of consecutive blocks of at most chunk_size rows of a query.
+        """
+        start_row, end_row = self.get_row_range(start_time, end_time)
+        columns = self.get_columns(name, element_ids)
+        channel = self.get_channel(name)
+        for chunk_start_row in xrange(start_row, end_row, chunk_size):
+            chunk = channel[chunk_start_row:min(chunk_start_row + chunk_size, end_row)]
+            if element_ids is not None:
+                chunk = chunk[:, columns]
+            yield chunk_start_row, chunk
+
+
+    def _reduce_rows(self, channel, start_row, end_row, columns, chunk_size):
+        num_columns = 1 if channel.ndim == 1 else channel[0:0, columns].shape[1]
+        channel_min = inf*ones(num_columns)
+        channel_max = -inf*ones(num_columns)
+        channel_sum = zeros(num_columns)
+        for chunk_start_row in xrange(start_row, end_row, chunk_size):
+            chunk = channel[chunk_start_row:min(chunk_start_row + chunk_size, end_row)]
+            if channel.ndim == 1:
+                chunk = chunk.reshape((-1, 1))
+            else:
+                chunk = chunk[:, columns]
+            channel_min = minimum(channel_min, chunk.min(axis=0))
+            channel_max = maximum(channel_max, chunk.max(axis=0))
+            channel_sum += chunk.sum(axis=0, dtype=float)
+        num_rows = end_row - start_row
+        channel_mean = channel_sum/num_rows if num_rows > 0 else channel_sum*float('nan')
+        return channel_min, channel_max, channel_mean
+
+
+    def reduce(self, name, start_time=None, end_time=None, element_ids=None, window=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Returns a dictionary with the minimum, maximum and mean of each column (e.g., each bus) of a channel between
+        start_time and end_time. If window is given the summaries are computed for consecutive windows of that many
+        seconds instead, each summary then has one row per window, and the start times of the windows are returned
+        under window_start_times. Rows are read chunk_size at a time.
+        """
+        start_row, end_row = self.get_row_range(start_time, end_time)
+        columns = self.get_columns(name, element_ids)
+        channel = self.get_channel(name)
+
+        if window is None:
+            row_ranges = [(start_row, end_row)]
+            window_start_times = None
+        else:
+            if window <= 0:
+                raise ValueError('window must be a positive number of seconds')
+            if start_row == end_row:
+                raise ValueError('channel %s has no rows between %s and %s' % (name, start_time, end_time))
+            t = self.get_time_vector()
+            first_time = t[start_row] if start_time is None else start_time
+            last_time = t[end_row - 1] if end_time is None else end_time
+            window_start_times = first_time + window*arange(0, int((last_time - first_time)//window) + 1)
+            window_rows = [max(start_row, min(end_row, int(row)))
+                           for row in searchsorted(t, window_start_times, side='left')] + [end_row]
+            row_ranges = zip(window_rows[0:-1], window_rows[1:])
+
+        summaries = [self._reduce_rows(channel, first_row, last_row, columns, chunk_size)
+                     for first_row, last_row in row_ranges]
+        reductions = {}
+        for k, reduction in enumerate(['min', 'max', 'mean']):
+            values = array([summary[k] for summary in summaries])
+            if channel.ndim == 1:
+                values = values[:, 0]
+            reductions[reduction] = values[0] if window is None else values
+        if window is not None:
+            reductions['window_start_times'] = window_start_times
+        return reductions
+
+
     def dump_all_network_data(self):
-        pass
+        """
+        Writes the full histories stored on the network's buses and power lines to disk.
+        """
+        if self.network is None:
+            raise AttributeError('no network was provided to this data manager')
+
+        buses = list(self.network.buses)
+        power_lines = list(self.network.power_lines)
+        self.set_metadata('bus_ids', [bus.get_id() for bus in buses])
+        self.set_metadata('power_line_ids', [power_line.get_id() for power_line in power_lines])
+
+        for quantity, elements in [('V', buses), ('theta', buses), ('w', buses),
+                                   ('Pab', power_lines), ('Qab', power_lines)]:
+            if elements == []:
+                continue
+            histories = [getattr(element, quantity) for element in elements]
+            num_rows = min([history.shape[0] for history in histories])
+            self.create_channel(quantity, num_columns=len(elements),
+                                element_type='bus' if quantity in ['V', 'theta', 'w'] else 'power_line')
+            rows = ascontiguousarray([history[0:num_rows] for history in histories]).T
+            self.append_to_channel(quantity, rows)
+
+        self.mark_complete()
+
 
-        
     def get_all_network_data(self):
-        network_data = []
+        return dict([(name, self.get_channel(name)) for name in self.get_channel_names()])
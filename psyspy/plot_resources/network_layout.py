@@ -0,0 +1,101 @@
+from hashlib import sha1
+from logging import debug
+from os.path import exists, join as path_join
+
+from numpy import abs as numpy_abs, argsort, array, asarray, concatenate, int64, lexsort, ones, sort, where
+from numpy.linalg import eigh
+from scipy.sparse import coo_matrix, diags
+from scipy.sparse.linalg import eigsh
+
+from ..helper_functions import load_arrays, save_arrays_atomically
+
+# graphs up to this size are laid out with a dense eigendecomposition, which is faster for them and always converges
+DENSE_LAYOUT_MAX_NODES = 100
+
+# shift of the shift-invert eigensolver, the Laplacian plus this times the identity is positive definite
+LAYOUT_EIGENVALUE_SHIFT = -1e-3
+
+# layouts computed in this process, by topology hash
+_layouts = {}
+
+
+def get_topology_hash(bus_ids, edges):
+    """
+    Returns a hash of the buses and the bus pairs connected by power lines, which does not depend on their order.
+    """
+    bus_ids = sort(asarray(bus_ids, dtype=int64))
+    edges = asarray(edges, dtype=int64).reshape((-1, 2))
+    edges = sort(edges, axis=1)
+    edges = edges[lexsort((edges[:, 1], edges[:, 0]))]
+    topology_hash = sha1(bus_ids.tostring())
+    topology_hash.update(edges.tostring())
+    return topology_hash.hexdigest()
+
+
+def compute_spectral_layout(num_nodes, edges):
+    """
+    Returns the positions of the nodes of a graph, given by the eigenvectors of the second and third smallest
+    eigenvalues of its Laplacian and scaled to [-1, 1]. edges holds pairs of node indices. Large graphs use a sparse
+    shift-invert eigensolver, which only needs the factorization of the sparse Laplacian.
+    """
+    edges = asarray(edges, dtype=int).reshape((-1, 2))
+    if num_nodes < 3:
+        return array([[-1., 0.], [1., 0.]])[0:num_nodes]
+
+    rows = concatenate([edges[:, 0], edges[:, 1]])
+    columns = concatenate([edges[:, 1], edges[:, 0]])
+    A = coo_matrix((ones(rows.shape[0]), (rows, columns)), shape=(num_nodes, num_nodes)).tocsr()
+    A.data[:] = 1.
+    L = (diags(asarray(A.sum(axis=1)).ravel(), 0) - A).tocsc()
+
+    if num_nodes <= DENSE_LAYOUT_MAX_NODES:
+        eigenvalues, eigenvectors = eigh(L.toarray())
+    else:
+        eigenvalues, eigenvectors = eigsh(L, k=3, sigma=LAYOUT_EIGENVALUE_SHIFT, which='LM')
+    positions = eigenvectors[:, argsort(eigenvalues)[1:3]]
+
+    positions = positions - positions.mean(axis=0)
+    scale = numpy_abs(positions).max()
+    if scale > 0:
+        positions /= scale
+    return positions
+
+
+def get_layout(bus_ids, edges, directory=None):
+    """
+    Returns the spectral layout of a network as an array with the position of each bus in bus_ids, edges holding the
+    pairs of bus ids connected by power lines. Layouts are kept per topology hash for the life of the process and, if
+    directory is given, saved there as <hash>.npz so later runs on the same topology do not recompute them.
+    """
+    topology_hash = get_topology_hash(bus_ids, edges)
+    path = None if directory is None else path_join(directory, '%s.npz' % topology_hash)
+    try:
+        layout_bus_ids, positions = _layouts[topology_hash]
+    except KeyError:
+        if path is not None and exists(path) is True:
+            layout = load_arrays(path)
+            layout_bus_ids, positions = layout['bus_ids'], layout['positions']
+        else:
+            debug('Computing the layout of network %s' % topology_hash)
+            layout_bus_ids = asarray(bus_ids, dtype=int64)
+            index_by_bus_id = dict((bus_id, index) for index, bus_id in enumerate(layout_bus_ids.tolist()))
+            positions = compute_spectral_layout(layout_bus_ids.shape[0],
+                                                [(index_by_bus_id[bi], index_by_bus_id[bj]) for bi, bj in edges])
+            if path is not None:
+                save_arrays_atomically(path, {'bus_ids': layout_bus_ids, 'positions': positions})
+        _layouts[topology_hash] = (layout_bus_ids, positions)
+
+    # the cached layout may list the buses in another order
+    order = argsort(layout_bus_ids, kind='mergesort')
+    return positions[order[layout_bus_ids[order].searchsorted(asarray(bus_ids, dtype=int64))]]
+
+
+def get_model_offsets(positions, distance):
+    """
+    Returns the positions at which to draw the model of each bus, distance away from the bus and pointing away from
+    the center of the layout.
+    """
+    norms = (positions**2).sum(axis=1)**0.5
+    directions = positions/where(norms > 0, norms, 1.).reshape((-1, 1))
+    directions[norms == 0] = [0., 1.]
+    return positions + distance*directions
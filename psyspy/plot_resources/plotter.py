@@ -1,37 +1,94 @@
 
-from matplotlib.pylab import plot, figure, show, ylim, cm, axis, xlabel, ylabel, legend, xlim
-from networkx import Graph, spectral_layout, draw_networkx_nodes, draw_networkx_labels, draw_networkx_edges, spring_layout
-from numpy import amax, amin, append, arange, empty, frompyfunc, where, zeros
+# matplotlib and networkx are imported by the functions using them, so importing psyspy does not load them
+from numpy import amax, amin, append, asarray, column_stack, dot, empty, percentile, where, zeros
 
 from ..helper_functions import generate_n_colors
 from ..model_components.power_network import PowerNetwork
+from network_layout import get_layout, get_model_offsets
+from series_export import DEFAULT_MAX_POINTS, export_series
+
+
+# larger networks are drawn as envelopes by default and never get a legend
+MAX_LEGEND_BUSES = 20
+
+ENVELOPE_PERCENTILES = (5, 95)
+
+# distance between a bus and its model in network drawings, layouts are scaled to [-1, 1]
+MODEL_OFFSET = 0.08
+
+
+def compute_weighted_average(values, weights):
+    """
+    Returns the weighted average of the columns of values at every row, as one matrix-vector product.
+    """
+    weights = asarray(weights, dtype=float)
+    return dot(values, weights)/weights.sum()
+
+
+def get_envelope(values, percentiles=ENVELOPE_PERCENTILES):
+    """
+    Returns the minimum, lower percentile, median, upper percentile and maximum of the columns of values at every row.
+    """
+    lower, median, upper = percentile(values, [percentiles[0], 50, percentiles[1]], axis=1)
+    return values.min(axis=1), lower, median, upper, values.max(axis=1)
+
+
+def plot_lines(ax, t_vector, values, colors, linewidth=1.25):
+    """
+    Draws every column of values against t_vector as a single LineCollection instead of one line per column.
+    """
+    from matplotlib.collections import LineCollection
+
+    segments = empty((values.shape[1], values.shape[0], 2))
+    segments[:, :, 0] = t_vector[0:values.shape[0]]
+    segments[:, :, 1] = values.T
+    ax.add_collection(LineCollection(segments, colors=colors, linewidths=linewidth))
+    ax.autoscale_view()
+
+
+def plot_envelope(ax, t_vector, values, percentiles=ENVELOPE_PERCENTILES, color='b'):
+    """
+    Draws the range of the columns of values at every time as a light band, the band between the percentiles darker
+    and the median as a line.
+    """
+    t_vector = t_vector[0:values.shape[0]]
+    minimum, lower, median, upper, maximum = get_envelope(values, percentiles)
+    ax.fill_between(t_vector, minimum, maximum, color=color, alpha=0.15, linewidth=0)
+    ax.fill_between(t_vector, lower, upper, color=color, alpha=0.35, linewidth=0)
+    ax.plot(t_vector, median, color=color, linewidth=1.25)
 
 
 class Plotter(object):
     
-    def __init__(self, power_network, cmap='Accent'):
+    def __init__(self, power_network, cmap='Accent', layout_directory=None):
+        """
+        layout_directory is where network layouts are saved by topology hash, see get_layout.
+        """
         if isinstance(power_network, PowerNetwork) is False:
             raise TypeError('')
         else:
             self.network = power_network
+
+        from matplotlib.pylab import cm
+        from networkx import Graph
         
         self.cmap = getattr(cm, cmap)
+        self.layout_directory = layout_directory
         color_gen = generate_n_colors(len(self.network), self.cmap)
 
+        # the graph only has the buses, models are drawn next to their bus
         self.network_graph = Graph()
         
         for bus in self.network:
             hex_color, color_num = next(color_gen)
-            self.network_graph.add_node(bus,
-                                        hex_color=hex_color,
-                                        color_num=color_num)
-
             if bus.has_generator_model() is True:
                 model_label = r'$G_%i$' % bus.get_id()
             else:
                 model_label = r'$L_%i$' % bus.get_id()
-            self.network_graph.add_node(bus.model, hex_color=hex_color, color_num=color_num, label=model_label)
-            self.network_graph.add_edge(bus, bus.model)
+            self.network_graph.add_node(bus,
+                                        hex_color=hex_color,
+                                        color_num=color_num,
+                                        model_label=model_label)
         
         for power_line in self.network.power_lines:
             bi, bj = power_line.get_incident_buses()
@@ -39,30 +96,40 @@ class Plotter(object):
             self.network_graph.add_edge(bi, bj, g=Gij, b=Bij)
 
 
-    def draw_power_network_graph(self):
-        pos = spectral_layout(self.network_graph)
+    def get_bus_positions(self):
+        """
+        Returns the layout position of every bus, computed once per network topology.
+        """
+        power_line_bus_ids = [(bi.get_id(), bj.get_id())
+                              for bi, bj in [power_line.get_incident_buses() for power_line in self.network.power_lines]]
+        return get_layout([bus.get_id() for bus in self.network], power_line_bus_ids, directory=self.layout_directory)
+
+
+    def draw_power_network_graph(self, with_labels=None):
+        """
+        Draws the buses at their layout positions with each model offset from its bus. Labels are drawn for networks
+        of up to MAX_LEGEND_BUSES buses unless with_labels says otherwise.
+        """
+        from matplotlib.pylab import axis, cm
+        from networkx import draw_networkx_edges, draw_networkx_labels, draw_networkx_nodes
+
         bus_node_list = [bus for bus in self.network]
-        color_nums = []
-        model_node_list = []
-        bus_label_list = {}
-        model_label_list = {}
-        bus_model_edge_list = []
-        
-        for bus in bus_node_list:
-            color_nums.append(self.network_graph.node[bus]['color_num'])
-            model_node_list.append(bus.model)
-            bus_label_list[bus] = r'$B_%i$' % bus.get_id()
-            model_label_list[bus.model] = self.network_graph.node[bus.model]['label']
-            bus_model_edge_list.append((bus, bus.model))
-            
-        power_line_edge_list = []
-        for power_line in self.network.power_lines:
-            power_line_edge_list.append(power_line.get_incident_buses())
+        model_node_list = [bus.model for bus in bus_node_list]
+        bus_positions = self.get_bus_positions()
+        model_positions = get_model_offsets(bus_positions, MODEL_OFFSET)
+        pos = dict(zip(bus_node_list, bus_positions))
+        pos.update(zip(model_node_list, model_positions))
+        color_nums = [self.network_graph.node[bus]['color_num'] for bus in bus_node_list]
+        bus_model_edge_list = zip(bus_node_list, model_node_list)
+        power_line_edge_list = [power_line.get_incident_buses() for power_line in self.network.power_lines]
         
         draw_networkx_nodes(self.network_graph, pos, nodelist=bus_node_list, node_size=1000, cmap=cm.Accent, node_color=color_nums)
         draw_networkx_nodes(self.network_graph, pos, nodelist=model_node_list, node_size=750, cmap=cm.Accent, node_color=color_nums)
-        draw_networkx_labels(self.network_graph, pos , bus_label_list, font_size=14, nodelist=bus_node_list)
-        draw_networkx_labels(self.network_graph, pos , model_label_list, font_size=10, nodelist=model_node_list)
+        if with_labels is True or (with_labels is None and len(bus_node_list) <= MAX_LEGEND_BUSES):
+            bus_label_list = dict((bus, r'$B_%i$' % bus.get_id()) for bus in bus_node_list)
+            model_label_list = dict((bus.model, self.network_graph.node[bus]['model_label']) for bus in bus_node_list)
+            draw_networkx_labels(self.network_graph, pos , bus_label_list, font_size=14, nodelist=bus_node_list)
+            draw_networkx_labels(self.network_graph, pos , model_label_list, font_size=10, nodelist=model_node_list)
         draw_networkx_edges(self.network_graph, pos, edgelist=bus_model_edge_list, width=3)
         draw_networkx_edges(self.network_graph, pos, edgelist=power_line_edge_list, width=6)
         axis('off')
@@ -100,114 +167,106 @@ class Plotter(object):
         return r'\definecolor{{{0}}}{{rgb}}{{{1:.5f},{2:.5f},{3:.5f}}}'.format(color_name, r, g, b)
 
 
-    def plot_bus_voltage_angles(self, t_vector, output_tikz=False, rnd=4):
+    def _get_bus_histories(self, quantity, num_samples=None):
+        """
+        Returns the history of a bus quantity (e.g., theta or w) as a matrix with one column per bus.
+        """
+        return column_stack([getattr(bus, quantity)[0:num_samples] for bus in self.network])
+
+
+    def _plot_bus_histories(self, ax, t_vector, values, style, label_format):
+        """
+        Draws the columns of values either as lines, all in one LineCollection, or as an envelope. style None draws
+        lines with a legend for networks of up to MAX_LEGEND_BUSES buses and an envelope for larger ones.
+        """
+        from matplotlib.pylab import legend, xlim
+
+        if style is None:
+            style = 'lines' if values.shape[1] <= MAX_LEGEND_BUSES else 'envelope'
+        if style == 'envelope':
+            plot_envelope(ax, t_vector, values)
+        elif style == 'lines':
+            buses = [bus for bus in self.network]
+            plot_lines(ax, t_vector, values, [self.network_graph.node[bus]['hex_color'] for bus in buses])
+            if values.shape[1] <= MAX_LEGEND_BUSES:
+                legend([label_format % bus.get_id() for bus in buses])
+        else:
+            raise ValueError('unknown plot style %s' % style)
+        xlim((t_vector[0], t_vector[-1]))
+
+
+    def plot_bus_voltage_angles(self, t_vector, output_tikz=False, rnd=4, export_format='tikz',
+                                max_points=DEFAULT_MAX_POINTS, downsampling='lttb', style=None):
+        """
+        Plots the voltage angle of every bus, see _plot_bus_histories for the plot styles. With output_tikz the
+        angles are downsampled to max_points per bus and exported with rnd decimals to bus_voltage_angles.tikz, or
+        bus_voltage_angles.csv for the csv format (see export_series).
+        """
+        from matplotlib.pylab import figure, xlabel, ylabel
+
         fig = figure()
         ax = fig.add_subplot(111)
-        labels = []
         x_label = 'time, ' + r'$t$' + ' [s]'
         y_label = r'$\theta$ [rad]'
+        thetas = self._get_bus_histories('theta', -1)
+        self._plot_bus_histories(ax, t_vector, thetas, style, r'$\theta_%i$')
+
         if output_tikz is True:
-            xmin = t_vector[0]
-            xmax = t_vector[-1]
-            ymin = 0
-            ymax = 0
-            thetas = []
             color_names = []
             tikz_colors = []
-
-        for bus in self.network:
-            color = self.network_graph.node[bus]['hex_color']
-            if output_tikz is True:
-                ymin = min(ymin, amin(bus.theta[0:-1]))
-                ymax = max(ymax, amax(bus.theta[0:-1]))
-                thetas.append(bus.theta[0:-1])
+            for bus in self.network:
                 color_name = 'color{0}'.format(bus.get_id())
                 color_names.append(color_name)
                 tikz_colors.append(self.generate_color_defintion(color_name, self.network_graph.node[bus]['color_num']))
 
-            ax.plot(t_vector, bus.theta[0:-1], color=color, linewidth=1.5)
-            labels.append((r'$\theta_%i$' % bus.get_id()))
-        
-        if output_tikz is True:
-            tikz_file_contents = self.generate_tikz_preamble(xmin, xmax, ymin, ymax, x_label, y_label, colors=tikz_colors)
-            for index, theta in enumerate(thetas):
-                tikz_file_contents.extend([r'\addplot[{0}, line width=1.25pt]'.format(color_names[index]), 
-                                           r'coordinates {'])
+            tikz_preamble = self.generate_tikz_preamble(t_vector[0], t_vector[-1], min(0, amin(thetas)),
+                                                        max(0, amax(thetas)), x_label, y_label, colors=tikz_colors)
+            path = 'bus_voltage_angles.csv' if export_format == 'csv' else 'bus_voltage_angles.tikz'
+            export_series(path, t_vector, thetas, ['theta_%i' % bus.get_id() for bus in self.network],
+                          tikz_preamble=tikz_preamble,
+                          plot_options=['{0}, line width=1.25pt'.format(color_name) for color_name in color_names],
+                          export_format=export_format, max_points=max_points, downsampling=downsampling,
+                          decimals=rnd)
 
-                for index, theta_i in enumerate(theta):
-                    if index > 0 and index < (len(theta) - 1): 
-                        rounded_theta = round(theta_i, rnd)
-                        if(round(theta[index-1], rnd) == rounded_theta and round(theta[index+1], rnd) != rounded_theta or
-                           round(theta[index-1], rnd) != rounded_theta and round(theta[index+1], rnd) == rounded_theta):
-                           tikz_file_contents.append('({0:.4f}, {1:.4f})'.format(t_vector[index], theta_i))
-                    else:
-                        tikz_file_contents.append('({0:.4f}, {1:.4f})'.format(t_vector[index], theta_i))
-                        #
-                        # if rounded_theta != prev_theta:
-                        #
-                        #
-                        # tikz_file_contents.append('({0:.4f}, {1:.4f})'.format(t_vector[index], theta_i))
-                        # prev_theta = rounded_theta
-                        
-                
-                tikz_file_contents.append(r'};')
-            
-            tikz_file_contents.extend([r'\end{axis}', r'\end{tikzpicture}'])
-            tikz_file = open('bus_voltage_angles.tikz', 'w')
-            tikz_file.write('\n'.join(tikz_file_contents))
-            tikz_file.close()
-
-        legend(labels)
-        xlim((t_vector[0], t_vector[-1]))
         xlabel(x_label)
         ylabel(y_label)
 
+
+    def get_average_bus_frequency(self):
+        """
+        Returns the damping-weighted average of the bus frequencies at every recorded time.
+        """
+        num_samples = amin([bus.w.shape[0] for bus in self.network])
+        return compute_weighted_average(self._get_bus_histories('w', num_samples),
+                                        [bus.model.D for bus in self.network])
+
  
-    def plot_average_bus_frequency(self, t_vector, ax=None, output_tikz=False):
+    def plot_average_bus_frequency(self, t_vector, ax=None, output_tikz=False, export_format='tikz',
+                                   max_points=DEFAULT_MAX_POINTS, downsampling='lttb'):
         if ax is None:
+            from matplotlib.pylab import figure
             fig = figure()
             ax = fig.add_subplot(111)
-        # shape = amax([bus.model.w.shape[0] for bus in self.network])
-        def compute_average_frequency(index):
-            w_avg_i_num = 0.
-            w_avg_i_dem = 0.
-            for bus in self.network:
-                w_avg_i_num += bus.model.D*bus.w[index]
-                w_avg_i_dem += bus.model.D
-        
-            return w_avg_i_num/w_avg_i_dem
-        
-        w_avg = frompyfunc(compute_average_frequency, 1, 1)(arange(0, amax([bus.w.shape[0] for bus in self.network])))
-        
-        ax.plot(t_vector, w_avg[0:-1])
-        if output_tikz is True:
-            tikz_file_contents = self.generate_tikz_preamble(t_vector[0], t_vector[-1],
-                                                             amin(w_avg), amax(w_avg),
-                                                             'time, $t$ [s]',
-                                                             r'$\Delta \overline{\omega}$ [rad/s]')
-
-            tikz_file_contents.extend([r'\addplot [blue, line width=1.25pt]', r'coordinates {'])
-            for index, w_avg_i in enumerate(w_avg[0:-1]):
-                tikz_file_contents.append('({0:.4f}, {1:.4f})'.format(t_vector[index], w_avg_i))
 
-            tikz_file_contents.extend([r'};', r'\end{axis}', r'\end{tikzpicture}'])
-            tikz_file = open('bus_frequency.tikz', 'w')
-            tikz_file.write('\n'.join(tikz_file_contents))
-            tikz_file.close()
+        w_avg = self.get_average_bus_frequency()
+        ax.plot(t_vector, w_avg)
+        if output_tikz is True:
+            tikz_preamble = self.generate_tikz_preamble(t_vector[0], t_vector[-1],
+                                                        amin(w_avg), amax(w_avg),
+                                                        'time, $t$ [s]',
+                                                        r'$\Delta \overline{\omega}$ [rad/s]')
+            path = 'bus_frequency.csv' if export_format == 'csv' else 'bus_frequency.tikz'
+            export_series(path, t_vector, w_avg, ['w_avg'], tikz_preamble=tikz_preamble,
+                          plot_options=['blue, line width=1.25pt'], export_format=export_format,
+                          max_points=max_points, downsampling=downsampling)
 
     
-    def plot_bus_frequency(self, t_vector, include_avg=False):
+    def plot_bus_frequency(self, t_vector, include_avg=False, style=None):
+        from matplotlib.pylab import figure, xlabel, ylabel
+
         fig = figure()
         ax = fig.add_subplot(111)
-        labels = []
-        
-        for bus in self.network:
-            color = self.network_graph.node[bus]['hex_color']
-            ax.plot(t_vector, bus.w[0:-1], color=color, linewidth=1.25)
-            labels.append((r'$\omega_%i$' % bus.get_id()))
-
-        legend(labels)
-        xlim((t_vector[0], t_vector[-1]))
+        self._plot_bus_histories(ax, t_vector, self._get_bus_histories('w'), style, r'$\omega_%i$')
         xlabel('time, ' + r'$t$' + ' [s]')
         ylabel(r'$\omega$ [rad/s]')
         
@@ -216,6 +275,8 @@ class Plotter(object):
 
 
     def plot_generator_setpoints(self, t_vector, include_sums=False, ax=None, output_tikz=False):
+        from matplotlib.pylab import figure, legend, xlabel, xlim, ylabel
+
         if include_sums is True:
             total_generation = zeros(t_vector.shape[0])
         
@@ -0,0 +1,130 @@
+from os.path import splitext, basename
+
+from numpy import arange, asarray, column_stack, concatenate, empty, floor, linspace, savetxt, sort, tile
+
+# number of points kept per series when exporting plots, enough for print resolution
+DEFAULT_MAX_POINTS = 2000
+
+# buffer size of exported files, so the formatted rows are written in large blocks
+EXPORT_BUFFER_SIZE = 1 << 20
+
+DOWNSAMPLING_METHODS = ['lttb', 'min_max', None]
+EXPORT_FORMATS = ['tikz', 'pgfplots', 'csv']
+
+
+def _as_columns(y):
+    y = asarray(y, dtype=float)
+    return y.reshape((y.shape[0], -1))
+
+
+def get_lttb_indices(x, y, num_points):
+    """
+    Returns the rows of the points kept by Largest-Triangle-Three-Buckets downsampling of each column of y to
+    num_points points, as an array with one column per series. The first and last points are always kept and each
+    bucket in between keeps the point forming the largest triangle with the point kept in the previous bucket and the
+    average of the next bucket. Buckets are processed one at a time for all the series together.
+    """
+    x = asarray(x, dtype=float)
+    y = _as_columns(y)
+    num_rows, num_series = y.shape
+    if num_points >= num_rows or num_points < 3:
+        return tile(arange(num_rows).reshape((-1, 1)), (1, num_series))
+
+    bucket_edges = floor(linspace(1, num_rows - 1, num_points - 1)).astype(int).tolist() + [num_rows]
+    series = arange(num_series)
+    indices = empty((num_points, num_series), dtype=int)
+    indices[0] = 0
+    indices[-1] = num_rows - 1
+    previous_rows = indices[0].copy()
+    for k in xrange(num_points - 2):
+        start_row, end_row, next_end_row = bucket_edges[k], bucket_edges[k + 1], bucket_edges[k + 2]
+        next_x = x[end_row:next_end_row].mean()
+        next_y = y[end_row:next_end_row].mean(axis=0)
+        previous_x = x[previous_rows]
+        previous_y = y[previous_rows, series]
+        # twice the triangle areas, one row per candidate point and one column per series
+        areas = abs((previous_x - next_x)*(y[start_row:end_row] - previous_y) -
+                    (previous_x - x[start_row:end_row].reshape((-1, 1)))*(next_y - previous_y))
+        previous_rows = start_row + areas.argmax(axis=0)
+        indices[k + 1] = previous_rows
+    return indices
+
+
+def get_min_max_indices(y, num_points):
+    """
+    Returns the rows of the minimum and maximum of each column of y in num_points/2 equal buckets, in order, as an
+    array with one column per series. This keeps the envelope of noisy or oscillating series.
+    """
+    y = _as_columns(y)
+    num_rows, num_series = y.shape
+    num_buckets = num_points//2
+    if num_points >= num_rows or num_buckets < 1:
+        return tile(arange(num_rows).reshape((-1, 1)), (1, num_series))
+
+    bucket_size = -(-num_rows//num_buckets)
+    padded_y = concatenate([y, tile(y[-1], (num_buckets*bucket_size - num_rows, 1))])
+    buckets = padded_y.reshape((num_buckets, bucket_size, num_series))
+    bucket_starts = (arange(num_buckets)*bucket_size).reshape((-1, 1))
+    indices = concatenate([bucket_starts + buckets.argmin(axis=1), bucket_starts + buckets.argmax(axis=1)])
+    return sort(indices.clip(0, num_rows - 1), axis=0)
+
+
+def downsample(x, y, num_points=DEFAULT_MAX_POINTS, method='lttb'):
+    """
+    Returns the time and values of the points kept of each column of y, as arrays with one column per series.
+    """
+    if method not in DOWNSAMPLING_METHODS:
+        raise ValueError('unknown downsampling method %s' % method)
+    x = asarray(x, dtype=float)
+    y = _as_columns(y)
+    if method == 'lttb':
+        indices = get_lttb_indices(x, y, num_points)
+    elif method == 'min_max':
+        indices = get_min_max_indices(y, num_points)
+    else:
+        indices = tile(arange(y.shape[0]).reshape((-1, 1)), (1, y.shape[1]))
+    return x[indices], y[indices, arange(y.shape[1])]
+
+
+def export_series(path, x, y, names, tikz_preamble=None, plot_options=None, export_format='tikz',
+                  max_points=DEFAULT_MAX_POINTS, downsampling='lttb', decimals=4):
+    """
+    Downsamples the columns of y and writes them in one of the export formats:
+
+        tikz      a TikZ picture with the coordinates of each series inline
+        pgfplots  a TikZ picture plotting the series from a CSV table written next to it
+        csv       a CSV table with a time and a value column per series
+
+    tikz_preamble is a list of lines opening the picture and axis and plot_options the options of each series' addplot.
+    Rows are formatted in bulk with numpy.savetxt.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError('unknown export format %s' % export_format)
+    x, y = downsample(x, y, num_points=max_points, method=downsampling)
+    if len(names) != y.shape[1]:
+        raise ValueError('%i names given for %i series' % (len(names), y.shape[1]))
+    number_format = '%%.%if' % decimals
+
+    if export_format == 'csv' or export_format == 'pgfplots':
+        table_path = path if export_format == 'csv' else splitext(path)[0] + '.csv'
+        header = ','.join(['t_%s,%s' % (name, name) for name in names])
+        table = column_stack([column for k in xrange(y.shape[1]) for column in (x[:, k], y[:, k])])
+        with open(table_path, 'w', EXPORT_BUFFER_SIZE) as table_file:
+            savetxt(table_file, table, fmt=number_format, delimiter=',', header=header, comments='')
+        if export_format == 'csv':
+            return
+
+    if plot_options is None:
+        plot_options = ['line width=1.25pt']*y.shape[1]
+    with open(path, 'w', EXPORT_BUFFER_SIZE) as tikz_file:
+        tikz_file.write('\n'.join(tikz_preamble or []) + '\n')
+        for k, name in enumerate(names):
+            if export_format == 'pgfplots':
+                tikz_file.write('\\addplot[%s] table[x=t_%s, y=%s, col sep=comma] {%s};\n' % (
+                                plot_options[k], name, name, basename(table_path)))
+            else:
+                tikz_file.write('\\addplot[%s]\ncoordinates {\n' % plot_options[k])
+                savetxt(tikz_file, column_stack((x[:, k], y[:, k])),
+                        fmt='(%s, %s)' % (number_format, number_format))
+                tikz_file.write('};\n')
+        tikz_file.write('\\end{axis}\n\\end{tikzpicture}')
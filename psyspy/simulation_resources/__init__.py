@@ -2,4 +2,14 @@ from perturbations import KuramotoOscillatorLoadModelRealPowerSetpointPerturbati
 #ConstantApparentPowerModelApparentPowerInjectionPerturbation,
 from numerical_methods import NewtonRhapson, RungeKutta45
 # from power_line_changes import TemporaryPowerLineImpedanceChange
+from channel_recorder import ChannelRecorder, RecordingSpec
+from frequency_estimation import estimate_frequencies
+from multirate_integrator import MultiRateIntegrator
+from order_parameter_tracker import OrderParameterTracker
+from sampled_data_control import ControllerScheduler, ProportionalFrequencyController, SampledDataController
+from small_signal_analysis import SmallSignalAnalysis
+from steady_state_detector import SteadyStateDetector
 from simulation_routine import SimulationRoutine
+from ensemble_runner import EnsembleRunner
+from ensemble_integrator import VectorizedEnsembleIntegrator
+from parareal import PararealDriver
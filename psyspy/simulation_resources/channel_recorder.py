@@ -0,0 +1,247 @@
+from logging import debug
+
+from numpy import array, empty, zeros
+
+
+class RecordingSpec(object):
+    """
+    Describes which quantities a dynamic simulation should keep a history of. Bus quantities are the voltage magnitude
+    (V), voltage angle (theta) and frequency (w); power line quantities are the real (Pab) and reactive (Qab) power
+    flows. bus_ids and power_line_ids select a subset of the network (None selects everything) and values are only
+    stored every decimation steps, or every output_interval seconds if that is given instead.
+    """
+    BUS_QUANTITIES = ('V', 'theta', 'w')
+    POWER_LINE_QUANTITIES = ('Pab', 'Qab')
+
+    def __init__(self, quantities=('V', 'theta', 'w'), bus_ids=None, power_line_ids=None, decimation=1,
+                 output_interval=None):
+
+        for quantity in quantities:
+            if quantity not in self.BUS_QUANTITIES and quantity not in self.POWER_LINE_QUANTITIES:
+                raise ValueError('cannot record unknown quantity %s' % quantity)
+
+        if decimation < 1:
+            raise ValueError('decimation factor must be a positive integer')
+
+        self.quantities = tuple(quantities)
+        self.bus_ids = bus_ids
+        self.power_line_ids = power_line_ids
+        self.decimation = int(decimation)
+        self.output_interval = output_interval
+
+
+    def get_decimation(self, time_step):
+        if self.output_interval is None:
+            return self.decimation
+        return max(1, int(round(float(self.output_interval)/float(time_step))))
+
+
+    def get_bus_quantities(self):
+        return [quantity for quantity in self.quantities if quantity in self.BUS_QUANTITIES]
+
+
+    def get_power_line_quantities(self):
+        return [quantity for quantity in self.quantities if quantity in self.POWER_LINE_QUANTITIES]
+
+
+class ChannelRecorder(object):
+    """
+    Stores the channels selected by a RecordingSpec in preallocated (records x elements) arrays. record is called
+    once per integration step; values are read from the current state of the network and only written every
+    decimation time steps of the grid, so the memory used does not grow with the parts of the network that are not recorded.
+
+    If a data manager is provided only chunk_size records are held in memory, each full chunk is appended to the
+    data manager's on-disk channels and the run length is bounded by disk space rather than memory. Channels already
+    in the data manager are extended rather than replaced if append_to_existing_channels is True, e.g., when a
+    simulation is resumed from a checkpoint.
+    """
+
+    def __init__(self, network, recording_spec, time_step, max_num_steps, data_manager=None, chunk_size=1024,
+                 append_to_existing_channels=False):
+        self.network = network
+        self.recording_spec = recording_spec
+        self.decimation = recording_spec.get_decimation(time_step)
+
+        # rows of the recorded elements in the network arrays, None if every element is recorded
+        if recording_spec.bus_ids is None:
+            self.buses = list(network.buses)
+            self._bus_rows = None
+        else:
+            _ = network.get_buses_index_bus_id_mapping()
+            self._bus_rows = self._get_rows(network.buses_index_by_bus_id, recording_spec.bus_ids, 'bus')
+            self.buses = [network.buses[row] for row in self._bus_rows.tolist()]
+
+        if recording_spec.power_line_ids is None:
+            self.power_lines = list(network.power_lines)
+            self._power_line_rows = None
+        else:
+            power_line_rows_by_id = dict((power_line.get_id(), row) for row, power_line in enumerate(network.power_lines))
+            self._power_line_rows = self._get_rows(power_line_rows_by_id, recording_spec.power_line_ids, 'power line')
+            self.power_lines = [network.power_lines[row] for row in self._power_line_rows.tolist()]
+
+        self.bus_quantities = recording_spec.get_bus_quantities()
+        self.power_line_quantities = recording_spec.get_power_line_quantities()
+
+        num_records = (max_num_steps - 1)//self.decimation + 1
+        self.data_manager = data_manager
+        if data_manager is None:
+            num_buffered_records = num_records
+        else:
+            num_buffered_records = min(num_records, chunk_size)
+
+        self.time = empty(num_buffered_records)
+        self.channels = {}
+        for quantity in self.bus_quantities:
+            self.channels[quantity] = empty((num_buffered_records, len(self.buses)))
+        for quantity in self.power_line_quantities:
+            self.channels[quantity] = empty((num_buffered_records, len(self.power_lines)))
+
+        if data_manager is not None:
+            self._create_data_manager_channels(append_to_existing_channels)
+
+        self.num_records = 0
+        self._num_buffered_records = 0
+        self._previous_angles = None
+        self._previous_time = None
+        debug('Recording %i of %i possible samples of %s' % (num_records, max_num_steps, ', '.join(self.channels)))
+
+
+    def _get_rows(self, rows_by_id, element_ids, element_name):
+        rows = []
+        for element_id in element_ids:
+            try:
+                rows.append(rows_by_id[element_id])
+            except KeyError:
+                raise ValueError('cannot record %s %i, it is not in the network' % (element_name, element_id))
+        return array(rows, dtype=int)
+
+
+    def _create_data_manager_channels(self, append_to_existing_channels=False):
+        existing_channels = self.data_manager.get_channel_names()
+        channel_columns = [('time', None, None)] + [(quantity, values.shape[1],
+                                                     'bus' if quantity in self.bus_quantities else 'power_line')
+                                                    for quantity, values in self.channels.iteritems()]
+        for name, num_columns, element_type in channel_columns:
+            if append_to_existing_channels is True and name in existing_channels:
+                continue
+            self.data_manager.create_channel(name, num_columns=num_columns, element_type=element_type)
+        self.data_manager.set_metadata('bus_ids', self.get_bus_ids())
+        self.data_manager.set_metadata('power_line_ids', self.get_power_line_ids())
+        self.data_manager.set_metadata('decimation', self.decimation)
+
+
+    def is_streaming(self):
+        return self.data_manager is not None
+
+
+    def get_bus_ids(self):
+        return [bus.get_id() for bus in self.buses]
+
+
+    def get_power_line_ids(self):
+        return [power_line.get_id() for power_line in self.power_lines]
+
+
+    def _get_current_values(self, arrays, quantity, rows):
+        # a copy of the column, the network arrays are overwritten by the next step
+        values = getattr(arrays, quantity)
+        if rows is None:
+            return values.copy()
+        return values[rows]
+
+
+    def _get_current_angles(self):
+        return self._get_current_values(self.network.get_bus_arrays(), 'theta', self._bus_rows)
+
+
+    def _update_frequencies(self, t):
+        # frequency needs the angles at every step, not just the recorded ones, so they are tracked separately
+        angles = self._get_current_angles()
+        if self._previous_angles is None or t == self._previous_time:
+            w = zeros(angles.shape[0])
+        else:
+            w = (angles - self._previous_angles)/(t - self._previous_time)
+        self._previous_angles = angles
+        self._previous_time = t
+        return angles, w
+
+
+    def is_due(self, grid_index, on_grid=True):
+        """
+        Records are taken at every decimation-th point of the time grid, so extra steps that end on an event between
+        two grid points do not shift them. Such steps are only recorded if every step is.
+        """
+        if on_grid is False:
+            return self.decimation == 1
+        return grid_index % self.decimation == 0
+
+
+    def record(self, grid_index, t, on_grid=True):
+        if 'w' in self.bus_quantities:
+            angles, w = self._update_frequencies(t)
+
+        if self.is_due(grid_index, on_grid) is False:
+            return False
+
+        i = self._num_buffered_records
+        self.time[i] = t
+        bus_arrays = self.network.get_bus_arrays()
+        for quantity in self.bus_quantities:
+            if quantity == 'V':
+                self.channels['V'][i, :] = self._get_current_values(bus_arrays, 'V', self._bus_rows)
+            elif quantity == 'theta':
+                if 'w' in self.bus_quantities:
+                    self.channels['theta'][i, :] = angles
+                else:
+                    self.channels['theta'][i, :] = self._get_current_values(bus_arrays, 'theta', self._bus_rows)
+            elif quantity == 'w':
+                self.channels['w'][i, :] = w
+
+        branch_arrays = self.network.get_branch_arrays()
+        for quantity in self.power_line_quantities:
+            self.channels[quantity][i, :] = self._get_current_values(branch_arrays, quantity, self._power_line_rows)
+
+        self.num_records += 1
+        self._num_buffered_records += 1
+        if self.is_streaming() is True and self._num_buffered_records == self.time.shape[0]:
+            self.flush()
+        return True
+
+
+    def flush(self):
+        """
+        Writes any buffered records to the data manager, does nothing if results are only kept in memory.
+        """
+        if self.is_streaming() is False or self._num_buffered_records == 0:
+            return
+
+        n = self._num_buffered_records
+        chunk = {'time': self.time[0:n]}
+        for quantity, values in self.channels.iteritems():
+            chunk[quantity] = values[0:n]
+        self.data_manager.flush_chunk(chunk)
+        self._num_buffered_records = 0
+
+
+    def finalize(self):
+        if self.is_streaming() is True:
+            self.flush()
+            self.data_manager.mark_complete()
+
+
+    def get_time_vector(self):
+        if self.is_streaming() is True:
+            return self.data_manager.get_channel('time')
+        return self.time[0:self.num_records]
+
+
+    def get_channel(self, quantity):
+        if quantity not in self.channels:
+            raise KeyError('%s was not recorded' % quantity)
+        if self.is_streaming() is True:
+            return self.data_manager.get_channel(quantity)
+        return self.channels[quantity][0:self.num_records]
+
+
+    def get_channels(self):
+        return dict([(quantity, self.get_channel(quantity)) for quantity in self.channels])
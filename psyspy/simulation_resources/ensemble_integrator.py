@@ -0,0 +1,164 @@
+from logging import debug
+
+from numpy import abs as np_abs, arange, broadcast_to, flatnonzero, hstack, isfinite, ones, sin, zeros
+from scipy.sparse import coo_matrix, csr_matrix, triu
+
+
+class VectorizedEnsembleIntegrator(object):
+    """
+    Integrates an ensemble of Kuramoto (first-order) or classical generator (second-order swing) networks that share a
+    coupling structure but have their own parameters and initial conditions. States are stored as
+    (members x buses) arrays so that a single fourth-order Runge-Kutta step advances every member at once.
+
+        first-order:   D_i dtheta_i/dt = P_i - sum_j K_ij sin(theta_i - theta_j)
+        second-order:  dtheta_i/dt = w_i,  M_i dw_i/dt = P_i - D_i w_i - sum_j K_ij sin(theta_i - theta_j)
+
+    The second-order form is used when inertia is provided. power_injections, damping and inertia can each be a
+    scalar, a per-bus vector or a (members x buses) array. Members whose states become non-finite or whose frequency
+    deviation exceeds divergence_threshold are masked out and no longer integrated.
+    """
+
+    def __init__(self, coupling_matrix, num_members, power_injections, damping=1., inertia=None,
+                 time_step=0.001, divergence_threshold=None):
+
+        self.num_members = num_members
+        self.num_buses = coupling_matrix.shape[0]
+        self.time_step = time_step
+        self.divergence_threshold = divergence_threshold
+
+        self._set_edge_incidence(coupling_matrix)
+
+        shape = (num_members, self.num_buses)
+        self.P = self._broadcast_parameter(power_injections, shape, 'power_injections')
+        self.D = self._broadcast_parameter(damping, shape, 'damping')
+        if inertia is None:
+            self.M = None
+        else:
+            self.M = self._broadcast_parameter(inertia, shape, 'inertia')
+
+        self.theta = zeros(shape)
+        self.w = zeros(shape)
+        self.active_members = ones(num_members, dtype=bool)
+        self.current_time = 0.
+
+
+    def _broadcast_parameter(self, value, shape, name):
+        try:
+            return broadcast_to(value, shape)
+        except ValueError:
+            raise ValueError('%s must be a scalar, a vector with one entry per bus or a (members x buses) array' % name)
+
+
+    def _set_edge_incidence(self, coupling_matrix):
+        # each coupled pair is visited once, the resulting flow is added to bus i and subtracted from bus j
+        K = triu(csr_matrix(coupling_matrix), k=1).tocoo()
+        self.edge_from = K.row
+        self.edge_to = K.col
+        self.edge_coupling = K.data
+
+        num_edges = K.nnz
+        edges = arange(0, num_edges)
+        self.edge_incidence = coo_matrix((hstack((ones(num_edges), -ones(num_edges))),
+                                          (hstack((edges, edges)), hstack((self.edge_from, self.edge_to)))),
+                                         shape=(num_edges, self.num_buses)).tocsr()
+        debug('Ensemble coupling has %i edges between %i buses' % (num_edges, self.num_buses))
+
+
+    def is_second_order(self):
+        return self.M is not None
+
+
+    def set_initial_conditions(self, theta0, w0=None):
+        self.theta = self._broadcast_parameter(theta0, self.theta.shape, 'theta0').astype(float)
+        if w0 is not None:
+            self.w = self._broadcast_parameter(w0, self.w.shape, 'w0').astype(float)
+        else:
+            self.w = zeros(self.theta.shape)
+        self.active_members = ones(self.num_members, dtype=bool)
+        self.current_time = 0.
+
+
+    def _network_coupling(self, theta):
+        # (members x edges) line flows, scattered back to buses through the sparse edge incidence matrix
+        flows = self.edge_coupling*sin(theta[:, self.edge_from] - theta[:, self.edge_to])
+        return self.edge_incidence.T.dot(flows.T).T
+
+
+    def _get_time_derivatives(self, theta, w, members):
+        coupling = self._network_coupling(theta)
+        P = self.P[members]
+        D = self.D[members]
+        if self.is_second_order() is True:
+            return w, (P - D*w - coupling)/self.M[members]
+        else:
+            dtheta = (P - coupling)/D
+            return dtheta, dtheta
+
+
+    def step(self, dt=None):
+        if dt is None:
+            dt = self.time_step
+
+        if self.active_members.all():
+            members = slice(None)
+        else:
+            members = flatnonzero(self.active_members)
+            if members.shape[0] == 0:
+                self.current_time += dt
+                return
+
+        theta = self.theta[members]
+        w = self.w[members]
+
+        k1_theta, k1_w = self._get_time_derivatives(theta, w, members)
+        k2_theta, k2_w = self._get_time_derivatives(theta + 0.5*dt*k1_theta, w + 0.5*dt*k1_w, members)
+        k3_theta, k3_w = self._get_time_derivatives(theta + 0.5*dt*k2_theta, w + 0.5*dt*k2_w, members)
+        k4_theta, k4_w = self._get_time_derivatives(theta + dt*k3_theta, w + dt*k3_w, members)
+
+        theta_next = theta + (dt/6.)*(k1_theta + 2*k2_theta + 2*k3_theta + k4_theta)
+        if self.is_second_order() is True:
+            w_next = w + (dt/6.)*(k1_w + 2*k2_w + 2*k3_w + k4_w)
+        else:
+            w_next, _ = self._get_time_derivatives(theta_next, None, members)
+
+        self.theta[members] = theta_next
+        self.w[members] = w_next
+        self.current_time += dt
+
+        self._mask_diverged_members(members)
+
+
+    def _mask_diverged_members(self, members):
+        member_indices = arange(0, self.num_members)[members]
+        theta = self.theta[members]
+        w = self.w[members]
+
+        diverged = ~(isfinite(theta).all(axis=1) & isfinite(w).all(axis=1))
+        if self.divergence_threshold is not None:
+            diverged |= (np_abs(w) > self.divergence_threshold).any(axis=1)
+
+        if diverged.any():
+            self.active_members[member_indices[diverged]] = False
+            debug('Masked %i diverged ensemble members at t=%f' % (diverged.sum(), self.current_time))
+
+
+    def run(self, simulation_time, callback=None):
+        """
+        Integrates every active member up to simulation_time. If provided, callback(integrator) is invoked after every
+        step, e.g., to record a reduced quantity such as the order parameter.
+        """
+        num_steps = int(float(simulation_time)/float(self.time_step))
+        for _ in range(0, num_steps):
+            self.step()
+            if callback is not None:
+                callback(self)
+
+        return self.theta, self.w
+
+
+    def get_synchronized_members(self, frequency_tolerance=1e-3):
+        """
+        Returns a boolean mask of members that have not diverged and whose frequency deviations have all settled to
+        within frequency_tolerance, e.g., for estimating basin stability.
+        """
+        return self.active_members & (np_abs(self.w) <= frequency_tolerance).all(axis=1)
@@ -0,0 +1,158 @@
+from ctypes import c_double
+from logging import debug, warning
+from multiprocessing import Pool, cpu_count
+from multiprocessing.sharedctypes import RawArray
+from traceback import format_exc
+
+from numpy import frombuffer, nan
+from numpy.random import RandomState
+
+
+# state installed in each worker process by _initialize_worker, module level so the pool does not need to pickle it
+# alongside every task
+_worker_state = {}
+
+
+def _initialize_worker(network_builder, network_spec, simulation_builder, parameter_sampler, seed,
+                       shared_channels, channel_extractors):
+    _worker_state['network_builder'] = network_builder
+    _worker_state['network_spec'] = network_spec
+    _worker_state['simulation_builder'] = simulation_builder
+    _worker_state['parameter_sampler'] = parameter_sampler
+    _worker_state['seed'] = seed
+    _worker_state['channel_extractors'] = channel_extractors
+    _worker_state['channels'] = dict([(name, _shared_array_view(shared_array, num_samples))
+                                      for name, (shared_array, num_samples) in shared_channels.iteritems()])
+
+
+def _shared_array_view(shared_array, num_samples):
+    return frombuffer(shared_array, dtype=float).reshape((-1, num_samples))
+
+
+def get_member_random_state(seed, member_index):
+    """
+    Returns an independent random stream for one ensemble member. Streams depend only on the base seed and the member
+    index, so results do not depend on how members are distributed over worker processes.
+    """
+    return RandomState([seed, member_index])
+
+
+def _run_member(member_index):
+    state = _worker_state
+    parameters = None
+    try:
+        random_state = get_member_random_state(state['seed'], member_index)
+        parameters = state['parameter_sampler'](random_state, member_index)
+
+        network = state['network_builder'](state['network_spec'])
+        simulation = state['simulation_builder'](network, parameters)
+        simulation.run_simulation()
+
+        for name, extractor in state['channel_extractors'].iteritems():
+            output = state['channels'][name][member_index]
+            values = extractor(simulation)
+            num_values = min(len(values), output.shape[0])
+            output[0:num_values] = values[0:num_values]
+            output[num_values:] = nan
+
+        return member_index, parameters, True, None
+    except Exception:
+        for output in state['channels'].itervalues():
+            output[member_index, :] = nan
+        return member_index, parameters, False, format_exc()
+
+
+class EnsembleRunner(object):
+    """
+    Runs many SimulationRoutine instances that differ only in sampled parameters across a pool of processes.
+
+    Each worker builds its own network by calling network_builder(network_spec), so only the (small) spec is sent to
+    the workers instead of a pickled object graph. parameter_sampler(random_state, member_index) returns the parameters
+    of one member from that member's own seeded random stream, and simulation_builder(network, parameters) returns the
+    SimulationRoutine to run. Each entry of output_channels maps a channel name to (extractor, num_samples) where
+    extractor(simulation) returns the values to keep; these are written straight into shared memory. All callables
+    must be importable module-level functions so they can be sent to the workers.
+    """
+
+    def __init__(self, network_builder, simulation_builder, parameter_sampler, num_members,
+                 network_spec=None, output_channels=None, seed=0, num_processes=None, progress_callback=None):
+
+        if num_members < 1:
+            raise ValueError('an ensemble must have at least one member')
+
+        self.network_builder = network_builder
+        self.simulation_builder = simulation_builder
+        self.parameter_sampler = parameter_sampler
+        self.num_members = num_members
+        self.network_spec = network_spec
+        self.seed = seed
+
+        if num_processes is None:
+            num_processes = cpu_count()
+        self.num_processes = max(1, min(num_processes, num_members))
+
+        self.progress_callback = progress_callback
+
+        if output_channels is None:
+            output_channels = {}
+        self.channel_extractors = {}
+        self._shared_channels = {}
+        for name, (extractor, num_samples) in output_channels.iteritems():
+            self.channel_extractors[name] = extractor
+            self._shared_channels[name] = (RawArray(c_double, num_members*num_samples), num_samples)
+
+        self.member_parameters = [None]*num_members
+        self.member_succeeded = [None]*num_members
+        self.member_errors = [None]*num_members
+
+
+    def get_channel(self, name):
+        """
+        Returns a (num_members, num_samples) array backed by the shared memory the workers wrote into.
+        """
+        try:
+            shared_array, num_samples = self._shared_channels[name]
+        except KeyError:
+            raise KeyError('no output channel named %s' % name)
+        return _shared_array_view(shared_array, num_samples)
+
+
+    def get_failed_member_indices(self):
+        return [index for index, succeeded in enumerate(self.member_succeeded) if succeeded is False]
+
+
+    def _record_member_result(self, result, num_completed):
+        member_index, parameters, succeeded, error = result
+        self.member_parameters[member_index] = parameters
+        self.member_succeeded[member_index] = succeeded
+        self.member_errors[member_index] = error
+
+        if succeeded is False:
+            warning('Ensemble member %i failed:\n%s' % (member_index, error))
+        else:
+            debug('Ensemble member %i completed (%i of %i)' % (member_index, num_completed, self.num_members))
+
+        if self.progress_callback is not None:
+            self.progress_callback(member_index, succeeded, num_completed, self.num_members)
+
+
+    def run(self):
+        initializer_args = (self.network_builder, self.network_spec, self.simulation_builder, self.parameter_sampler,
+                            self.seed, self._shared_channels, self.channel_extractors)
+
+        if self.num_processes == 1:
+            _initialize_worker(*initializer_args)
+            results = (_run_member(member_index) for member_index in range(0, self.num_members))
+            for num_completed, result in enumerate(results):
+                self._record_member_result(result, num_completed + 1)
+        else:
+            pool = Pool(processes=self.num_processes, initializer=_initialize_worker, initargs=initializer_args)
+            try:
+                results = pool.imap_unordered(_run_member, range(0, self.num_members))
+                for num_completed, result in enumerate(results):
+                    self._record_member_result(result, num_completed + 1)
+            finally:
+                pool.close()
+                pool.join()
+
+        return dict([(name, self.get_channel(name)) for name in self._shared_channels])
@@ -0,0 +1,55 @@
+from logging import warning
+
+from numpy import asarray, diff, empty_like, gradient, median
+
+
+FREQUENCY_ESTIMATION_METHODS = ('backward', 'central', 'savgol')
+
+
+def estimate_frequencies(angles, time_vector, method='backward', window_length=11, polyorder=2):
+    """
+    Estimates frequencies from a (samples x buses) array of voltage angles recorded at the times in time_vector. The
+    result has the same shape as angles, so row k is the frequency at time_vector[k].
+
+        backward: (theta_k - theta_k-1)/(t_k - t_k-1), zero at the first sample
+        central:  second-order central differences (one-sided at the ends), handles non-uniform steps
+        savgol:   derivative of a Savitzky-Golay fit of window_length samples, assumes (nearly) uniform steps
+    """
+    angles = asarray(angles, dtype=float)
+    time_vector = asarray(time_vector, dtype=float)
+    if angles.shape[0] != time_vector.shape[0]:
+        raise ValueError('angles must have one row per entry of the time vector')
+
+    if angles.shape[0] < 2:
+        return 0.*angles
+
+    if method == 'backward':
+        frequencies = empty_like(angles)
+        frequencies[0] = 0.
+        time_steps = diff(time_vector)
+        if angles.ndim > 1:
+            time_steps = time_steps.reshape((-1,) + (1,)*(angles.ndim - 1))
+        frequencies[1:] = diff(angles, axis=0)/time_steps
+        return frequencies
+
+    elif method == 'central':
+        return gradient(angles, time_vector, axis=0)
+
+    elif method == 'savgol':
+        from scipy.signal import savgol_filter
+
+        time_steps = diff(time_vector)
+        time_step = median(time_steps)
+        if abs(time_steps - time_step).max() > 1e-6*time_step:
+            warning('Savitzky-Golay frequency estimate assumes uniform time steps, using the median step')
+
+        # the filter window has to be odd and cannot be longer than the signal
+        window_length = min(window_length, angles.shape[0])
+        if window_length % 2 == 0:
+            window_length -= 1
+        if window_length <= polyorder:
+            return gradient(angles, time_vector, axis=0)
+        return savgol_filter(angles, window_length, polyorder, deriv=1, delta=time_step, axis=0)
+
+    raise ValueError('unknown frequency estimation method %s, must be one of %s' %
+                     (method, ', '.join(FREQUENCY_ESTIMATION_METHODS)))
@@ -0,0 +1,135 @@
+from logging import debug
+from math import ceil, floor, log
+
+from numpy import array, empty
+
+
+class MultiRateIntegrator(object):
+    """
+    Fourth-order Runge-Kutta integration of dynamic states that are split into rate groups. A group whose natural
+    time scale spans many base steps is only advanced every multiple base steps with a step of multiple*base_time_step,
+    while a group faster than the base step is sub-cycled with substeps steps per base step.
+
+    Groups are advanced slowest first. While a group is integrated, the states of every other group are taken from a
+    straight line through that group's most recent step, so slow states seen by fast groups are interpolated and fast
+    states seen by slow groups are extrapolated linearly. The derivative method is also given the stage time, so that
+    quantities it reads that are not states (e.g., the bus voltages of a power network) can be extrapolated likewise.
+    """
+
+    def __init__(self, base_time_step, steps_per_time_scale=10., max_rate_multiple=64, max_substeps=64):
+        self.base_time_step = base_time_step
+        self.steps_per_time_scale = steps_per_time_scale
+        self.max_rate_multiple = max_rate_multiple
+        self.max_substeps = max_substeps
+        self.rate_groups = {}
+
+
+    def set_step_size(self, new_step_size):
+        self.base_time_step = new_step_size
+        return self.get_step_size()
+
+
+    def get_step_size(self):
+        return self.base_time_step
+
+
+    def get_rate(self, time_scale):
+        """
+        Returns (multiple, substeps) for a natural time scale in seconds, a time scale of None uses the base rate.
+        Multiples are powers of two so that slower groups always step on the boundaries of faster ones.
+        """
+        if time_scale is None:
+            return 1, 1
+
+        ratio = float(time_scale)/(self.steps_per_time_scale*self.base_time_step)
+        if ratio >= 2.:
+            return min(self.max_rate_multiple, 2**int(floor(log(ratio, 2)))), 1
+        elif ratio < 1.:
+            return 1, min(self.max_substeps, int(ceil(1./ratio)))
+        return 1, 1
+
+
+    def set_rate_groups(self, rate_groups):
+        """
+        rate_groups maps each (multiple, substeps) rate to the array of state indices integrated at that rate.
+        """
+        self.rate_groups = dict([(rate, array(indices, dtype=int)) for rate, indices in rate_groups.iteritems()])
+        # slowest groups are advanced first so faster groups can interpolate them
+        self._group_order = sorted(self.rate_groups.keys(), key=lambda rate: (-rate[0], rate[1]))
+        debug('Multi-rate integration with groups (multiple, substeps, states): %s' %
+              ', '.join(['(%i, %i, %i)' % (rate[0], rate[1], self.rate_groups[rate].shape[0])
+                         for rate in self._group_order]))
+
+
+    def initialize(self, states):
+        """
+        Starts every group from the given states, e.g., at the beginning of a simulation or after a step that had to
+        be taken at a single rate.
+        """
+        self.step_index = 0
+        self._group_history = {}
+        for rate, indices in self.rate_groups.iteritems():
+            x = states[indices].copy()
+            # a zero-slope history until the group has taken its first step
+            self._group_history[rate] = (-1., x, 0., x)
+
+
+    def _get_group_states_at(self, rate, t):
+        t_start, x_start, t_end, x_end = self._group_history[rate]
+        alpha = max((t - t_start)/(t_end - t_start), 0.)
+        return x_start + alpha*(x_end - x_start)
+
+
+    def _get_coupled_states(self, t, active_rate, active_states):
+        states = empty(self._num_states)
+        for rate, indices in self.rate_groups.iteritems():
+            if rate == active_rate:
+                states[indices] = active_states
+            else:
+                states[indices] = self._get_group_states_at(rate, t)
+        return states
+
+
+    def _advance_group(self, rate, x, derivative_method):
+        multiple, substeps = rate
+        h = float(multiple)/substeps
+        dt = h*self.base_time_step
+        t = float(self.step_index)
+
+        def f(t_stage, x_stage):
+            return derivative_method(self._get_coupled_states(t_stage, rate, x_stage), rate, t_stage - self.step_index)
+
+        for _ in range(0, substeps):
+            k1 = dt*f(t, x)
+            k2 = dt*f(t + 0.5*h, x + 0.5*k1)
+            k3 = dt*f(t + 0.5*h, x + 0.5*k2)
+            k4 = dt*f(t + h, x + k3)
+            x = x + (1/6.)*(k1 + 2*k2 + 2*k3 + k4)
+            t += h
+        return x
+
+
+    def step(self, states, derivative_method):
+        """
+        Advances by one base step and returns the states of every group at the end of it. derivative_method(states,
+        rate, t) must return the time derivatives of the states in the rate group for a full state vector at t base
+        steps after the start of the current base step.
+        """
+        self._num_states = states.shape[0]
+        k = self.step_index
+
+        for rate in self._group_order:
+            multiple, _ = rate
+            if k % multiple != 0:
+                continue
+            indices = self.rate_groups[rate]
+            x_start = states[indices]
+            x_end = self._advance_group(rate, x_start, derivative_method)
+            self._group_history[rate] = (float(k), x_start, float(k + multiple), x_end)
+
+        self.step_index += 1
+
+        updated_states = empty(self._num_states)
+        for rate, indices in self.rate_groups.iteritems():
+            updated_states[indices] = self._get_group_states_at(rate, float(self.step_index))
+        return updated_states
@@ -8,6 +8,15 @@ class RungeKutta45(object):
     
     def __init__(self, step_size):
         self.step_size = step_size
+
+
+    def set_step_size(self, new_step_size):
+        self.step_size = new_step_size
+        return self.get_step_size()
+
+
+    def get_step_size(self):
+        return self.step_size
         
         
     def get_updated_states(self, current_states, incremental_state_method):
@@ -16,7 +25,7 @@ class RungeKutta45(object):
         k1 = dt*incremental_state_method(current_states=current_states)
         k2 = dt*incremental_state_method(current_states=(current_states + 0.5*k1))
         k3 = dt*incremental_state_method(current_states=(current_states + 0.5*k2))
-        k4 = dt*incremental_state_method(current_states=(current_states + k2))
+        k4 = dt*incremental_state_method(current_states=(current_states + k3))
         return current_states + (1/6.)*(k1 + 2*k2 + 2*k3 + k4)
 
 
@@ -24,6 +33,15 @@ class ForwardEuler(object):
 
     def __init__(self, step_size):
         self.step_size = step_size
+
+
+    def set_step_size(self, new_step_size):
+        self.step_size = new_step_size
+        return self.get_step_size()
+
+
+    def get_step_size(self):
+        return self.step_size
         
     
     def get_updated_states(self, current_states, incremental_state_method):
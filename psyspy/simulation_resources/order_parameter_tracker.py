@@ -0,0 +1,106 @@
+from numpy import abs as np_abs, angle, array, empty, exp, hstack, ones
+from scipy.sparse import csr_matrix
+
+
+class OrderParameterTracker(object):
+    """
+    Tracks the Kuramoto order parameter r*exp(i*psi) = mean(exp(i*theta)) of the bus voltage angles during a
+    simulation, both over all selected buses and over each group (e.g., area or community) of buses. Every group's
+    value comes from a single sparse averaging product with the array of current angles and is written into a
+    preallocated buffer, optionally only every decimation time steps.
+    """
+
+    def __init__(self, bus_ids=None, groups=None, decimation=1):
+        if decimation < 1:
+            raise ValueError('decimation factor must be a positive integer')
+
+        self.bus_ids = bus_ids
+        if groups is None:
+            groups = {}
+        self.group_names = sorted(groups.keys())
+        self.groups = groups
+        self.decimation = int(decimation)
+
+
+    def prepare(self, network, max_num_steps):
+        """
+        Builds the averaging matrix for the network's bus ordering and allocates the output buffers.
+        """
+        bus_ids = network.get_buses_index_bus_id_mapping()
+        bus_positions = network.buses_index_by_bus_id
+
+        def get_bus_positions(selected_bus_ids):
+            try:
+                return [bus_positions[bus_id] for bus_id in selected_bus_ids]
+            except KeyError:
+                raise ValueError('cannot track the order parameter of buses that are not in the network')
+
+        if self.bus_ids is None:
+            rows = [range(0, len(bus_ids))]
+        else:
+            rows = [get_bus_positions(self.bus_ids)]
+        rows.extend([get_bus_positions(self.groups[name]) for name in self.group_names])
+
+        for row in rows:
+            if len(row) == 0:
+                raise ValueError('cannot track the order parameter of an empty group of buses')
+
+        row_indices = hstack([i*ones(len(row), dtype=int) for i, row in enumerate(rows)])
+        column_indices = hstack([array(row, dtype=int) for row in rows])
+        weights = hstack([ones(len(row))/len(row) for row in rows])
+        self.averaging_matrix = csr_matrix((weights, (row_indices, column_indices)), shape=(len(rows), len(bus_ids)))
+
+        num_records = (max_num_steps - 1)//self.decimation + 1
+        self.time = empty(num_records)
+        self.order_parameter = empty((num_records, len(rows)), dtype=complex)
+        self.num_records = 0
+
+
+    def is_due(self, grid_index, on_grid=True):
+        # as for ChannelRecorder, steps ending on an event between two grid points are skipped when decimating
+        if on_grid is False:
+            return self.decimation == 1
+        return grid_index % self.decimation == 0
+
+
+    def update(self, grid_index, t, angles, on_grid=True):
+        """
+        Records the order parameters for an array of voltage angles ordered like the network's buses, does nothing
+        unless t is one of the decimated points of the time grid.
+        """
+        if self.is_due(grid_index, on_grid) is False:
+            return False
+
+        i = self.num_records
+        self.time[i] = t
+        self.order_parameter[i, :] = self.averaging_matrix.dot(exp(1j*angles))
+        self.num_records += 1
+        return True
+
+
+    def _get_group_index(self, group):
+        if group is None:
+            return 0
+        try:
+            return self.group_names.index(group) + 1
+        except ValueError:
+            raise KeyError('no group named %s' % group)
+
+
+    def get_time_vector(self):
+        return self.time[0:self.num_records]
+
+
+    def get_order_parameter(self, group=None):
+        """
+        Returns the complex order parameter over time, for all selected buses or only for the named group.
+        """
+        return self.order_parameter[0:self.num_records, self._get_group_index(group)]
+
+
+    def get_magnitude(self, group=None):
+        return np_abs(self.get_order_parameter(group))
+
+
+    def get_phase(self, group=None):
+        return angle(self.get_order_parameter(group))
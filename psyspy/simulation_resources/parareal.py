@@ -0,0 +1,288 @@
+from logging import debug, info, warning
+from multiprocessing import Pool, cpu_count
+from time import time
+from traceback import format_exc
+
+from numpy import abs as np_abs, array
+
+from channel_recorder import RecordingSpec
+
+
+# checkpoint entries that are combined in the parareal correction, every other entry describes discrete state (e.g.,
+# active perturbations, the admittance matrix) that is taken from the coarse propagator
+CORRECTED_CHECKPOINT_ENTRIES = ('dynamic_states', 'bus_voltages', 'power_line_flows')
+
+# entries compared between iterations to decide whether the slice boundaries have converged
+CONVERGENCE_CHECKPOINT_ENTRIES = ('dynamic_states', 'bus_voltages')
+
+# recording spec for propagations of which only the end checkpoint is used
+NO_RECORDING_SPEC = RecordingSpec(quantities=())
+
+
+_worker_state = {}
+
+
+def _initialize_worker(network_builder, network_spec, fine_simulation_builder, slice_extractor):
+    _worker_state['network_builder'] = network_builder
+    _worker_state['network_spec'] = network_spec
+    _worker_state['fine_simulation_builder'] = fine_simulation_builder
+    _worker_state['slice_extractor'] = slice_extractor
+    # built on the first fine slice the worker runs and reused for all later ones
+    _worker_state['fine_simulation'] = None
+
+
+def propagate_checkpoint(simulation, checkpoint, start_time, end_time, record_history=True):
+    """
+    Restores a SimulationRoutine checkpoint taken at start_time, which may come from a simulation with a different time
+    step, runs the simulation until end_time and returns the checkpoint at end_time. If record_history is False
+    nothing is recorded, neither on the network objects nor through the simulation's recording spec.
+    """
+    checkpoint = dict(checkpoint)
+    grid_index = int(round(float(start_time)/simulation.time_step))
+    checkpoint['current_time'] = array(float(start_time))
+    checkpoint['grid_index'] = array(grid_index)
+    checkpoint['step_index'] = array(grid_index)
+
+    simulation.restore_checkpoint(checkpoint)
+    if record_history is True:
+        simulation.run_simulation(resume=True, end_time=end_time)
+    else:
+        recording_spec, data_manager = simulation.recording_spec, simulation.data_manager
+        simulation.recording_spec, simulation.data_manager = NO_RECORDING_SPEC, None
+        try:
+            simulation.run_simulation(resume=True, end_time=end_time)
+        finally:
+            simulation.recording_spec, simulation.data_manager = recording_spec, data_manager
+
+    end_checkpoint = simulation.get_checkpoint()
+    # a simulation that terminated early at steady state does not change until the end of the slice
+    end_checkpoint['current_time'] = array(float(end_time))
+    return end_checkpoint
+
+
+def _run_fine_slice(task):
+    slice_index, checkpoint, start_time, end_time = task
+    state = _worker_state
+    try:
+        started = time()
+        simulation = state['fine_simulation']
+        if simulation is None:
+            simulation = state['fine_simulation_builder'](state['network_builder'](state['network_spec']))
+            state['fine_simulation'] = simulation
+        # histories are only kept if they can be extracted
+        end_checkpoint = propagate_checkpoint(simulation, checkpoint, start_time, end_time,
+                                              record_history=(state['slice_extractor'] is not None))
+
+        slice_output = None
+        if state['slice_extractor'] is not None:
+            slice_output = state['slice_extractor'](simulation)
+
+        return slice_index, end_checkpoint, slice_output, time() - started, None
+    except Exception:
+        return slice_index, None, None, None, format_exc()
+
+
+def _correct_checkpoint(coarse_checkpoint, fine_checkpoint, previous_coarse_checkpoint):
+    checkpoint = dict(coarse_checkpoint)
+    for entry in CORRECTED_CHECKPOINT_ENTRIES:
+        if entry in checkpoint:
+            checkpoint[entry] = coarse_checkpoint[entry] + fine_checkpoint[entry] - previous_coarse_checkpoint[entry]
+    return checkpoint
+
+
+def _get_checkpoint_change(checkpoint, previous_checkpoint):
+    change = 0.
+    for entry in CONVERGENCE_CHECKPOINT_ENTRIES:
+        if entry in checkpoint:
+            change = max(change, np_abs(checkpoint[entry] - previous_checkpoint[entry]).max())
+    return change
+
+
+class PararealDriver(object):
+    """
+    Parallel-in-time simulation of a long horizon with the Parareal method. The horizon is split into num_slices time
+    slices. A cheap coarse simulation (e.g., a large time step or a multi-rate integrator) is run sequentially over
+    the whole horizon, then every slice is refined with the fine simulation in parallel and the slice boundaries are
+    corrected with
+
+        U[n]_k+1 = G(U[n-1]_k+1) + F(U[n-1]_k) - G(U[n-1]_k)
+
+    until no boundary state changes by more than tolerance between iterations. After k iterations the first k slices
+    are exact, so at most num_slices iterations are needed and only slices that can still change are refined.
+
+    States are passed between propagators as SimulationRoutine checkpoints. network_builder(network_spec) must build
+    the network and fine_simulation_builder(network) / coarse_simulation_builder(network) the SimulationRoutine for
+    it, both with the full simulation time and the same perturbations in the same order. As with EnsembleRunner, the
+    builders are sent to the worker processes and must be importable module-level functions. Every worker builds the
+    fine simulation once and restores the checkpoint of each slice it refines into it. If slice_extractor is given,
+    slice_extractor(simulation) is returned for every slice of the final fine sweep; as the simulation is reused,
+    histories kept on the network objects then span all slices the worker has refined, so the fine simulation
+    should be given a recording spec. Otherwise, and for the coarse propagator, nothing is recorded.
+    """
+
+    def __init__(self, network_builder, fine_simulation_builder, coarse_simulation_builder, simulation_time, num_slices,
+                 network_spec=None, tolerance=1e-6, max_iterations=None, num_processes=None, slice_extractor=None):
+
+        if num_slices < 1:
+            raise ValueError('the simulation horizon must be split into at least one time slice')
+
+        self.network_builder = network_builder
+        self.fine_simulation_builder = fine_simulation_builder
+        self.coarse_simulation_builder = coarse_simulation_builder
+        self.simulation_time = simulation_time
+        self.num_slices = num_slices
+        self.network_spec = network_spec
+        self.tolerance = tolerance
+        self.slice_extractor = slice_extractor
+
+        if max_iterations is None or max_iterations > num_slices:
+            max_iterations = num_slices
+        self.max_iterations = max_iterations
+
+        if num_processes is None:
+            num_processes = cpu_count()
+        self.num_processes = max(1, min(num_processes, num_slices))
+
+        self.coarse_simulation = coarse_simulation_builder(network_builder(network_spec))
+        self.slice_boundary_times = self._get_slice_boundary_times()
+
+        self.boundary_checkpoints = None
+        self.slice_outputs = [None]*num_slices
+        self.report = None
+
+
+    def _get_slice_boundary_times(self):
+        """
+        Boundaries are rounded to the coarse time step, which should be a multiple of the fine time step.
+        """
+        coarse_time_step = self.coarse_simulation.time_step
+        slice_boundary_times = [coarse_time_step*round(float(n)*self.simulation_time/(self.num_slices*coarse_time_step))
+                                for n in range(0, self.num_slices + 1)]
+        for start_time, end_time in zip(slice_boundary_times[0:-1], slice_boundary_times[1:]):
+            if end_time <= start_time:
+                raise ValueError('time slices must span at least one coarse time step, use fewer slices')
+        return slice_boundary_times
+
+
+    def _propagate_coarse(self, slice_index, checkpoint):
+        return propagate_checkpoint(self.coarse_simulation, checkpoint, self.slice_boundary_times[slice_index],
+                                    self.slice_boundary_times[slice_index + 1], record_history=False)
+
+
+    def _propagate_fine(self, pool, first_slice_index, boundary_checkpoints):
+        tasks = [(n, boundary_checkpoints[n], self.slice_boundary_times[n], self.slice_boundary_times[n + 1])
+                 for n in range(first_slice_index, self.num_slices)]
+
+        if pool is None:
+            results = [_run_fine_slice(task) for task in tasks]
+        else:
+            results = pool.imap_unordered(_run_fine_slice, tasks)
+
+        fine_checkpoints = {}
+        fine_times = {}
+        for slice_index, end_checkpoint, slice_output, fine_time, error in results:
+            if error is not None:
+                raise RuntimeError('fine propagation of time slice %i failed:\n%s' % (slice_index, error))
+            fine_checkpoints[slice_index] = end_checkpoint
+            fine_times[slice_index] = fine_time
+            self.slice_outputs[slice_index] = slice_output
+        return fine_checkpoints, fine_times
+
+
+    def get_initial_checkpoint(self):
+        self.coarse_simulation.initialize_simulation()
+        return self.coarse_simulation.get_checkpoint()
+
+
+    def run(self, initial_checkpoint=None):
+        """
+        Runs Parareal iterations until the slice boundaries converge and returns the checkpoints at the boundaries,
+        starting from initial_checkpoint or the initialized operating point of the network.
+        """
+        started = time()
+        if initial_checkpoint is None:
+            initial_checkpoint = self.get_initial_checkpoint()
+
+        # initial coarse sweep
+        coarse_started = time()
+        boundary_checkpoints = [initial_checkpoint]
+        coarse_checkpoints = [None]
+        for n in range(0, self.num_slices):
+            coarse_checkpoints.append(self._propagate_coarse(n, boundary_checkpoints[n]))
+            boundary_checkpoints.append(coarse_checkpoints[n + 1])
+        coarse_sweep_time = time() - coarse_started
+
+        pool = None
+        if self.num_processes > 1:
+            pool = Pool(processes=self.num_processes, initializer=_initialize_worker,
+                        initargs=(self.network_builder, self.network_spec, self.fine_simulation_builder,
+                                  self.slice_extractor))
+        else:
+            _initialize_worker(self.network_builder, self.network_spec, self.fine_simulation_builder,
+                               self.slice_extractor)
+
+        boundary_changes = []
+        serial_fine_time = None
+        converged = False
+        try:
+            for k in range(1, self.max_iterations + 1):
+                # boundary k-1 is exact after k-1 iterations, so slices before it cannot change any more
+                fine_checkpoints, fine_times = self._propagate_fine(pool, k - 1, boundary_checkpoints)
+                if serial_fine_time is None:
+                    serial_fine_time = sum(fine_times.values())
+
+                largest_change = _get_checkpoint_change(fine_checkpoints[k - 1], boundary_checkpoints[k])
+                boundary_checkpoints[k] = fine_checkpoints[k - 1]
+                for n in range(k, self.num_slices):
+                    coarse_checkpoint = self._propagate_coarse(n, boundary_checkpoints[n])
+                    corrected_checkpoint = _correct_checkpoint(coarse_checkpoint, fine_checkpoints[n],
+                                                                    coarse_checkpoints[n + 1])
+                    largest_change = max(largest_change,
+                                         _get_checkpoint_change(corrected_checkpoint, boundary_checkpoints[n + 1]))
+                    coarse_checkpoints[n + 1] = coarse_checkpoint
+                    boundary_checkpoints[n + 1] = corrected_checkpoint
+
+                boundary_changes.append(largest_change)
+                debug('Parareal iteration %i, largest change of a slice boundary state %e' % (k, largest_change))
+                if largest_change <= self.tolerance or k == self.num_slices:
+                    converged = True
+                    break
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        wall_time = time() - started
+        if converged is False:
+            warning('Parareal did not converge in %i iterations, largest change of a slice boundary state %e' %
+                    (self.max_iterations, boundary_changes[-1]))
+
+        self.boundary_checkpoints = boundary_checkpoints
+        self.report = {
+            'iterations': len(boundary_changes),
+            'converged': converged,
+            'boundary_changes': boundary_changes,
+            'coarse_sweep_time': coarse_sweep_time,
+            'serial_fine_time': serial_fine_time,
+            'wall_time': wall_time,
+            'speedup': serial_fine_time/wall_time
+        }
+        info('Parareal finished after %i iterations in %f seconds, estimated speedup %.2f over a serial fine run' %
+             (self.report['iterations'], wall_time, self.report['speedup']))
+        return boundary_checkpoints
+
+
+    def get_report(self):
+        """
+        Returns the iteration count, convergence history and timings of the last run. The speedup compares the wall
+        time against the sum of the fine slice run times of the first iteration, i.e., a serial fine simulation.
+        """
+        if self.report is None:
+            raise AttributeError('Parareal driver has not been run')
+        return self.report
+
+
+    def get_final_checkpoint(self):
+        if self.boundary_checkpoints is None:
+            raise AttributeError('Parareal driver has not been run')
+        return self.boundary_checkpoints[-1]
@@ -1,3 +1,4 @@
 # from constant_apparent_power_model_changes import ConstantApparentPowerModelApparentPowerInjectionChange
 from kuramoto_oscillator_model_perturbations import KuramotoOscillatorLoadModelRealPowerSetpointPerturbation
 from perturbation import Perturbation
+from perturbation_scheduler import PerturbationScheduler
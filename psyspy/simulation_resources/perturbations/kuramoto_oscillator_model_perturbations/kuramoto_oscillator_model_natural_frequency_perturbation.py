@@ -1,6 +1,6 @@
 from logging import debug
 
-from numpy import append, array
+from numpy import array
 
 from kuramoto_oscillator_model_perturbation import KuramotoOscillatorModelPerturbation
 
@@ -25,9 +25,9 @@ class KuramotoOscillatorModelNaturalFrequencyPerturbation(KuramotoOscillatorMode
     def _activate(self, t):
         # no need to try / except for the following method as only KuramotoOscillatorModel affected_models are allowed
         self.affected_model.change_dynamic_model_real_power_setpoint(self.new_natural_frequency)
-        self.affected_model._setpoint_change_time = append(self.affected_model._setpoint_change_time, t)
+        self.affected_model.append_setpoint_change_time(t)
 
 
     def _deactivate(self, t):
         self.affected_model.change_dynamic_model_real_power_setpoint(self.old_natural_frequency)
-        self.affected_model._setpoint_change_time = append(self.affected_model._setpoint_change_time, t)
+        self.affected_model.append_setpoint_change_time(t)
@@ -0,0 +1,107 @@
+from heapq import heappop, heappush
+from itertools import count
+from logging import debug
+
+
+class PerturbationScheduler(object):
+    """
+    Event queue of perturbation activations and deactivations keyed on the time at which they occur. Checking for
+    due events only inspects the head of the heap, so a time step with no pending event costs O(1) regardless of how
+    many perturbations are scheduled.
+    """
+    # deactivations sort ahead of activations at the same instant so a perturbation ending at t does not undo one
+    # starting at t
+    _DEACTIVATE = 0
+    _ACTIVATE = 1
+
+    def __init__(self, time_tolerance=1e-9):
+        self.time_tolerance = time_tolerance
+        self._event_queue = []
+        self._event_sequence = count(0)
+
+
+    def __len__(self):
+        return len(self._event_queue)
+
+
+    def schedule_perturbation(self, perturbation, earliest_time=None):
+        """
+        Queues the activation and, if there is one, the deactivation of a perturbation. Events before earliest_time
+        are dropped, e.g., when resuming a simulation from a checkpoint.
+        """
+        for event_time, event_type in [(perturbation.start_time, self._ACTIVATE),
+                                       (perturbation.end_time, self._DEACTIVATE)]:
+            if event_time is None:
+                continue
+            if earliest_time is not None and event_time < earliest_time - self.time_tolerance:
+                continue
+            self._push_event(event_time, event_type, perturbation)
+
+
+    def clear(self):
+        self._event_queue = []
+
+
+    def _push_event(self, event_time, event_type, perturbation):
+        heappush(self._event_queue, (event_time, event_type, self._event_sequence.next(), perturbation))
+
+
+    def has_pending_events(self):
+        return len(self._event_queue) > 0
+
+
+    def get_next_event_time(self):
+        """
+        Returns the time of the earliest pending event, or None if the queue is empty.
+        """
+        try:
+            return self._event_queue[0][0]
+        except IndexError:
+            return None
+
+
+    def get_event_times(self):
+        """
+        Returns the sorted, de-duplicated list of instants at which at least one event is scheduled.
+        """
+        event_times = []
+        for event_time in sorted([event[0] for event in self._event_queue]):
+            if event_times == [] or event_time - event_times[-1] > self.time_tolerance:
+                event_times.append(event_time)
+        return event_times
+
+
+    def is_event_due(self, t):
+        next_event_time = self.get_next_event_time()
+        if next_event_time is None:
+            return False
+        return next_event_time <= t + self.time_tolerance
+
+
+    def process_due_events(self, t):
+        """
+        Activates or deactivates every perturbation with an event at or before time t. All events at the same instant
+        are handled as a single batch, so the return value indicates whether the admittance matrix needs to be
+        recomputed (at most once) after the whole batch has been applied.
+        """
+        admittance_matrix_recompute_required = False
+
+        while self.is_event_due(t) is True:
+            event_time, event_type, _, perturbation = heappop(self._event_queue)
+            if event_time < t - self.time_tolerance:
+                debug('Perturbation %i event at %f seconds processed late at %f seconds' %
+                      (perturbation.get_id(), event_time, t))
+
+            if event_type == self._ACTIVATE:
+                if perturbation.active is True:
+                    continue
+                perturbation.activate(t)
+            else:
+                if perturbation.active is False:
+                    continue
+                perturbation.deactivate(t)
+
+            if perturbation.admittance_matrix_recompute_required() is True:
+                admittance_matrix_recompute_required = True
+
+        return admittance_matrix_recompute_required
@@ -0,0 +1,228 @@
+from logging import debug
+from math import ceil
+
+from numpy import array, empty
+
+
+class RingBuffer(object):
+    """
+    Fixed-capacity first-in first-out queue of time-stamped vectors backed by preallocated arrays, so pushing and
+    popping samples never allocates.
+    """
+
+    def __init__(self, capacity, width):
+        self.capacity = capacity
+        self.times = empty(capacity)
+        self.values = empty((capacity, width))
+        self.clear()
+
+
+    def __len__(self):
+        return self.num_entries
+
+
+    def clear(self):
+        self.head = 0
+        self.num_entries = 0
+
+
+    def push(self, t, values):
+        if self.num_entries == self.capacity:
+            raise OverflowError('ring buffer with capacity %i is full' % self.capacity)
+        i = (self.head + self.num_entries) % self.capacity
+        self.times[i] = t
+        self.values[i, :] = values
+        self.num_entries += 1
+
+
+    def get_oldest_time(self):
+        if self.num_entries == 0:
+            return None
+        return self.times[self.head]
+
+
+    def pop(self):
+        """
+        Returns the oldest entry, the values are a view that stays valid until the slot is pushed to again.
+        """
+        if self.num_entries == 0:
+            raise IndexError('pop from an empty ring buffer')
+        i = self.head
+        self.head = (self.head + 1) % self.capacity
+        self.num_entries -= 1
+        return self.times[i], self.values[i]
+
+
+class SampledDataController(object):
+    """
+    Base class for controllers that run at a fixed sample period. Measurements taken at the sample instants
+    t_k = sample_offset + k*sample_period reach the controller after measurement_latency seconds, when compute is
+    invoked once with them, and the resulting outputs are applied to the network actuation_latency seconds later.
+    Outputs are held constant until the next set of outputs is applied.
+
+    Subclasses implement measure(network), returning num_measurements values, compute(t, measurements), returning
+    num_outputs values, and actuate(network, outputs).
+    """
+
+    def __init__(self, sample_period, num_measurements, num_outputs, measurement_latency=0., actuation_latency=0.,
+                 sample_offset=0.):
+        if sample_period <= 0:
+            raise ValueError('sample period must be positive')
+        if measurement_latency < 0 or actuation_latency < 0:
+            raise ValueError('latencies cannot be negative')
+
+        self.sample_period = sample_period
+        self.num_measurements = num_measurements
+        self.num_outputs = num_outputs
+        self.measurement_latency = measurement_latency
+        self.actuation_latency = actuation_latency
+        self.sample_offset = sample_offset
+
+
+    def get_measurement_buffer_capacity(self):
+        return int(ceil(float(self.measurement_latency)/self.sample_period)) + 1
+
+
+    def get_output_buffer_capacity(self):
+        return int(ceil(float(self.actuation_latency)/self.sample_period)) + 1
+
+
+    def initialize(self, network):
+        pass
+
+
+    def measure(self, network):
+        raise NotImplementedError('sampled-data controllers must implement measure')
+
+
+    def compute(self, t, measurements):
+        raise NotImplementedError('sampled-data controllers must implement compute')
+
+
+    def actuate(self, network, outputs):
+        raise NotImplementedError('sampled-data controllers must implement actuate')
+
+
+class ProportionalFrequencyController(SampledDataController):
+    """
+    In-process stand-in for a distributed controller: adjusts the real power setpoints of the dynamic models at
+    bus_ids in proportion to their measured angular velocity deviation from the reference, i.e.,
+    P_i = P_i,0 - gain*(w_i - reference_velocity).
+    """
+
+    def __init__(self, bus_ids, gain, sample_period, reference_velocity=0., measurement_latency=0.,
+                 actuation_latency=0., sample_offset=0.):
+        SampledDataController.__init__(self, sample_period, len(bus_ids), len(bus_ids),
+                                       measurement_latency=measurement_latency, actuation_latency=actuation_latency,
+                                       sample_offset=sample_offset)
+        self.bus_ids = bus_ids
+        self.gain = gain
+        self.reference_velocity = reference_velocity
+        self.num_invocations = 0
+
+
+    def initialize(self, network):
+        self.buses = [network.get_bus_by_id(bus_id) for bus_id in self.bus_ids]
+        self.nominal_setpoints = array([bus.get_dynamic_model_real_power_setpoint() for bus in self.buses], dtype=float)
+        self.num_invocations = 0
+
+
+    def measure(self, network):
+        return array([bus.get_current_dynamic_angular_velocity() for bus in self.buses], dtype=float)
+
+
+    def compute(self, t, measurements):
+        self.num_invocations += 1
+        return self.nominal_setpoints - self.gain*(measurements - self.reference_velocity)
+
+
+    def actuate(self, network, outputs):
+        for bus, setpoint in zip(self.buses, outputs):
+            bus.change_dynamic_model_real_power_setpoint(setpoint)
+
+
+class ControllerScheduler(object):
+    """
+    Invokes sampled-data controllers at their own sample instants instead of at every integration step. It has the
+    initialize()/update(t, dt) interface SimulationRoutine expects of a controller. Events are handled in time order
+    at the first integration step at or after the instant they are due, so the integration time step should divide
+    the sample periods and latencies for exact timing.
+    """
+    # measurements, computations and actuations due at the same instant are handled in this order, so with zero
+    # latency a sample is measured, computed and applied within one step
+    _MEASURE = 0
+    _COMPUTE = 1
+    _ACTUATE = 2
+
+    def __init__(self, network, controllers, time_tolerance=1e-9):
+        if type(controllers) is not list:
+            controllers = [controllers]
+        for controller in controllers:
+            if isinstance(controller, SampledDataController) is False:
+                raise TypeError('controllers must be an instance of the SampledDataController class or a subclass thereof')
+
+        self.network = network
+        self.controllers = controllers
+        self.time_tolerance = time_tolerance
+
+
+    def initialize(self):
+        self.measurement_buffers = []
+        self.output_buffers = []
+        self.next_sample_times = []
+        for controller in self.controllers:
+            controller.initialize(self.network)
+            self.measurement_buffers.append(RingBuffer(controller.get_measurement_buffer_capacity(),
+                                                       controller.num_measurements))
+            self.output_buffers.append(RingBuffer(controller.get_output_buffer_capacity(), controller.num_outputs))
+            self.next_sample_times.append(controller.sample_offset)
+        self._sample_counts = [0]*len(self.controllers)
+
+
+    def _get_next_event(self, controller_index):
+        controller = self.controllers[controller_index]
+        events = [(self.next_sample_times[controller_index], self._MEASURE)]
+
+        measurement_time = self.measurement_buffers[controller_index].get_oldest_time()
+        if measurement_time is not None:
+            events.append((measurement_time + controller.measurement_latency, self._COMPUTE))
+
+        actuation_time = self.output_buffers[controller_index].get_oldest_time()
+        if actuation_time is not None:
+            events.append((actuation_time, self._ACTUATE))
+
+        return min(events)
+
+
+    def _handle_event(self, controller_index, event_time, event_type):
+        controller = self.controllers[controller_index]
+
+        if event_type == self._MEASURE:
+            self.measurement_buffers[controller_index].push(event_time, controller.measure(self.network))
+            self._sample_counts[controller_index] += 1
+            # computed from the sample count so sample instants do not drift with accumulated round-off
+            self.next_sample_times[controller_index] = controller.sample_offset + \
+                                                       self._sample_counts[controller_index]*controller.sample_period
+
+        elif event_type == self._COMPUTE:
+            _, measurements = self.measurement_buffers[controller_index].pop()
+            outputs = controller.compute(event_time, measurements)
+            self.output_buffers[controller_index].push(event_time + controller.actuation_latency, outputs)
+
+        else:
+            _, outputs = self.output_buffers[controller_index].pop()
+            controller.actuate(self.network, outputs)
+
+
+    def update(self, t, dt):
+        """
+        Handles every measurement, computation and actuation due at or before time t. Between updates the last
+        applied outputs stay in effect (zero-order hold).
+        """
+        for controller_index in range(0, len(self.controllers)):
+            event_time, event_type = self._get_next_event(controller_index)
+            while event_time <= t + self.time_tolerance:
+                if event_time < t - self.time_tolerance:
+                    debug('Controller %i event at %f seconds handled at %f seconds' % (controller_index, event_time, t))
+                self._handle_event(controller_index, event_time, event_type)
+                event_time, event_type = self._get_next_event(controller_index)
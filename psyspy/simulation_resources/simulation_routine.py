@@ -1,13 +1,18 @@
 from logging import debug, info, warning
-from math import ceil, pi
+from math import pi
 
-from numpy import empty, append, array, zeros
+from numpy import empty, append, array, load, zeros
 
 # from distconarch import Controller
+from ..helper_functions import save_arrays_atomically
+from channel_recorder import ChannelRecorder, RecordingSpec
+from frequency_estimation import estimate_frequencies
+from multirate_integrator import MultiRateIntegrator
 from numerical_methods import RungeKutta45, ForwardEuler
-from perturbations import Perturbation
-
-from IPython import embed
+from order_parameter_tracker import OrderParameterTracker
+from perturbations import Perturbation, PerturbationScheduler
+from sampled_data_control import ControllerScheduler, SampledDataController
+from steady_state_detector import SteadyStateDetector
 
 
 class SimulationRoutine(object):
@@ -19,11 +24,50 @@ class SimulationRoutine(object):
                  perturbations=None,
                  order_param_alg=None,
                  time_step=0.001,
-                 power_flow_tolerance=0.0001):
+                 power_flow_tolerance=0.0001,
+                 recording_spec=None,
+                 data_manager=None,
+                 chunk_size=1024,
+                 checkpoint_path=None,
+                 checkpoint_interval=None,
+                 steady_state_detector=None,
+                 order_parameter_tracker=None,
+                 multirate_integrator=None):
         
         self.network = power_network
         self.order_param_alg = order_param_alg
 
+        if order_parameter_tracker is not None and isinstance(order_parameter_tracker, OrderParameterTracker) is False:
+            raise TypeError('order parameter tracker must be an instance of the OrderParameterTracker class or a subclass thereof')
+        self.order_parameter_tracker = order_parameter_tracker
+
+        if recording_spec is not None and isinstance(recording_spec, RecordingSpec) is False:
+            raise TypeError('recording spec must be an instance of the RecordingSpec class or a subclass thereof')
+        # streaming results to disk goes through the recorder, so record everything by default if no spec was given
+        if data_manager is not None and recording_spec is None:
+            recording_spec = RecordingSpec()
+        self.recording_spec = recording_spec
+        self.data_manager = data_manager
+        self.chunk_size = chunk_size
+        self.recorder = None
+        # bus frequency estimates of the last run, by estimation method
+        self._bus_frequencies = {}
+
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_interval = checkpoint_interval
+        if checkpoint_interval is not None and checkpoint_path is None:
+            raise ValueError('a checkpoint path is required to save checkpoints periodically')
+
+        if steady_state_detector is not None and isinstance(steady_state_detector, SteadyStateDetector) is False:
+            raise TypeError('steady state detector must be an instance of the SteadyStateDetector class or a subclass thereof')
+        self.steady_state_detector = steady_state_detector
+        self.terminated_early = False
+
+        self.current_time = 0.
+        self._grid_index = 0
+        self._step_index = 0
+        self.is_initialized = False
+
         self.network.set_solver_tolerance(power_flow_tolerance)
         self.simulation_time = simulation_time
         self.time_step = time_step
@@ -33,13 +77,24 @@ class SimulationRoutine(object):
         
         self.numerical_method = RungeKutta45(time_step)
         # self.numerical_method = ForwardEuler(time_step)
+
+        if multirate_integrator is not None and isinstance(multirate_integrator, MultiRateIntegrator) is False:
+            raise TypeError('multirate integrator must be an instance of the MultiRateIntegrator class or a subclass thereof')
+        self.multirate_integrator = multirate_integrator
+        if multirate_integrator is not None:
+            _ = multirate_integrator.set_step_size(time_step)
         
         # if controller is not None and isinstance(controller, Controller) is False:
         #     raise TypeError('controller must be an instance of the Controller class or a subclass thereof')
         # else:
+        # sampled-data controllers are only invoked at their sample instants
+        if isinstance(controller, SampledDataController) is True or \
+           (type(controller) is list and len(controller) > 0 and isinstance(controller[0], SampledDataController) is True):
+            controller = ControllerScheduler(power_network, controller, time_tolerance=1e-6*time_step)
         self.controller = controller
         
         self.perturbations = [] 
+        self.perturbation_scheduler = PerturbationScheduler(time_tolerance=1e-6*time_step)
         if perturbations is not None:
             if type(perturbations) is not list:
                 perturbations = [perturbations]
@@ -62,42 +117,49 @@ class SimulationRoutine(object):
                     (perturbation.get_id()))
             return False
         
-        start_time_time_step_ratio = float(perturbation.start_time)/float(self.time_step)
-
-        if int(start_time_time_step_ratio) - start_time_time_step_ratio != 0.0:
-            debug('Perturbation %i does not occur at a time instant included in the simulation, ' + \
-                  'it will be activated immediately after the nearest time step, i.e., %f seconds late.' % 
-                  (system_change.get_change_id(), ceil(start_time_time_step_ratio)*self.time_step - model_change.start_time))
+        if self._is_off_grid_time(perturbation.start_time) is True:
+            debug('Perturbation %i does not occur at a time instant included in the simulation, ' % 
+                  (perturbation.get_id()) + 'the time step preceding it will be shortened to land on it exactly.')
         self.perturbations.append(perturbation)
+        self.perturbation_scheduler.schedule_perturbation(perturbation)
         return True
 
 
-    def check_perturbation_active(self, perturbation):
-        admittance_matrix_recompute_required = False
-        
-        t = self.current_time
-        dt = self.time_step
-        
-        if t >= perturbation.start_time and t < (perturbation.start_time + dt):
-            if perturbation.active is False:
-                perturbation.activate(t)
-                admittance_matrix_recompute_required = perturbation.admittance_matrix_recompute_required()
-        elif perturbation.end_time is not None and t >= perturbation.end_time and t < (perturbation.end_time + dt):
-            if perturbation.active is True:
-                perturbation.deactivate(t)
-                admittance_matrix_recompute_required = perturbation.admittance_matrix_recompute_required()
-
-        return admittance_matrix_recompute_required
+    def _is_off_grid_time(self, t):
+        time_step_ratio = float(t)/float(self.time_step)
+        return abs(round(time_step_ratio) - time_step_ratio)*self.time_step > self.perturbation_scheduler.time_tolerance
+
+
+    def _get_number_of_off_grid_event_times(self):
+        final_step_time = self.num_simulation_steps*self.time_step
+        return len([t for t in self.perturbation_scheduler.get_event_times()
+                    if t > self.current_time and t < final_step_time and self._is_off_grid_time(t) is True])
+
+
+    def _get_next_time(self, grid_index):
+        """
+        Returns the time the next integration step should end at along with the index of the time grid point it
+        belongs to. Steps are shortened to land exactly on any event that falls between two grid points.
+        """
+        tolerance = self.perturbation_scheduler.time_tolerance
+        next_grid_time = (grid_index + 1)*self.time_step
+        next_event_time = self.perturbation_scheduler.get_next_event_time()
+
+        if next_event_time is not None and \
+           next_event_time > self.current_time + tolerance and next_event_time < next_grid_time - tolerance:
+            return next_event_time, grid_index
+
+        return next_grid_time, grid_index + 1
             
     
+    def _is_on_grid(self):
+        # the grid index is that of the last grid point, steps ending on an event between grid points do not advance it
+        tolerance = self.perturbation_scheduler.time_tolerance
+        return abs(self.current_time - self._grid_index*self.time_step) <= tolerance
+
+
     def check_all_perturbations_active(self):
-        admittance_matrix_recompute_required = False
-        
-        for perturbation in self.perturbations:
-            if self.check_perturbation_active(perturbation) is True:
-                admittance_matrix_recompute_required = True
-        
-        return admittance_matrix_recompute_required
+        return self.perturbation_scheduler.process_due_events(self.current_time)
 
 
     def initialize_controller(self):
@@ -114,8 +176,22 @@ class SimulationRoutine(object):
             self.controller.update(t, dt)
             
             
-    def run_simulation(self):
-        self.current_time = 0.
+    def is_recording_full_history(self):
+        return self.recording_spec is None
+
+
+    def get_recorded_channel(self, quantity):
+        if self.recorder is None:
+            raise AttributeError('no recording spec was provided, histories are stored on the network objects')
+        return self.recorder.get_channel(quantity)
+
+
+    def initialize_simulation(self):
+        """
+        Computes the initial operating point and prepares the network and controller for dynamic simulation. The
+        result can be captured with get_checkpoint and restored into other simulations of the same network instead of
+        initializing each of them.
+        """
         n = self.network
         
         n.prepare_for_dynamic_simulation_initial_value_calculation()
@@ -126,45 +202,239 @@ class SimulationRoutine(object):
         n.prepare_for_dynamic_simulation()
         
         self.initialize_controller()
+
+        self.current_time = 0.
+        self._grid_index = 0
+        self._step_index = 0
+        self.is_initialized = True
+
+
+    def get_checkpoint(self):
+        checkpoint = self.network.get_state_checkpoint()
+        checkpoint['current_time'] = array(self.current_time)
+        checkpoint['grid_index'] = array(self._grid_index)
+        checkpoint['step_index'] = array(self._step_index)
+        checkpoint['perturbation_active'] = array([perturbation.active for perturbation in self.perturbations],
+                                                  dtype=bool)
+        return checkpoint
+
+
+    def restore_checkpoint(self, checkpoint):
+        """
+        Restores the network and simulation state from a checkpoint so that run_simulation(resume=True) continues
+        from the checkpoint time. Perturbations are matched by the order in which they were added.
+        """
+        perturbation_active = checkpoint['perturbation_active']
+        if perturbation_active.shape[0] != len(self.perturbations):
+            raise ValueError('checkpoint has %i perturbations, this simulation has %i' %
+                             (perturbation_active.shape[0], len(self.perturbations)))
+
+        self.network.restore_state_checkpoint(checkpoint)
+        self.current_time = float(checkpoint['current_time'])
+        self._grid_index = int(checkpoint['grid_index'])
+        self._step_index = int(checkpoint['step_index'])
+
+        self.perturbation_scheduler.clear()
+        for perturbation, was_active in zip(self.perturbations, perturbation_active):
+            if was_active and perturbation.active is False:
+                perturbation.activate(self.current_time)
+            elif not was_active and perturbation.active is True:
+                perturbation.deactivate(self.current_time)
+            self.perturbation_scheduler.schedule_perturbation(perturbation, earliest_time=self.current_time)
+
+        self.is_initialized = True
+
+
+    def save_checkpoint(self, path=None):
+        if path is None:
+            path = self.checkpoint_path
+        save_arrays_atomically(path, self.get_checkpoint())
+        debug('Saved checkpoint at t=%f to %s' % (self.current_time, path))
+
+
+    def load_checkpoint(self, path=None):
+        if path is None:
+            path = self.checkpoint_path
+        checkpoint_file = load(path)
+        try:
+            self.restore_checkpoint(dict(checkpoint_file.items()))
+        finally:
+            checkpoint_file.close()
+
+
+    def has_reached_steady_state(self, dt):
+        """
+        Updates the steady state detector, if any, with the step that just ended. The simulation can only be considered
+        settled once no perturbation events remain to be processed.
+        """
+        if self.steady_state_detector is None:
+            return False
+
+        settled = self.steady_state_detector.update(self.network, self.current_time, dt)
+        return settled is True and self.perturbation_scheduler.has_pending_events() is False
+
+
+    def get_bus_frequencies(self, method='backward', window_length=11, polyorder=2):
+        """
+        Returns a (samples x buses) array of bus frequencies aligned with the time vector, estimated after the run
+        from the recorded voltage angles (see estimate_frequencies). Buses whose model has a speed state use its
+        history directly instead. Results are cached per estimation method.
+        """
+        key = (method, window_length, polyorder)
+        try:
+            return self._bus_frequencies[key]
+        except KeyError:
+            pass
+
+        num_samples = self.time_vector.shape[0]
+        if self.is_recording_full_history() is True:
+            buses = self.network.buses
+            # angle histories start with the initial power flow solution, entry k is the angle at time_vector[k]
+            angles = array([bus.theta[-(num_samples + 1):-1] for bus in buses]).T
+        else:
+            if self.recorder is None:
+                raise ValueError('cannot estimate bus frequencies before the simulation has been run')
+            if 'theta' not in self.recorder.bus_quantities:
+                raise ValueError('cannot estimate bus frequencies, the voltage angles (theta) were not recorded')
+            buses = self.recorder.buses
+            angles = self.get_recorded_channel('theta')
+
+        frequencies = estimate_frequencies(angles, self.time_vector, method=method, window_length=window_length,
+                                           polyorder=polyorder)
+
+        for i, bus in enumerate(buses):
+            speed = self._get_model_speed_history(bus, num_samples)
+            if speed is not None:
+                frequencies[:, i] = speed
+
+        self._bus_frequencies[key] = frequencies
+        return frequencies
+
+
+    def _get_model_speed_history(self, bus, num_samples):
+        if bus.has_dynamic_model() is False:
+            return None
+        try:
+            speed = bus.model.w
+        except AttributeError:
+            return None
+        # same window as the angle histories, which end with the state after the last step
+        if speed.shape[0] < num_samples + 1:
+            return None
+        return speed[-(num_samples + 1):-1]
+
+
+    def _assign_bus_frequencies(self):
+        # views into a single vectorized estimate rather than per-step appends to every bus
+        frequencies = self.get_bus_frequencies()
+        for i, bus in enumerate(self.network.buses):
+            bus.w = frequencies[:, i]
+
+
+    def run_simulation(self, resume=False, end_time=None):
+        """
+        Runs the simulation from t=0, or from the current (e.g., restored) state if resume is True. If a checkpoint
+        interval was given, a checkpoint is written every checkpoint_interval seconds of simulated time. If end_time is
+        given the simulation stops once it reaches that time, e.g., to propagate a single time slice.
+        """
+        if resume is False or self.is_initialized is False:
+            self.initialize_simulation()
+        resumed = self._step_index > 0
+
+        end_grid_index = self.num_simulation_steps
+        if end_time is not None:
+            end_grid_index = min(end_grid_index, int(round(float(end_time)/self.time_step)))
+
+        max_num_steps = end_grid_index - self._grid_index + self._get_number_of_off_grid_event_times()
+        record_history = self.is_recording_full_history()
+        if record_history is True:
+            self.time_vector = empty(max_num_steps)
+        n = self.network
         
-        for bus in n.buses:
-            bus.w = append(bus.w, 0.)
-            bus.w = append(bus.w, 0.)
+        self._bus_frequencies = {}
+        if record_history is False:
+            self.recorder = ChannelRecorder(n, self.recording_spec, self.time_step, max_num_steps,
+                                            data_manager=self.data_manager, chunk_size=self.chunk_size,
+                                            append_to_existing_channels=resumed)
 
         if self.order_param_alg is not None:
-            self.order_param = empty(1)
+            self.order_param = empty(max_num_steps)
+
+        if self.order_parameter_tracker is not None:
+            self.order_parameter_tracker.prepare(n, max_num_steps)
+
+        self.terminated_early = False
+        if self.steady_state_detector is not None:
+            self.steady_state_detector.reset()
+
+        if self.multirate_integrator is not None:
+            n.prepare_for_multirate_dynamic_state_update(self.multirate_integrator)
+
+        if self.checkpoint_interval is not None:
+            next_checkpoint_time = self.current_time + self.checkpoint_interval
+
+        k = 0
+        while self._grid_index < end_grid_index:
+            if self.checkpoint_interval is not None and self.current_time >= next_checkpoint_time:
+                self.save_checkpoint()
+                next_checkpoint_time += self.checkpoint_interval
 
-        # while self.current_time <= self.simulation_time:
-        for k in range(0, self.num_simulation_steps):
             if self.order_param_alg is not None:
                 order_param, _, _ = self.order_param_alg.compute_order_parameter()
-                # print order_param.shape
-                self.order_param = append(self.order_param, order_param[0])
-            # if self.current_time < 4.0:
-            #     self.time_step = 0.1
-            # else:
-            #     self.time_step = 0.001
+                self.order_param[k] = order_param[0]
+
+            on_grid = self._is_on_grid()
+            if self.order_parameter_tracker is not None and \
+               self.order_parameter_tracker.is_due(self._grid_index, on_grid) is True:
+                self.order_parameter_tracker.update(self._grid_index, self.current_time, n.get_current_voltage_angles(),
+                                                    on_grid)
             
-            # self.time_vector = append(self.time_vector, self.current_time)
-            self.time_vector[k] = self.current_time
+            if record_history is True:
+                self.time_vector[k] = self.current_time
+            else:
+                self.recorder.record(self._grid_index, self.current_time, on_grid)
+            events_due = self.perturbation_scheduler.is_event_due(self.current_time)
             admittance_matrix_recompute_required = self.check_all_perturbations_active()
             
-            self.update_controller(self.current_time, self.time_step)
+            next_time, self._grid_index = self._get_next_time(self._grid_index)
+            dt = next_time - self.current_time
+            self.numerical_method.set_step_size(dt)
+
+            self.update_controller(self.current_time, dt)
             
             n.prepare_for_dynamic_state_update()
 
-            n.update_dynamic_states(numerical_integration_method=self.numerical_method.get_updated_states)
+            if self.multirate_integrator is None:
+                n.update_dynamic_states(numerical_integration_method=self.numerical_method.get_updated_states)
+            elif abs(dt - self.time_step) > self.perturbation_scheduler.time_tolerance:
+                # steps shortened to land on an event are taken at a single rate, the rate groups then restart from
+                # the synchronized states
+                n.update_dynamic_states(numerical_integration_method=self.numerical_method.get_updated_states)
+                n.prepare_for_multirate_dynamic_state_update(self.multirate_integrator)
+            else:
+                if events_due is True:
+                    # slow groups must not finish a step that was started before the event
+                    n.prepare_for_multirate_dynamic_state_update(self.multirate_integrator)
+                n.update_dynamic_states_multirate(self.multirate_integrator)
             
-            n.update_algebraic_states(admittance_matrix_recompute_required=admittance_matrix_recompute_required)
+            n.update_algebraic_states(admittance_matrix_recompute_required=admittance_matrix_recompute_required,
+                                      append=record_history)
             
-            # if order_param is not False:
-            #     self.order_param = append(self.order_param, n.compute_order_parameter())
-            
-            if k > 1:
-            # if self.current_time > 0:
-                for bus in n.buses:
-                    theta_k = bus.theta[-1]
-                    theta_km1 = bus.theta[-2]
-                    bus.w = append(bus.w, (theta_k - theta_km1)/self.time_step)
-
-            self.current_time += self.time_step
+            self.current_time = next_time
+            self._step_index += 1
+            k += 1
+
+            if self.has_reached_steady_state(dt) is True:
+                self.terminated_early = True
+                info('Simulation reached steady state at t=%f, terminating early' % self.current_time)
+                break
+
+        if self.order_param_alg is not None:
+            self.order_param = self.order_param[0:k]
+
+        if record_history is True:
+            self.time_vector = self.time_vector[0:k]
+            self._assign_bus_frequencies()
+        else:
+            self.recorder.finalize()
+            self.time_vector = self.recorder.get_time_vector()
@@ -0,0 +1,152 @@
+from logging import debug
+from math import pi
+
+from numpy import abs as np_abs, argsort, array, conj, isfinite, iscomplexobj, imag, real
+from scipy.linalg import eig
+from scipy.sparse import csc_matrix, identity
+from scipy.sparse.linalg import LinearOperator, eigs, splu
+
+
+def _is_real(eigenvalue, tolerance=1e-8):
+    return bool(np_abs(imag(eigenvalue)) <= tolerance*(1. + np_abs(eigenvalue)))
+
+
+def _is_complex_conjugate(eigenvalue, other_eigenvalue, tolerance=1e-8):
+    return bool(np_abs(eigenvalue - conj(other_eigenvalue)) <= tolerance*(1. + np_abs(eigenvalue)))
+
+
+def _select_least_damped(eigenvalues, k):
+    """
+    Returns the indices of the k eigenvalues with the largest real part, sorted by decreasing real part. A complex
+    eigenvalue is always selected along with its conjugate, so one more than k may be returned.
+    """
+    selected = []
+    for i in argsort(-real(eigenvalues)).tolist():
+        if len(selected) >= k:
+            break
+        if i in selected:
+            continue
+        selected.append(i)
+        if _is_real(eigenvalues[i]) is False:
+            selected.extend([j for j in range(0, eigenvalues.shape[0]) if j not in selected and
+                             _is_complex_conjugate(eigenvalues[j], eigenvalues[i]) is True][0:1])
+    return selected
+
+
+class SmallSignalAnalysis(object):
+    """
+    Modal analysis of a power network linearized around its current operating point (e.g., after
+    SimulationRoutine.initialize_simulation). The least-damped modes are found with ARPACK in shift-invert mode
+    around one or more shifts, so only a sparse LU factorization of the state matrix (or descriptor pair) is needed
+    instead of its full eigendecomposition. Shifts on the imaginary axis near the expected mode frequencies, e.g.,
+    2j*pi*f, find oscillatory modes; the default shift of zero finds the slowest modes.
+    """
+
+    def __init__(self, network, kron_elimination=None, perturbation=1e-6):
+        self.network = network
+        self.A, self.E = network.get_state_matrix(kron_elimination=kron_elimination, perturbation=perturbation)
+        self.state_labels = [(bus_id, i) for bus_id, num_states in network.dynamic_state_bus_index_mapping
+                             for i in range(0, num_states)]
+        self.num_dynamic_states = len(self.state_labels)
+        self.eigenvalues = None
+
+
+    def _get_shifted_eigenpairs(self, A, E, sigma, k):
+        """
+        Eigenvalues of the pencil (A, E) nearest to sigma from the largest eigenvalues 1/(lambda - sigma) of
+        (A - sigma*E)^-1 E. Unlike ARPACK's own generalized mode this does not need E to be nonsingular, the infinite
+        eigenvalues of the descriptor system map to zero.
+        """
+        n = A.shape[0]
+        if E is None:
+            E = identity(n, format='csc')
+
+        if k >= n - 1:
+            # ARPACK needs k < n - 1, small problems are solved densely
+            eigenvalues, eigenvectors = eig(A.toarray(), E.toarray())
+            finite = isfinite(eigenvalues)
+            eigenvalues, eigenvectors = eigenvalues[finite], eigenvectors[:, finite]
+            nearest = argsort(np_abs(eigenvalues - sigma))[0:k]
+            return eigenvalues[nearest], eigenvectors[:, nearest]
+
+        shifted_lu = splu(csc_matrix(A - sigma*E, dtype=complex if iscomplexobj(sigma) else float))
+        operator = LinearOperator((n, n), matvec=lambda x: shifted_lu.solve(E.dot(x)), dtype=shifted_lu.U.dtype)
+
+        inverse_shifted_eigenvalues, eigenvectors = eigs(operator, k=k, which='LM')
+        return sigma + 1./inverse_shifted_eigenvalues, eigenvectors
+
+
+    def compute_modes(self, k=6, shifts=(0.,)):
+        """
+        Computes the k least-damped modes among those found near the shifts and returns their eigenvalues, sorted by
+        decreasing real part. Oscillatory modes are returned as complex-conjugate pairs, so there may be k + 1 of them.
+        Right eigenvectors (restricted to the dynamic states) are kept in right_eigenvectors.
+        """
+        eigenvalues = []
+        eigenvectors = []
+        for sigma in shifts:
+            shifted_eigenvalues, shifted_eigenvectors = self._get_shifted_eigenpairs(self.A, self.E, sigma, k)
+            for i, eigenvalue in enumerate(shifted_eigenvalues):
+                # the same mode can be found near several shifts
+                if any([np_abs(eigenvalue - found) <= 1e-8*(1. + np_abs(found)) for found in eigenvalues]):
+                    continue
+                eigenvalues.append(eigenvalue)
+                eigenvectors.append(shifted_eigenvectors[0:self.num_dynamic_states, i])
+            debug('Found %i modes near shift %s' % (shifted_eigenvalues.shape[0], sigma))
+
+        # the system is real, the conjugate of a mode found near a complex shift is a mode as well
+        for i in range(0, len(eigenvalues)):
+            if _is_real(eigenvalues[i]) is False and \
+               any([_is_complex_conjugate(found, eigenvalues[i]) for found in eigenvalues]) is False:
+                eigenvalues.append(conj(eigenvalues[i]))
+                eigenvectors.append(conj(eigenvectors[i]))
+
+        order = _select_least_damped(array(eigenvalues), k)
+        self.eigenvalues = array(eigenvalues)[order]
+        self.right_eigenvectors = array([eigenvectors[i] for i in order]).T
+        self.left_eigenvectors = None
+        return self.eigenvalues
+
+
+    def _compute_left_eigenvectors(self):
+        """
+        The left eigenvector of each mode is the right eigenvector of the transposed problem, found with a single
+        shift at the mode's eigenvalue.
+        """
+        A_transposed = self.A.T.tocsc()
+        E_transposed = None if self.E is None else self.E.T.tocsc()
+        left_eigenvectors = []
+        for eigenvalue in self.eigenvalues:
+            # A - sigma*E is singular at the eigenvalue itself
+            sigma = eigenvalue + 1e-8*(1. + np_abs(eigenvalue))
+            left_eigenvalues, vectors = self._get_shifted_eigenpairs(A_transposed, E_transposed, sigma, 1)
+            left_eigenvectors.append(vectors[0:self.num_dynamic_states, 0])
+        self.left_eigenvectors = array(left_eigenvectors).T
+
+
+    def _check_modes_computed(self):
+        if self.eigenvalues is None:
+            raise AttributeError('modes have not been computed, call compute_modes first')
+
+
+    def get_damping_ratios(self):
+        self._check_modes_computed()
+        return -real(self.eigenvalues)/np_abs(self.eigenvalues)
+
+
+    def get_frequencies(self):
+        self._check_modes_computed()
+        return np_abs(imag(self.eigenvalues))/(2*pi)
+
+
+    def get_participation_factors(self):
+        """
+        Returns a (dynamic states x modes) array of participation factors |v_ki*w_ki|, normalized so the factors of
+        each mode sum to one. Rows are labelled by state_labels as (bus id, index of the state in the bus's model).
+        """
+        self._check_modes_computed()
+        if self.left_eigenvectors is None:
+            self._compute_left_eigenvectors()
+
+        participation = np_abs(self.right_eigenvectors*self.left_eigenvectors)
+        return participation/participation.sum(axis=0)
@@ -0,0 +1,78 @@
+from logging import debug
+
+from numpy import abs as np_abs
+
+
+class SteadyStateDetector(object):
+    """
+    Decides when a dynamic simulation has settled. After every step the largest absolute dynamic state derivative
+    and/or bus frequency is compared against its tolerance; the system is considered settled once every step in the
+    trailing window_time seconds was within tolerance. Only a counter of consecutive settled time is kept, so an update
+    costs O(states) and needs no history.
+    """
+
+    def __init__(self, window_time, frequency_tolerance=None, derivative_tolerance=None, minimum_time=0.):
+        if frequency_tolerance is None and derivative_tolerance is None:
+            raise ValueError('at least one of frequency_tolerance and derivative_tolerance must be specified')
+
+        self.window_time = window_time
+        self.frequency_tolerance = frequency_tolerance
+        self.derivative_tolerance = derivative_tolerance
+        self.minimum_time = minimum_time
+        self.reset()
+
+
+    def reset(self):
+        self.settled_time = 0.
+        self._previous_angles = None
+        self._previous_time = None
+
+
+    def _get_largest_frequency_deviation(self, network, t):
+        angles = network.get_current_voltage_angles()
+        if self._previous_angles is None or t == self._previous_time:
+            largest_frequency_deviation = None
+        else:
+            largest_frequency_deviation = np_abs((angles - self._previous_angles)/(t - self._previous_time)).max()
+        self._previous_angles = angles
+        self._previous_time = t
+        return largest_frequency_deviation
+
+
+    def _get_largest_derivative(self, network):
+        if len(network.get_buses_with_dynamic_models()) == 0:
+            return 0.
+        return np_abs(network.get_dynamic_state_time_derivative_array()).max()
+
+
+    def is_within_tolerance(self, network, t):
+        within_tolerance = True
+
+        if self.frequency_tolerance is not None:
+            largest_frequency_deviation = self._get_largest_frequency_deviation(network, t)
+            if largest_frequency_deviation is None or largest_frequency_deviation > self.frequency_tolerance:
+                within_tolerance = False
+
+        if self.derivative_tolerance is not None and within_tolerance is True:
+            if self._get_largest_derivative(network) > self.derivative_tolerance:
+                within_tolerance = False
+
+        return within_tolerance
+
+
+    def update(self, network, t, dt):
+        """
+        Called once per integration step with the time the step ended at and its length, returns True once the
+        network has been settled for at least window_time seconds.
+        """
+        if self.is_within_tolerance(network, t) is True:
+            self.settled_time += dt
+        else:
+            self.settled_time = 0.
+
+        return self.is_settled(t)
+
+
+    def is_settled(self, t):
+        # allow for round-off in the accumulated step lengths
+        return t >= self.minimum_time and self.settled_time >= self.window_time*(1. - 1e-9)
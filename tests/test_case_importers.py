@@ -0,0 +1,134 @@
+import unittest
+
+from os.path import join as path_join
+from shutil import rmtree
+from tempfile import mkdtemp
+from time import time
+
+from numpy import genfromtxt
+from numpy.testing import assert_array_almost_equal
+
+from psyspy import Bus, PQBus, PVBus
+from psyspy.import_resources import load_matpower_case, load_psse_raw_case, read_matpower_case, read_psse_raw_case
+
+# size of the synthetic case and the time it must load in, the size of the largest public transmission cases
+NUM_LARGE_CASE_BUSES = 70000
+MAX_LARGE_CASE_LOAD_SECONDS = 30.
+
+
+def write_synthetic_matpower_case(path, num_buses):
+    """
+    Writes a MATPOWER case of a meshed network, buses in a chain with every tenth bus also connected to the bus
+    ten further on, a generator every hundredth bus and a load at every other bus.
+    """
+    with open(path, 'w') as case_file:
+        case_file.write('function mpc = synthetic\nmpc.version = \'2\';\nmpc.baseMVA = 100;\nmpc.bus = [\n')
+        case_file.writelines('\t%i\t%i\t%g\t%g\t0\t0\t1\t1\t0\t230\t1\t1.1\t0.9;\n' % (
+                             i, 3 if i == 1 else (2 if i % 100 == 1 else 1), 10.*(i % 2), 3.*(i % 2))
+                             for i in xrange(1, num_buses + 1))
+        case_file.write('];\nmpc.gen = [\n')
+        case_file.writelines('\t%i\t500\t0\t300\t-300\t1.02\t100\t1\t600\t0;\n' % i
+                             for i in xrange(1, num_buses + 1, 100))
+        case_file.write('];\nmpc.branch = [\n')
+        branches = [(i, i + 1) for i in xrange(1, num_buses)] + [(i, i + 10) for i in xrange(1, num_buses - 9, 10)]
+        case_file.writelines('\t%i\t%i\t0.001\t0.01\t0.002\t250\t250\t250\t0\t0\t1\t-360\t360;\n' % branch
+                             for branch in branches)
+        case_file.write('];\n')
+    return len(branches)
+
+
+class TestCaseImporters(unittest.TestCase):
+
+    def assert_wecc_9_bus_network(self, n):
+        expected_G = genfromtxt('resources/wecc9_conductance_matrix.csv', delimiter=',')
+        expected_B = genfromtxt('resources/wecc9_susceptance_matrix.csv', delimiter=',')
+
+        self.assertEqual(n.get_number_of_buses(), 9)
+        self.assertEqual(n.get_number_of_power_lines(), 9)
+
+        G, B = n.generate_admittance_matrix(optimal_ordering=False)
+        assert_array_almost_equal(G.toarray(), expected_G)
+        assert_array_almost_equal(B.toarray(), expected_B)
+
+        buses = n.buses
+        self.assertEqual(n.get_slack_bus_id(), buses[0].get_id())
+        for bus, expected_type in zip(buses, [PVBus, PVBus, PVBus, Bus, PQBus, PQBus, Bus, PQBus, Bus]):
+            self.assertEqual(type(bus), expected_type)
+        for bus, expected_voltage in zip(buses[0:3], [1.04, 1.025, 1.025]):
+            self.assertAlmostEqual(bus.get_current_voltage_magnitude(), expected_voltage)
+
+
+    def assert_wecc_9_bus_power_flow(self, n):
+        # generation is in per unit like the loads, so the power flow gives the textbook solution
+        expected_final_states = genfromtxt('resources/wecc9_final_states.csv', delimiter=',')
+        assert_array_almost_equal(n.solve_power_flow(optimal_ordering=False), expected_final_states, 6)
+        self.assertAlmostEqual(n.buses[1].get_current_voltage_angle(), 0.162, 3)
+
+
+    def test_read_matpower_case(self):
+        case = read_matpower_case('resources/wecc9.m')
+
+        self.assertEqual(case.base_power, 100.)
+        self.assertEqual([bus[0] for bus in case.buses], range(1, 10))
+        self.assertEqual(case.buses[4][1:4], [1, 125., 50.])
+        self.assertEqual(len(case.generators), 4)
+        self.assertFalse(case.generators[3][4])
+        self.assertEqual(len(case.branches), 10)
+        self.assertFalse(case.branches[9][5])
+
+
+    def test_read_psse_raw_case(self):
+        case = read_psse_raw_case('resources/wecc9.raw')
+
+        self.assertEqual(case.base_power, 100.)
+        self.assertEqual([bus[0] for bus in case.buses], range(1, 10))
+        self.assertEqual(case.buses[4][8], 'LOAD A, 5')
+        # two loads at bus 5, the second load at bus 8 is out of service
+        assert_array_almost_equal([bus[2:4] for bus in case.buses[4:8]], [[125., 50.], [90., 30.], [0., 0.], [100., 35.]])
+        self.assertEqual([generator[1] for generator in case.generators], [71.6, 163., 85.])
+        # the transformer from bus 3 to bus 9 has its impedance on a 200 MVA winding base
+        self.assertEqual(len(case.branches), 10)
+        self.assertEqual(case.branches[4][0:2], (7, 8))
+        self.assertAlmostEqual(case.branches[8][3], 0.0586)
+
+
+    def test_load_matpower_case(self):
+        n = load_matpower_case('resources/wecc9.m')
+        self.assert_wecc_9_bus_network(n)
+        self.assertEqual(n.buses[0].name, 1)
+        self.assert_wecc_9_bus_power_flow(load_matpower_case('resources/wecc9.m'))
+
+
+    def test_load_psse_raw_case(self):
+        n = load_psse_raw_case('resources/wecc9.raw')
+        self.assert_wecc_9_bus_network(n)
+        self.assertEqual(n.buses[0].name, 'GEN 1')
+        self.assertEqual(type(n.get_bus_by_name('LOAD B')), PQBus)
+        self.assert_wecc_9_bus_power_flow(load_psse_raw_case('resources/wecc9.raw'))
+
+
+
+    def test_load_large_matpower_case(self):
+        directory = mkdtemp()
+        try:
+            path = path_join(directory, 'synthetic.m')
+            num_branches = write_synthetic_matpower_case(path, NUM_LARGE_CASE_BUSES)
+
+            start_time = time()
+            n = load_matpower_case(path)
+            self.assertLess(time() - start_time, MAX_LARGE_CASE_LOAD_SECONDS)
+        finally:
+            rmtree(directory)
+
+        self.assertEqual(n.get_number_of_buses(), NUM_LARGE_CASE_BUSES)
+        self.assertEqual(n.get_number_of_power_lines(), num_branches)
+        self.assertEqual(n.get_slack_bus_id(), n.buses[0].get_id())
+        self.assertEqual(type(n.buses[100]), PVBus)
+        self.assertEqual(type(n.buses[102]), PQBus)
+        G, B = n.get_admittance_matrix()
+        self.assertEqual(G.shape, (NUM_LARGE_CASE_BUSES, NUM_LARGE_CASE_BUSES))
+        self.assertEqual(B.nnz, NUM_LARGE_CASE_BUSES + 2*num_branches)
+
+
+if __name__ == '__main__':
+    unittest.main()
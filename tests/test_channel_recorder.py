@@ -0,0 +1,121 @@
+import unittest
+
+from shutil import rmtree
+
+from numpy import arange, array
+from numpy.testing import assert_array_almost_equal
+
+from psyspy.model_components import PSys
+from psyspy.plot_resources import DataManager
+from psyspy.simulation_resources import ChannelRecorder, RecordingSpec, SimulationRoutine
+
+from test_psys_from_arrays import create_wecc_9_bus_tables
+from test_simulation_routine import NaturalFrequencyChange, create_oscillator_ring
+
+
+class TestChannelRecorder(unittest.TestCase):
+
+    def test_record_selected_elements(self):
+        network = PSys.from_arrays(*create_wecc_9_bus_tables())
+        bus_ids = [network.buses[k].get_id() for k in [7, 2, 4]]
+        power_line_ids = [network.power_lines[k].get_id() for k in [5, 0]]
+        recorder = ChannelRecorder(network, RecordingSpec(quantities=('V', 'theta', 'Pab', 'Qab'), bus_ids=bus_ids,
+                                                          power_line_ids=power_line_ids), 0.1, 3)
+
+        for step_index in range(0, 3):
+            for k, bus in enumerate(network.buses):
+                bus.update_voltage_polar((1. - 0.01*k*step_index, -0.1*k*step_index), replace=True)
+            for k, power_line in enumerate(network.power_lines):
+                power_line.append_complex_power(0.1*k + step_index, -0.1*k)
+            recorder.record(step_index, 0.1*step_index)
+        recorder.finalize()
+
+        self.assertEqual(recorder.get_bus_ids(), bus_ids)
+        self.assertEqual(recorder.get_power_line_ids(), power_line_ids)
+        steps = array([[0.], [1.], [2.]])
+        assert_array_almost_equal(recorder.get_channel('V'), 1. - 0.01*steps*[7, 2, 4])
+        assert_array_almost_equal(recorder.get_channel('theta'), -0.1*steps*[7, 2, 4])
+        assert_array_almost_equal(recorder.get_channel('Pab'), [0.5, 0.] + steps)
+        assert_array_almost_equal(recorder.get_channel('Qab'), [[-0.5, 0.]]*3)
+
+        self.assertRaises(ValueError, ChannelRecorder, network, RecordingSpec(bus_ids=[-1]), 0.1, 3)
+
+
+    def test_recorded_simulation(self):
+        network = create_oscillator_ring()
+        full_simulation = SimulationRoutine(network, 0.2, time_step=0.01)
+        full_simulation.run_simulation()
+        angles = array([bus.theta[0:-1] for bus in network.buses]).T
+
+        network = create_oscillator_ring()
+        bus_ids = [network.buses[3].get_id(), network.buses[1].get_id()]
+        simulation = SimulationRoutine(network, 0.2, time_step=0.01,
+                                       recording_spec=RecordingSpec(quantities=('theta', 'w'), bus_ids=bus_ids,
+                                                                    decimation=2))
+        simulation.run_simulation()
+
+        assert_array_almost_equal(simulation.time_vector, full_simulation.time_vector[0::2])
+        assert_array_almost_equal(simulation.get_recorded_channel('theta'), angles[0::2, [3, 1]])
+        # backward differences over every step, not only the recorded ones
+        assert_array_almost_equal(simulation.get_recorded_channel('w')[1:],
+                                  ((angles[1:] - angles[0:-1])/0.01)[1::2, [3, 1]])
+
+
+    def test_decimation_with_off_grid_events(self):
+        network = create_oscillator_ring()
+        full_simulation = SimulationRoutine(network, 0.2, time_step=0.01,
+                                            perturbations=[NaturalFrequencyChange(0.023, network, 2, 0.)])
+        full_simulation.run_simulation()
+        angles = array([bus.theta[0:-1] for bus in network.buses]).T
+        # the step ending at the event between two grid points is the fourth one
+        grid_steps = range(0, 3) + range(4, 22)
+
+        for decimation in [1, 2]:
+            network = create_oscillator_ring()
+            simulation = SimulationRoutine(network, 0.2, time_step=0.01,
+                                           perturbations=[NaturalFrequencyChange(0.023, network, 2, 0.)],
+                                           recording_spec=RecordingSpec(quantities=('theta',), decimation=decimation))
+            simulation.run_simulation()
+
+            if decimation == 1:
+                recorded_steps = range(0, 22)
+            else:
+                # the records stay on every other point of the time grid rather than every other step
+                recorded_steps = grid_steps[0::2]
+                assert_array_almost_equal(simulation.time_vector, 0.02*arange(0, 11), 12)
+            assert_array_almost_equal(simulation.time_vector, full_simulation.time_vector[recorded_steps], 12)
+            assert_array_almost_equal(simulation.get_recorded_channel('theta'), angles[recorded_steps])
+
+
+    def test_streamed_simulation(self):
+        recording_spec = RecordingSpec(quantities=('theta', 'w'), decimation=3)
+        simulation = SimulationRoutine(create_oscillator_ring(), 0.5, time_step=0.01, recording_spec=recording_spec)
+        simulation.run_simulation()
+
+        data_manager = DataManager(temporary=True)
+        try:
+            network = create_oscillator_ring()
+            streamed_simulation = SimulationRoutine(network, 0.5, time_step=0.01, recording_spec=recording_spec,
+                                                    data_manager=data_manager, chunk_size=4)
+            streamed_simulation.run_simulation()
+            # only one chunk is held in memory, the 17 records are on disk
+            self.assertEqual(streamed_simulation.recorder.time.shape[0], 4)
+            self.assertEqual(streamed_simulation.time_vector.shape[0], 17)
+
+            # the results can be read back from another data manager, e.g., after the run crashed
+            reopened_data_manager = DataManager(directory=data_manager.save_dir)
+            self.assertTrue(reopened_data_manager.is_complete())
+            assert_array_almost_equal(reopened_data_manager.get_time_vector(), simulation.time_vector)
+            for quantity in ['theta', 'w']:
+                assert_array_almost_equal(reopened_data_manager.get_channel(quantity),
+                                          simulation.get_recorded_channel(quantity))
+            bus_ids = [bus.get_id() for bus in network.buses]
+            self.assertEqual(reopened_data_manager.get_metadata('bus_ids'), bus_ids)
+            assert_array_almost_equal(reopened_data_manager.query('theta', start_time=0.1, element_ids=bus_ids[2:3]),
+                                      simulation.get_recorded_channel('theta')[4:, 2:3])
+        finally:
+            rmtree(data_manager.save_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+
+from shutil import rmtree
+
+from numpy import arange, array, isnan, may_share_memory
+from numpy.testing import assert_array_almost_equal, assert_array_equal
+
+from psyspy.plot_resources import DataManager
+
+
+class TestDataManager(unittest.TestCase):
+
+    def setUp(self):
+        self.data_manager = DataManager(temporary=True)
+        self.t = 0.01*arange(1000)
+        self.V = array([1 + 0.01*self.t*k for k in range(1, 5)]).T
+        self.data_manager.set_metadata('bus_ids', [10, 11, 12, 13])
+        self.data_manager.create_channel('time')
+        self.data_manager.create_channel('V', num_columns=4, element_type='bus')
+        for k in range(0, 1000, 300):
+            self.data_manager.flush_chunk({'time': self.t[k:k + 300], 'V': self.V[k:k + 300]})
+
+
+    def tearDown(self):
+        rmtree(self.data_manager.save_dir)
+
+
+    def test_query(self):
+        V = self.data_manager.query('V', start_time=2., end_time=3.)
+        assert_array_equal(V, self.V[200:301])
+        self.assertTrue(may_share_memory(V, self.data_manager.get_channel('V')))
+
+        # adjacent buses are a view, others are read into a new array
+        V = self.data_manager.query('V', start_time=2., element_ids=[11, 12])
+        assert_array_equal(V, self.V[200:, 1:3])
+        self.assertTrue(may_share_memory(V, self.data_manager.get_channel('V')))
+        assert_array_equal(self.data_manager.query('V', end_time=0.5, element_ids=[13, 10]), self.V[0:51, [3, 0]])
+
+        self.assertEqual(self.data_manager.query('V', start_time=20.).shape, (0, 4))
+        self.assertRaises(KeyError, self.data_manager.query, 'V', element_ids=[14])
+        self.assertRaises(ValueError, self.data_manager.query, 'time', element_ids=[10])
+
+
+    def test_reduce(self):
+        reductions = self.data_manager.reduce('V', start_time=1., element_ids=[12, 10], chunk_size=64)
+        assert_array_almost_equal(reductions['min'], self.V[100:, [2, 0]].min(axis=0))
+        assert_array_almost_equal(reductions['max'], self.V[100:, [2, 0]].max(axis=0))
+        assert_array_almost_equal(reductions['mean'], self.V[100:, [2, 0]].mean(axis=0))
+
+        reductions = self.data_manager.reduce('V', window=2.5, chunk_size=64)
+        assert_array_almost_equal(reductions['window_start_times'], [0., 2.5, 5., 7.5])
+        self.assertEqual(reductions['mean'].shape, (4, 4))
+        for k, (start_row, end_row) in enumerate([(0, 250), (250, 500), (500, 750), (750, 1000)]):
+            assert_array_almost_equal(reductions['min'][k], self.V[start_row:end_row].min(axis=0))
+            assert_array_almost_equal(reductions['max'][k], self.V[start_row:end_row].max(axis=0))
+            assert_array_almost_equal(reductions['mean'][k], self.V[start_row:end_row].mean(axis=0))
+
+        reductions = self.data_manager.reduce('time', start_time=20.)
+        self.assertTrue(isnan(reductions['mean']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+
+from numpy import array, hstack, isnan, ones, roll, sin, zeros
+from numpy.testing import assert_array_almost_equal
+
+from psyspy.simulation_resources import RungeKutta45, SimulationRoutine, VectorizedEnsembleIntegrator
+
+from test_simulation_routine import COUPLING, INITIAL_ANGLES, NATURAL_FREQUENCIES, OscillatorRing
+
+RING_COUPLING_MATRIX = COUPLING*array([[0., 1., 0., 1.], [1., 0., 1., 0.], [0., 1., 0., 1.], [1., 0., 1., 0.]])
+
+
+def get_member_natural_frequencies(member_index):
+    return array(NATURAL_FREQUENCIES)*(1. + 0.5*member_index)
+
+
+def get_member_initial_angles(member_index):
+    return array(INITIAL_ANGLES) - 0.1*member_index
+
+
+def swing_derivative(current_states, P, D, M):
+    theta, w = current_states[0:4], current_states[4:8]
+    coupling = COUPLING*(sin(theta - roll(theta, 1)) + sin(theta - roll(theta, -1)))
+    return hstack((w, (P - D*w - coupling)/M))
+
+
+class TestVectorizedEnsembleIntegrator(unittest.TestCase):
+
+    def test_first_order_matches_simulation(self):
+        num_members = 3
+        integrator = VectorizedEnsembleIntegrator(RING_COUPLING_MATRIX, num_members,
+                                                  array([get_member_natural_frequencies(k) for k in range(0, 3)]),
+                                                  time_step=0.01)
+        integrator.set_initial_conditions(array([get_member_initial_angles(k) for k in range(0, 3)]))
+        # run_simulation steps once past the simulation time, to 0.51
+        theta, w = integrator.run(0.51)
+
+        for member_index in range(0, num_members):
+            network = OscillatorRing(get_member_natural_frequencies(member_index),
+                                     get_member_initial_angles(member_index), coupling=COUPLING)
+            simulation = SimulationRoutine(network, 0.5, time_step=0.01)
+            simulation.run_simulation()
+            assert_array_almost_equal(theta[member_index], network.get_current_dynamic_states(), 12)
+            assert_array_almost_equal(w[member_index], network.get_dynamic_state_time_derivative_array(), 12)
+
+
+    def test_second_order_matches_scalar_integration(self):
+        num_members = 2
+        P = array([get_member_natural_frequencies(k) for k in range(0, num_members)])
+        D = array([0.5, 1., 1.5, 2.])
+        M = array([[1., 2., 1., 2.], [2., 1., 2., 1.]])
+        integrator = VectorizedEnsembleIntegrator(RING_COUPLING_MATRIX, num_members, P, damping=D, inertia=M,
+                                                  time_step=0.01)
+        integrator.set_initial_conditions(array([get_member_initial_angles(k) for k in range(0, 2)]), w0=0.1)
+        theta, w = integrator.run(0.5)
+
+        numerical_method = RungeKutta45(0.01)
+        for member_index in range(0, num_members):
+            states = hstack((get_member_initial_angles(member_index), 0.1*ones(4)))
+            for _ in range(0, 50):
+                states = numerical_method.get_updated_states(
+                    states, lambda current_states: swing_derivative(current_states, P[member_index], D, M[member_index]))
+            assert_array_almost_equal(theta[member_index], states[0:4], 12)
+            assert_array_almost_equal(w[member_index], states[4:8], 12)
+
+
+    def test_diverged_members_are_masked(self):
+        integrator = VectorizedEnsembleIntegrator(RING_COUPLING_MATRIX, 2, array([zeros(4), 100.*ones(4)]),
+                                                  inertia=1., time_step=0.01, divergence_threshold=5.)
+        integrator.set_initial_conditions(zeros(4))
+        theta, w = integrator.run(0.5)
+
+        self.assertEqual(integrator.active_members.tolist(), [True, False])
+        self.assertEqual(integrator.get_synchronized_members().tolist(), [True, False])
+        self.assertFalse(isnan(theta).any())
+        self.assertAlmostEqual(integrator.current_time, 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+
+from numpy import isnan
+from numpy.testing import assert_array_almost_equal, assert_array_equal
+
+from psyspy.simulation_resources import EnsembleRunner, SimulationRoutine
+
+from test_simulation_routine import INITIAL_ANGLES, NATURAL_FREQUENCIES, OscillatorRing
+
+SIMULATION_TIME = 0.1
+NUM_SAMPLES = 11
+FAILING_MEMBER_INDEX = 3
+
+
+def build_network(network_spec):
+    return OscillatorRing(network_spec['natural_frequencies'], network_spec['initial_angles'])
+
+
+def sample_parameters(random_state, member_index):
+    return {'coupling': random_state.uniform(0.5, 2.), 'fail': member_index == FAILING_MEMBER_INDEX}
+
+
+def build_simulation(network, parameters):
+    if parameters['fail'] is True:
+        raise ValueError('member cannot be simulated')
+    network.coupling = parameters['coupling']
+    return SimulationRoutine(network, SIMULATION_TIME, time_step=0.01)
+
+
+def extract_angles(simulation):
+    return simulation.network.buses[1].theta
+
+
+def run_member(parameters):
+    simulation = build_simulation(build_network(get_network_spec()), parameters)
+    simulation.run_simulation()
+    return extract_angles(simulation)
+
+
+def get_network_spec():
+    return {'natural_frequencies': NATURAL_FREQUENCIES, 'initial_angles': INITIAL_ANGLES}
+
+
+def create_ensemble_runner(num_processes):
+    return EnsembleRunner(build_network, build_simulation, sample_parameters, 6, network_spec=get_network_spec(),
+                          output_channels={'theta': (extract_angles, NUM_SAMPLES + 2)}, seed=7,
+                          num_processes=num_processes)
+
+
+class TestEnsembleRunner(unittest.TestCase):
+
+    def test_members_match_single_runs(self):
+        progress = []
+        runner = create_ensemble_runner(1)
+        runner.progress_callback = lambda member_index, succeeded, num_completed, num_members: \
+            progress.append((member_index, succeeded))
+        channels = runner.run()
+
+        self.assertEqual(runner.get_failed_member_indices(), [FAILING_MEMBER_INDEX])
+        self.assertIn('member cannot be simulated', runner.member_errors[FAILING_MEMBER_INDEX])
+        self.assertEqual(sorted(progress), [(k, k != FAILING_MEMBER_INDEX) for k in range(0, 6)])
+        self.assertTrue(isnan(channels['theta'][FAILING_MEMBER_INDEX]).all())
+
+        for member_index, parameters in enumerate(runner.member_parameters):
+            if member_index == FAILING_MEMBER_INDEX:
+                continue
+            # the channel is longer than the history, the rest is padded with NaN
+            angles = run_member(parameters)
+            assert_array_almost_equal(channels['theta'][member_index, 0:NUM_SAMPLES + 1], angles)
+            self.assertTrue(isnan(channels['theta'][member_index, NUM_SAMPLES + 1:]).all())
+        self.assertEqual(len(set([parameters['coupling'] for parameters in runner.member_parameters])), 6)
+
+
+    def test_results_do_not_depend_on_processes(self):
+        serial_runner = create_ensemble_runner(1)
+        parallel_runner = create_ensemble_runner(3)
+        assert_array_equal(serial_runner.run()['theta'], parallel_runner.run()['theta'])
+        self.assertEqual(serial_runner.member_parameters, parallel_runner.member_parameters)
+        self.assertEqual(parallel_runner.get_failed_member_indices(), [FAILING_MEMBER_INDEX])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+
+from os import environ, pathsep
+from subprocess import PIPE, Popen
+from sys import executable, path
+
+# seconds a fresh interpreter may take to import psyspy, which should only need numpy and scipy
+IMPORT_TIME_BUDGET = 2.
+
+# optional dependencies that must only be imported when plotting, drawing graphs or printing tables
+DEFERRED_MODULES = ['IPython', 'joblib', 'matplotlib', 'networkx', 'prettytable']
+
+IMPORT_SCRIPT = """
+import sys
+from time import time
+start_time = time()
+import psyspy
+print time() - start_time
+print ' '.join(sorted(set(name.split('.')[0] for name in sys.modules)))
+"""
+
+# optional dependencies that the power flow solve must not import
+SOLVE_DEFERRED_MODULES = ['joblib', 'matplotlib', 'networkx']
+
+SOLVE_SCRIPT = """
+import sys
+from numpy import array
+from psyspy.model_components import PSys
+bus_table = {'id': array([1, 2, 3]), 'type': array([3, 2, 1]), 'V0': array([1.02, 1.01, 1.]),
+             'P': array([0., 0.5, 0.8]), 'Q': array([0., 0., 0.3])}
+branch_table = {'from_id': array([1, 1, 2]), 'to_id': array([2, 3, 3]), 'r': array([0.01, 0.02, 0.01]),
+                'x': array([0.1, 0.15, 0.12]), 'charging_b': array([0., 0.02, 0.])}
+network = PSys.from_arrays(bus_table, branch_table)
+network.solve_power_flow()
+print ' '.join(sorted(set(name.split('.')[0] for name in sys.modules)))
+"""
+
+
+def run_script(script):
+    process = Popen([executable, '-c', script], stdout=PIPE, stderr=PIPE, env=dict(environ, PYTHONPATH=pathsep.join(path)))
+    output, errors = process.communicate()
+    return process.returncode, output, errors
+
+
+class TestImportTime(unittest.TestCase):
+
+    def test_import_time(self):
+        returncode, output, errors = run_script(IMPORT_SCRIPT)
+        self.assertEqual(returncode, 0, errors)
+
+        import_time, modules = output.strip().split('\n')
+        self.assertLess(float(import_time), IMPORT_TIME_BUDGET)
+        for module in DEFERRED_MODULES:
+            self.assertFalse(module in modules.split(), '%s imported with psyspy' % module)
+
+
+    def test_power_flow_imports(self):
+        returncode, output, errors = run_script(SOLVE_SCRIPT)
+        self.assertEqual(returncode, 0, errors)
+
+        for module in SOLVE_DEFERRED_MODULES:
+            self.assertFalse(module in output.split(), '%s imported by the power flow solve' % module)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+
+from numpy.linalg import solve
+from numpy.testing import assert_array_almost_equal
+
+from psyspy import Bus, PQBus, PVBus
+from psyspy.exceptions import PowerNetworkError
+from psyspy.model_components import PSys
+
+
+def create_wecc_9_bus_network(generator_bus_indices=(0, 1, 2)):
+    """
+    WECC 9 bus network without a slack bus, the generators at buses that are not in generator_bus_indices are left out.
+    """
+    generators = [PVBus(P=0.716, V=1.04, theta0=0), PVBus(P=1.63, V=1.025), PVBus(P=0.85, V=1.025)]
+    buses = [generators[k] if k in generator_bus_indices else Bus() for k in range(0, 3)] + [
+        Bus(shunt_y=(0, 0.5*0.176 + 0.5*0.158)),
+        PQBus(P=1.25, Q=0.5, shunt_y=(0, 0.5*0.176 + 0.5*0.306)),
+        PQBus(P=0.9, Q=0.3, shunt_y=(0, 0.5*0.158 + 0.5*0.358)),
+        Bus(shunt_y=(0, 0.5*0.306 + 0.5*0.149)),
+        PQBus(P=1, Q=0.35, shunt_y=(0, 0.5*0.149 + 0.5*0.209)),
+        Bus(shunt_y=(0, 0.5*0.358 + 0.5*0.209))]
+
+    n = PSys(buses=buses)
+    for a, b, z in [(0, 3, (0, 0.0576)), (3, 4, (0.01, 0.085)), (4, 6, (0.032, 0.161)), (3, 5, (0.017, 0.092)),
+                    (5, 8, (0.039, 0.17)), (6, 7, (0.0085, 0.072)), (2, 8, (0, 0.0586)), (7, 8, (0.0119, 0.1008)),
+                    (1, 6, (0, 0.0625))]:
+        n.connect_buses(buses[a], buses[b], z=z)
+    return n
+
+
+class TestKronReduction(unittest.TestCase):
+
+    def test_kron_reduce(self):
+        for generator_bus_indices, keep_positions in [((0, 1, 2), [0, 1, 2]), ((0, 1, 2), [4, 0, 2, 1]), ((0,), [0])]:
+            n = create_wecc_9_bus_network(generator_bus_indices)
+            n.save_admittance_matrix()
+            mapping = n.get_admittance_matrix_index_bus_id_mapping()
+            G, B = n.get_admittance_matrix()
+            Y = G.toarray() - 1j*B.toarray()
+
+            keep_bus_ids = [n.buses[position].get_id() for position in keep_positions]
+            keep_indices = [mapping.index(bus_id) for bus_id in keep_bus_ids]
+            eliminated_indices = [index for index in range(0, len(mapping)) if index not in keep_indices]
+
+            # loads at the eliminated buses are constant impedances
+            Y_ee = Y[eliminated_indices, :][:, eliminated_indices]
+            for k, index in enumerate(eliminated_indices):
+                bus = n.get_bus_by_id(mapping[index])
+                P, Q = bus.get_apparent_power_injection()
+                Y_ee[k, k] += (-P + 1j*Q)/bus.get_current_voltage_magnitude()**2
+            expected_Y = Y[keep_indices, :][:, keep_indices] - \
+                Y[keep_indices, :][:, eliminated_indices].dot(solve(Y_ee, Y[eliminated_indices, :][:, keep_indices]))
+
+            kron_reduction = n.kron_reduce(keep=keep_bus_ids)
+            self.assertEqual(kron_reduction['bus_ids'], keep_bus_ids)
+            assert_array_almost_equal(kron_reduction['G'].toarray(), expected_Y.real)
+            assert_array_almost_equal(kron_reduction['B'].toarray(), -expected_Y.imag)
+            # cached until a different set of buses is kept
+            self.assertIs(n.kron_reduce(keep=keep_bus_ids), kron_reduction)
+
+        # generator buses cannot be eliminated
+        n = create_wecc_9_bus_network()
+        n.save_admittance_matrix()
+        self.assertRaises(PowerNetworkError, n.kron_reduce, keep=n.buses[0:2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import unittest
+
+from sys import getsizeof
+from types import BuiltinFunctionType, FunctionType, ModuleType
+
+from numpy import arange, array, ndarray, ones, zeros
+
+from psyspy import Bus
+from psyspy.model_components import Model, PSys
+from psyspy.model_components.network_arrays import NetworkArrays
+
+# upper bound of the memory owned by each bus of a large network, including its model, its power line and its rows
+# of the network arrays
+MAX_BYTES_PER_BUS = 1024
+
+
+def create_chain_network_tables(num_buses):
+    bus_table = {
+        'id': arange(1, num_buses + 1),
+        'type': array([3] + [1]*(num_buses - 1)),
+        'V0': ones(num_buses),
+        'P': 0.01*ones(num_buses),
+        'Q': 0.005*ones(num_buses)
+    }
+    branch_table = {
+        'from_id': arange(1, num_buses),
+        'to_id': arange(2, num_buses + 1),
+        'r': 0.01*ones(num_buses - 1),
+        'x': 0.1*ones(num_buses - 1),
+        'charging_b': zeros(num_buses - 1)
+    }
+    return bus_table, branch_table
+
+
+def get_owned_bytes(objects, seen):
+    """
+    Returns the bytes of the objects and of everything they reference that is not in seen, not counting functions,
+    classes, modules and the shared network arrays.
+    """
+    size = 0
+    to_visit = list(objects)
+    while to_visit != []:
+        obj = to_visit.pop()
+        if id(obj) in seen or obj is None or isinstance(obj, (bool, type, FunctionType, BuiltinFunctionType,
+                                                                ModuleType, NetworkArrays)):
+            continue
+        seen.add(id(obj))
+        size += getsizeof(obj)
+        if isinstance(obj, ndarray):
+            continue
+        elif isinstance(obj, (list, tuple)):
+            to_visit.extend(obj)
+        elif isinstance(obj, dict):
+            to_visit.extend(obj.keys())
+            to_visit.extend(obj.values())
+        elif hasattr(obj, 'im_self') is True:
+            to_visit.append(obj.im_self)
+        else:
+            for cls in type(obj).__mro__:
+                to_visit.extend(getattr(obj, name) for name in getattr(cls, '__slots__', ()) if hasattr(obj, name))
+            if hasattr(obj, '__dict__') is True:
+                to_visit.append(obj.__dict__)
+    return size
+
+
+class TestMemoryFootprint(unittest.TestCase):
+
+    def test_bytes_per_bus(self):
+        num_buses = 20000
+        network = PSys.from_arrays(*create_chain_network_tables(num_buses))
+
+        # everything the network itself holds, e.g., its bus index, is shared rather than owned by the buses
+        seen = set([id(network)] + [id(value) for value in network.__dict__.values()])
+        num_bytes = get_owned_bytes(network.buses + network.power_lines, seen)
+        for arrays in [network.get_bus_arrays(), network.get_branch_arrays()]:
+            num_bytes += sum(getattr(arrays, name).nbytes for name in arrays.column_names)
+
+        self.assertLess(float(num_bytes)/num_buses, MAX_BYTES_PER_BUS)
+
+
+    def test_lazy_histories(self):
+        network = PSys.from_arrays(*create_chain_network_tables(10))
+        bus = network.buses[3]
+        power_line = network.power_lines[3]
+
+        for element in [bus, bus.model, power_line]:
+            self.assertFalse(hasattr(element, '__dict__'))
+        self.assertEqual((bus._V_history, bus._theta_history, bus._w), (None, None, None))
+        self.assertEqual((power_line._Pab_history, power_line._Qab_history), (None, None))
+        self.assertIsNone(bus.model._setpoint_change_times)
+
+        bus.update_voltage_polar((0.98, -0.1), replace=False)
+        power_line.append_complex_power(0.5, 0.1)
+        bus.model.append_setpoint_change_time(2.)
+        self.assertEqual(bus.V.tolist(), [1., 0.98])
+        self.assertEqual(bus.theta.tolist(), [0., -0.1])
+        self.assertEqual(power_line.Pab.tolist(), [0., 0.5])
+        self.assertEqual(bus.model._setpoint_change_time.tolist(), [0., 2.])
+        self.assertEqual(bus.w.tolist(), [0.])
+
+
+    def test_shared_callbacks(self):
+        network = PSys.from_arrays(*create_chain_network_tables(10))
+        bus = network.buses[3]
+
+        bus.update_voltage_polar((0.97, 0.2), replace=True)
+        self.assertEqual(bus.model.get_polar_voltage_from_bus(), (0.97, 0.2))
+        bus.model.update_bus_polar_voltage((0.99, 0.1), replace=True)
+        self.assertEqual(bus.get_current_voltage_polar(), (0.99, 0.1))
+        self.assertEqual(bus.model.get_connected_bus_admittance_from_network(),
+                         network._get_connected_bus_admittances_by_bus_id(bus.get_id()))
+        self.assertIs(bus.get_connected_bus_admittance_from_network_method,
+                      network.buses[4].get_connected_bus_admittance_from_network_method)
+
+        # a bus outside of a network has no network callbacks, nor a model without a bus
+        self.assertRaises(AttributeError, Bus().model.get_connected_bus_admittance_from_network)
+        self.assertRaises(AttributeError, Model().get_polar_voltage_from_bus)
+
+
+if __name__ == '__main__':
+    unittest.main()
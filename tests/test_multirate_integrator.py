@@ -0,0 +1,158 @@
+import unittest
+
+from math import sin
+
+from numpy import array, empty
+from numpy.testing import assert_array_almost_equal
+
+from psyspy import Bus, PQBus
+from psyspy.model_components import PSys
+from psyspy.simulation_resources import MultiRateIntegrator, RungeKutta45, SimulationRoutine
+
+from test_small_signal_analysis import ClassicalGeneratorModel
+
+
+# a slow state s (time scale 2 seconds) driven by a fast state f (time scale 2 milliseconds) that tracks sin(s)
+SLOW_TIME_SCALE = 2.
+FAST_TIME_SCALE = 0.002
+
+
+def slow_derivative(states):
+    return -states[0]/SLOW_TIME_SCALE + states[1]
+
+
+def fast_derivative(states):
+    return -(states[1] - sin(states[0]))/FAST_TIME_SCALE
+
+
+def derivative(current_states):
+    return array([slow_derivative(current_states), fast_derivative(current_states)])
+
+
+class CountingGroupDerivative(object):
+
+    def __init__(self):
+        self.num_evaluations = {}
+
+
+    def __call__(self, states, rate, t):
+        self.num_evaluations[rate] = self.num_evaluations.get(rate, 0) + 1
+        if rate == self.slow_rate:
+            return array([slow_derivative(states)])
+        return array([fast_derivative(states)])
+
+
+def integrate_single_rate(initial_states, time_step, num_steps):
+    numerical_method = RungeKutta45(time_step)
+    states = initial_states
+    for _ in range(0, num_steps):
+        states = numerical_method.get_updated_states(states, derivative)
+    return states
+
+
+def create_generator_network():
+    # the generator at bus 4 is slow enough to be integrated every second step of 0.01 seconds
+    slow_generator = ClassicalGeneratorModel(1.05, 0.25, 0.08, 0.02, 0.4, 0.2)
+    slow_generator.natural_time_scale = 0.2
+    b1 = Bus(model=ClassicalGeneratorModel(1.05, 0.2, 0.2, 0.1, 0.3, 0.1), V0=1.02, theta0=0)
+    b2 = Bus(model=ClassicalGeneratorModel(1.1, 0.3, 0.1, 0.05, 0.6, 0.4))
+    b3 = PQBus(P=1.2, Q=0.3)
+    b4 = Bus(model=slow_generator)
+
+    n = PSys(buses=[b1, b2, b3, b4], solver_tolerance=1e-10)
+    _ = n.connect_buses(b1, b2, z=(0.01, 0.1))
+    _ = n.connect_buses(b2, b3, z=(0.02, 0.15))
+    _ = n.connect_buses(b1, b3, z=(0.01, 0.12))
+    _ = n.connect_buses(b3, b4, z=(0, 0.08))
+    _ = n.set_slack_bus(b1)
+    return n
+
+
+class TestMultiRateIntegrator(unittest.TestCase):
+
+    def setUp(self):
+        # start with the fast state at equilibrium, as a dynamic simulation does after initialization
+        self.initial_states = array([1., sin(1.)])
+        self.simulation_time = 2.
+        self.base_time_step = 0.01
+        self.num_steps = int(round(self.simulation_time/self.base_time_step))
+        # single-rate reference that resolves the fast time scale everywhere
+        self.reference_states = integrate_single_rate(self.initial_states, 1e-4,
+                                                      int(round(self.simulation_time/1e-4)))
+
+
+    def create_integrator(self, group_derivative):
+        integrator = MultiRateIntegrator(self.base_time_step)
+        group_derivative.slow_rate = integrator.get_rate(SLOW_TIME_SCALE)
+        group_derivative.fast_rate = integrator.get_rate(FAST_TIME_SCALE)
+        integrator.set_rate_groups({group_derivative.slow_rate: [0], group_derivative.fast_rate: [1]})
+        integrator.initialize(self.initial_states)
+        return integrator
+
+
+    def test_rate_assignment(self):
+        integrator = MultiRateIntegrator(0.01)
+        self.assertEqual(integrator.get_rate(None), (1, 1))
+        self.assertEqual(integrator.get_rate(0.1), (1, 1))
+        self.assertEqual(integrator.get_rate(2.), (16, 1))
+        self.assertEqual(integrator.get_rate(0.002), (1, 50))
+        self.assertEqual(integrator.get_rate(1000.), (64, 1))
+
+
+    def test_accuracy_against_single_rate_reference(self):
+        group_derivative = CountingGroupDerivative()
+        integrator = self.create_integrator(group_derivative)
+
+        states = self.initial_states
+        for _ in range(0, self.num_steps):
+            states = integrator.step(states, group_derivative)
+
+        self.assertLess(abs(states - self.reference_states).max(), 2e-3)
+
+        # four stages per step: the slow group every 16 base steps, the fast group 50 times per base step
+        self.assertEqual(group_derivative.num_evaluations[group_derivative.slow_rate],
+                         4*len(range(0, self.num_steps, 16)))
+        self.assertEqual(group_derivative.num_evaluations[group_derivative.fast_rate], 4*50*self.num_steps)
+
+
+    def test_slow_states_are_interpolated_between_macro_steps(self):
+        group_derivative = CountingGroupDerivative()
+        integrator = self.create_integrator(group_derivative)
+
+        slow_states = empty(17)
+        slow_states[0] = self.initial_states[0]
+        states = self.initial_states
+        for k in range(1, 17):
+            states = integrator.step(states, group_derivative)
+            slow_states[k] = states[0]
+
+        # the slow group took a single step of 16 base steps, intermediate values lie on a straight line
+        expected_slow_states = slow_states[0] + (slow_states[16] - slow_states[0])*array(range(0, 17))/16.
+        assert_array_almost_equal(slow_states, expected_slow_states, decimal=12)
+
+
+class TestMultiRateSimulation(unittest.TestCase):
+
+    def test_against_single_rate_simulation(self):
+        network = create_generator_network()
+        simulation = SimulationRoutine(network, 1., time_step=0.01)
+        simulation.run_simulation(end_time=1.)
+
+        multirate_network = create_generator_network()
+        multirate_simulation = SimulationRoutine(multirate_network, 1., time_step=0.01,
+                                                 multirate_integrator=MultiRateIntegrator(0.01))
+        multirate_simulation.run_simulation(end_time=1.)
+
+        slow_bus_id = multirate_network.buses[3].get_id()
+        fast_bus_ids = set([bus.get_id() for bus in multirate_network.buses[0:2]])
+        self.assertEqual(multirate_network.rate_group_bus_ids, {(1, 1): fast_bus_ids, (2, 1): set([slow_bus_id])})
+        assert_array_almost_equal(multirate_simulation.time_vector, simulation.time_vector, 12)
+
+        # rotor angles and speeds of the three generators
+        differences = abs(multirate_network.get_current_dynamic_states() - network.get_current_dynamic_states())
+        self.assertLess(differences[0::2].max(), 0.02)
+        self.assertLess(differences[1::2].max(), 0.05)
+
+
+if __name__ == '__main__':
+    unittest.main()
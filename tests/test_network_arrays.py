@@ -0,0 +1,122 @@
+import unittest
+
+from numpy import array, isnan, may_share_memory
+from numpy.testing import assert_array_almost_equal
+
+from psyspy import Bus
+from psyspy.exceptions import BusError, PowerNetworkError
+from psyspy.model_components import PSys
+from psyspy.model_components.network_arrays import NetworkArrays
+
+from test_psys_from_arrays import create_wecc_9_bus_tables
+
+
+class TestNetworkArrays(unittest.TestCase):
+
+    def test_add_rows(self):
+        arrays = NetworkArrays(('V', 'theta'), capacity=2)
+        self.assertEqual(arrays.add_rows(V=1.), 0)
+        self.assertEqual(arrays.add_rows(3, V=[2., 3., 4.], theta=0.5), 1)
+
+        self.assertEqual(len(arrays), 4)
+        assert_array_almost_equal(arrays.V, [1., 2., 3., 4.])
+        assert_array_almost_equal(arrays.theta, [0., 0.5, 0.5, 0.5])
+        self.assertRaises(ValueError, arrays.add_rows, shunt_g=1.)
+
+
+    def test_buses_are_views(self):
+        network = PSys.from_arrays(*create_wecc_9_bus_tables())
+        bus = network.buses[4]
+        bus.update_voltage_polar((0.99, -0.1), replace=False)
+
+        bus_arrays = network.get_bus_arrays()
+        self.assertEqual(len(bus_arrays), 9)
+        self.assertAlmostEqual(bus_arrays.V[4], 0.99)
+
+        bus_arrays.theta[4] = -0.2
+        self.assertEqual(bus.get_current_voltage_polar(), (0.99, -0.2))
+        assert_array_almost_equal(bus.V, [1., 0.99])
+        assert_array_almost_equal(bus.theta, [0., -0.2])
+
+        # buses added later are bound to the same arrays
+        new_bus = Bus()
+        new_bus.set_initial_voltage_polar((1.01, 0.05))
+        network.add_bus(new_bus)
+        self.assertAlmostEqual(network.get_bus_arrays().V[9], 1.01)
+        self.assertAlmostEqual(network.get_bus_arrays().theta[4], -0.2)
+
+
+    def test_histories_are_views(self):
+        network = PSys.from_arrays(*create_wecc_9_bus_tables())
+        bus = network.buses[4]
+        power_line = network.power_lines[2]
+        for k in range(1, 41):
+            bus.update_voltage_polar((1. - 0.001*k, -0.01*k), replace=False)
+            power_line.append_complex_power(0.1*k, 0.01*k)
+
+        self.assertEqual(bus.theta.shape, (41,))
+        self.assertTrue(may_share_memory(bus.theta, bus.theta))
+        assert_array_almost_equal(bus.theta[-3:], [-0.38, -0.39, -0.4])
+        assert_array_almost_equal(power_line.Pab[0:3], [0., 0.1, 0.2])
+
+        # writes through the views reach the network arrays
+        bus.V[-1] = 0.95
+        bus.theta[-2:] = [-0.5, -0.6]
+        power_line.Qab[-1] = 0.7
+        self.assertEqual(bus.get_current_voltage_polar(), (0.95, -0.6))
+        self.assertAlmostEqual(bus.get_voltage_angle_by_index(-2), -0.5)
+        self.assertAlmostEqual(network.get_bus_arrays().theta[4], -0.6)
+        self.assertAlmostEqual(network.get_branch_arrays().Qab[2], 0.7)
+
+        # a bus without a history is a view of its row of the bus arrays
+        other_bus = network.buses[5]
+        other_bus.V[-1] = 1.01
+        self.assertAlmostEqual(network.get_bus_arrays().V[5], 1.01)
+
+        bus.V = [1., 0.99, 0.98]
+        self.assertEqual(bus.V.tolist(), [1., 0.99, 0.98])
+        self.assertAlmostEqual(network.get_bus_arrays().V[4], 0.98)
+        self.assertTrue(isnan(bus.get_voltage_magnitude_by_index(3)))
+
+
+    def test_line_power_flows(self):
+        network = PSys.from_arrays(*create_wecc_9_bus_tables())
+        network.solve_power_flow(append=False)
+
+        expected_flows = array([network._compute_line_power_flow(power_line) for power_line in network.power_lines])
+        branch_arrays = network.get_branch_arrays()
+        assert_array_almost_equal(branch_arrays.Pab, expected_flows[:, 0])
+        assert_array_almost_equal(branch_arrays.Qab, expected_flows[:, 1])
+        self.assertEqual(network.power_lines[3].get_current_complex_power(), (branch_arrays.Pab[3], branch_arrays.Qab[3]))
+
+
+    def test_network_power_injections(self):
+        network = PSys.from_arrays(*create_wecc_9_bus_tables())
+        network.solve_power_flow(append=False)
+
+        # the loads at buses 5, 6 and 8 and no injection at the buses without load or generation
+        injections = array([network.compute_apparent_power_injected_from_network(bus) for bus in network.buses])
+        assert_array_almost_equal(injections[[3, 4, 5, 6, 7, 8], :],
+                                  [[0., 0.], [-1.25, -0.5], [-0.9, -0.3], [0., 0.], [-1., -0.35], [0., 0.]], 4)
+        assert_array_almost_equal(injections[1:3, 0], [1.63, 0.85], 4)
+        self.assertLess(abs(network._generate_function_vector()).max(), 1e-4)
+
+
+    def test_elements_of_other_networks(self):
+        network = PSys.from_arrays(*create_wecc_9_bus_tables())
+        bus = network.buses[4]
+
+        other_network = PSys()
+        self.assertRaises(PowerNetworkError, other_network.add_bus, bus)
+        self.assertRaises(PowerNetworkError, other_network.add_buses, [Bus(), bus])
+        self.assertRaises(PowerNetworkError, other_network.add_power_line, network.power_lines[0])
+        self.assertEqual(other_network.buses, [])
+        self.assertEqual(len(other_network.get_bus_arrays()), 0)
+        self.assertEqual(len(other_network.get_branch_arrays()), 0)
+
+        self.assertRaises(BusError, bus.bind_to_arrays, other_network.get_bus_arrays(), 0)
+        self.assertAlmostEqual(network.get_bus_arrays().V[4], bus.get_current_voltage_magnitude())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+
+from os.path import join as path_join
+from shutil import rmtree
+from tempfile import mkdtemp
+
+from numpy import array
+from numpy.testing import assert_array_almost_equal
+
+from psyspy.exceptions import PowerNetworkError
+from psyspy.helper_functions import load_arrays, save_arrays_atomically
+from psyspy.model_components import PSys
+
+from test_psys_from_arrays import create_wecc_9_bus_tables
+
+
+class TestNetworkFile(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = mkdtemp()
+        self.path = path_join(self.directory, 'wecc9.npz')
+        self.network = PSys.from_arrays(*create_wecc_9_bus_tables())
+        self.network.buses[4].name = 'load A'
+        self.network.save(self.path)
+
+
+    def tearDown(self):
+        rmtree(self.directory)
+
+
+    def test_save_and_load(self):
+        expected_G, expected_B = self.network.get_admittance_matrix()
+
+        for mmap_mode in [None, 'r']:
+            n = PSys.load(self.path, mmap_mode=mmap_mode)
+
+            self.assertEqual([bus.name for bus in n.buses], [1, 2, 3, 4, 'load A', 6, 7, 8, 9])
+            self.assertEqual([type(bus) for bus in n.buses], [type(bus) for bus in self.network.buses])
+            self.assertEqual(n.get_slack_bus_id(), n.buses[0].get_id())
+            self.assertEqual(n.get_number_of_power_lines(), 9)
+            assert_array_almost_equal([bus.get_current_voltage_polar() for bus in n.buses],
+                                      [bus.get_current_voltage_polar() for bus in self.network.buses])
+
+            G, B = n.get_admittance_matrix()
+            assert_array_almost_equal(G.toarray(), expected_G.toarray())
+            assert_array_almost_equal(B.toarray(), expected_B.toarray())
+
+            # the Jacobian structure is restored from the file, not regenerated from the power lines
+            self.assertEqual(n.jacobian_indices, n._generate_static_vars_list()[5])
+
+
+    def test_restore_checkpoint_with_other_slack_bus(self):
+        self.network.unset_slack_bus()
+        _ = self.network.set_slack_bus(self.network.buses[1])
+        checkpoint = self.network.get_state_checkpoint()
+
+        n = PSys.from_arrays(*create_wecc_9_bus_tables())
+        n.restore_state_checkpoint(checkpoint)
+        self.assertEqual(n.get_slack_bus_id(), n.buses[1].get_id())
+        self.assertEqual([bus.is_voltage_polar_static() for bus in n.buses[0:2]], [(True, False), (True, True)])
+        self.assertEqual(n.jacobian_indices, n._generate_static_vars_list()[5])
+
+        # the slack bus is restored with the flags it had before it became the slack bus
+        n.unset_slack_bus()
+        self.assertEqual(n.buses[1].is_voltage_polar_static(), (True, False))
+        _ = n.set_slack_bus(n.buses[0])
+        n.unset_slack_bus()
+        self.assertEqual(n.buses[0].is_voltage_polar_static(), (True, False))
+
+
+    def test_format_version(self):
+        network_arrays = load_arrays(self.path)
+        network_arrays['format_version'] = array(0)
+        save_arrays_atomically(self.path, network_arrays)
+
+        self.assertRaises(PowerNetworkError, PSys.load, self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+
+from os import listdir
+from shutil import rmtree
+from tempfile import mkdtemp
+
+from numpy import zeros
+from numpy.testing import assert_array_almost_equal
+
+from psyspy.plot_resources import network_layout
+from psyspy.plot_resources.network_layout import compute_spectral_layout, get_layout, get_model_offsets, \
+                                                 get_topology_hash
+
+
+class TestNetworkLayout(unittest.TestCase):
+
+    def setUp(self):
+        self.bus_ids = range(1, 501)
+        self.edges = [(k, k % 500 + 1) for k in self.bus_ids]
+
+
+    def test_topology_hash(self):
+        topology_hash = get_topology_hash(self.bus_ids, self.edges)
+        self.assertEqual(get_topology_hash(self.bus_ids[::-1], [(bj, bi) for bi, bj in self.edges[::-1]]), topology_hash)
+        self.assertNotEqual(get_topology_hash(self.bus_ids, self.edges[1:]), topology_hash)
+
+
+    def test_spectral_layout(self):
+        # a ring is laid out on a circle, with the sparse solver beyond DENSE_LAYOUT_MAX_NODES nodes
+        for num_nodes in [50, 500]:
+            positions = compute_spectral_layout(num_nodes, [(k, (k + 1) % num_nodes) for k in range(num_nodes)])
+            radii = (positions**2).sum(axis=1)**0.5
+            self.assertEqual(positions.shape, (num_nodes, 2))
+            self.assertAlmostEqual(radii.min()/radii.max(), 1., 5)
+            self.assertAlmostEqual(abs(positions).max(), 1.)
+
+
+    def test_cached_layout(self):
+        directory = mkdtemp()
+        try:
+            positions = get_layout(self.bus_ids, self.edges, directory=directory)
+            self.assertEqual(len(listdir(directory)), 1)
+
+            network_layout._layouts.clear()
+            assert_array_almost_equal(get_layout(self.bus_ids[::-1], self.edges, directory=directory), positions[::-1])
+        finally:
+            rmtree(directory)
+
+
+    def test_model_offsets(self):
+        positions = zeros((3, 2))
+        positions[0] = [0.5, 0.]
+        positions[1] = [0., -1.]
+        assert_array_almost_equal(get_model_offsets(positions, 0.1), [[0.6, 0.], [0., -1.1], [0., 0.1]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+
+from numpy import arange, array, exp
+from numpy.testing import assert_array_almost_equal
+
+from psyspy.simulation_resources import OrderParameterTracker, SimulationRoutine
+
+from test_simulation_routine import NaturalFrequencyChange, create_oscillator_ring
+
+
+class TestOrderParameterTracker(unittest.TestCase):
+
+    def test_groups_and_decimation(self):
+        network = create_oscillator_ring()
+        bus_ids = network.get_buses_index_bus_id_mapping()
+        tracker = OrderParameterTracker(bus_ids=bus_ids[1:4], groups={'a': [bus_ids[3], bus_ids[0]], 'b': [bus_ids[2]]},
+                                        decimation=3)
+        simulation = SimulationRoutine(network, 0.3, time_step=0.01, order_parameter_tracker=tracker)
+        simulation.run_simulation()
+
+        angles = array([bus.theta[0:-1] for bus in network.buses]).T[0::3]
+        assert_array_almost_equal(tracker.get_time_vector(), simulation.time_vector[0::3])
+        assert_array_almost_equal(tracker.get_order_parameter(), exp(1j*angles[:, 1:4]).mean(axis=1))
+        assert_array_almost_equal(tracker.get_order_parameter('a'), exp(1j*angles[:, [3, 0]]).mean(axis=1))
+        assert_array_almost_equal(tracker.get_magnitude('b'), 1.)
+        assert_array_almost_equal(tracker.get_phase('b'), angles[:, 2])
+        self.assertRaises(KeyError, tracker.get_order_parameter, 'c')
+
+
+    def test_decimation_with_off_grid_events(self):
+        network = create_oscillator_ring()
+        tracker = OrderParameterTracker(decimation=3)
+        simulation = SimulationRoutine(network, 0.3, time_step=0.01, order_parameter_tracker=tracker,
+                                       perturbations=[NaturalFrequencyChange(0.023, network, 2, 0.)])
+        simulation.run_simulation()
+
+        # the step ending at the event between two grid points is skipped, the others are on the time grid
+        grid_steps = range(0, 3) + range(4, 32)
+        angles = array([bus.theta[0:-1] for bus in network.buses]).T[grid_steps[0::3]]
+        assert_array_almost_equal(tracker.get_time_vector(), 0.03*arange(0, 11), 12)
+        assert_array_almost_equal(tracker.get_order_parameter(), exp(1j*angles).mean(axis=1))
+
+
+    def test_buses_not_in_network(self):
+        network = create_oscillator_ring()
+        for tracker in [OrderParameterTracker(bus_ids=[-1]), OrderParameterTracker(groups={'a': []})]:
+            self.assertRaises(ValueError, tracker.prepare, network, 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+
+from numpy.testing import assert_array_almost_equal
+
+from psyspy.simulation_resources import PararealDriver, SimulationRoutine
+
+from test_simulation_routine import INITIAL_ANGLES, NATURAL_FREQUENCIES, NaturalFrequencyChange, OscillatorRing
+
+SIMULATION_TIME = 1.
+NUM_SLICES = 4
+
+# networks built by build_network in this process
+built_networks = []
+
+
+def build_network(network_spec):
+    network = OscillatorRing(network_spec['natural_frequencies'], network_spec['initial_angles'], coupling=2.)
+    built_networks.append(network)
+    return network
+
+
+def build_simulation(network, time_step):
+    perturbations = [NaturalFrequencyChange(0.3, network, 1, 2.), NaturalFrequencyChange(0.55, network, 2, 1.)]
+    return SimulationRoutine(network, SIMULATION_TIME, time_step=time_step, perturbations=perturbations)
+
+
+def build_fine_simulation(network):
+    return build_simulation(network, 0.005)
+
+
+def build_coarse_simulation(network):
+    return build_simulation(network, 0.125)
+
+
+def extract_final_angles(simulation):
+    return simulation.network.get_current_dynamic_states()
+
+
+def create_parareal_driver(slice_extractor=extract_final_angles, **kwargs):
+    return PararealDriver(build_network, build_fine_simulation, build_coarse_simulation, SIMULATION_TIME, NUM_SLICES,
+                          network_spec={'natural_frequencies': NATURAL_FREQUENCIES, 'initial_angles': INITIAL_ANGLES},
+                          slice_extractor=slice_extractor, **kwargs)
+
+
+class TestPararealDriver(unittest.TestCase):
+
+    def setUp(self):
+        network = build_network({'natural_frequencies': NATURAL_FREQUENCIES, 'initial_angles': INITIAL_ANGLES})
+        fine_simulation = build_fine_simulation(network)
+        fine_simulation.run_simulation(end_time=SIMULATION_TIME)
+        self.fine_angles = network.get_current_dynamic_states()
+
+
+    def test_exact_after_num_slices_iterations(self):
+        driver = create_parareal_driver(tolerance=0., num_processes=1)
+        driver.run()
+
+        report = driver.get_report()
+        self.assertEqual(report['iterations'], NUM_SLICES)
+        self.assertTrue(report['converged'])
+        self.assertEqual(driver.slice_boundary_times, [0., 0.25, 0.5, 0.75, 1.])
+        assert_array_almost_equal(driver.get_final_checkpoint()['bus_voltages'][:, 1], self.fine_angles, 10)
+        assert_array_almost_equal(driver.slice_outputs[-1], self.fine_angles, 10)
+        self.assertEqual(driver.get_final_checkpoint()['perturbation_active'].tolist(), [True, True])
+
+
+    def test_converges_with_tolerance(self):
+        driver = create_parareal_driver(tolerance=1e-8, num_processes=2)
+        driver.run()
+
+        report = driver.get_report()
+        self.assertTrue(report['converged'])
+        self.assertLessEqual(report['boundary_changes'][-1], 1e-8)
+        assert_array_almost_equal(driver.get_final_checkpoint()['bus_voltages'][:, 1], self.fine_angles, 6)
+
+
+    def test_propagators_keep_no_history(self):
+        del built_networks[:]
+        driver = create_parareal_driver(tolerance=0., num_processes=1, slice_extractor=None)
+        coarse_network = driver.coarse_simulation.network
+        num_initial_angles = coarse_network.buses[0].theta.shape[0]
+        driver.run()
+
+        # the coarse and the fine simulation are each built once, and the coarse one records nothing
+        self.assertEqual(len(built_networks), 2)
+        self.assertIs(built_networks[0], coarse_network)
+        self.assertEqual(driver.get_report()['iterations'], NUM_SLICES)
+        for network in built_networks:
+            self.assertEqual(network.buses[0].theta.shape[0], num_initial_angles)
+        assert_array_almost_equal(driver.get_final_checkpoint()['bus_voltages'][:, 1], self.fine_angles, 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+
+from numpy import arange, array, column_stack, percentile
+from numpy.testing import assert_array_almost_equal
+
+from psyspy.plot_resources.plotter import compute_weighted_average, get_envelope
+
+
+class TestPlotter(unittest.TestCase):
+
+    def setUp(self):
+        self.t = 0.01*arange(100)
+        self.w = column_stack([k*self.t for k in range(1, 21)])
+
+
+    def test_weighted_average(self):
+        D = arange(1., 21.)
+        expected_w_avg = array([sum(D[k]*w_i[k] for k in range(20))/D.sum() for w_i in self.w])
+        assert_array_almost_equal(compute_weighted_average(self.w, D), expected_w_avg)
+        assert_array_almost_equal(compute_weighted_average(self.w, [1.]*20), self.w.mean(axis=1))
+
+
+    def test_envelope(self):
+        minimum, lower, median, upper, maximum = get_envelope(self.w)
+        assert_array_almost_equal(minimum, self.t)
+        assert_array_almost_equal(maximum, 20*self.t)
+        assert_array_almost_equal(median, 10.5*self.t)
+        assert_array_almost_equal(lower, percentile(self.w, 5, axis=1))
+        assert_array_almost_equal(upper, percentile(self.w, 95, axis=1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import unittest
+
+from numpy import array, genfromtxt
+from numpy.testing import assert_array_almost_equal
+
+from psyspy import Bus, PQBus, PVBus
+from psyspy.exceptions import ModelError, PowerNetworkError
+from psyspy.model_components import PSys
+
+
+def create_wecc_9_bus_tables():
+    bus_table = {
+        'id': array(range(1, 10)),
+        'type': array([3, 2, 2, 0, 1, 1, 0, 1, 0]),
+        'V0': array([1.04, 1.025, 1.025, 1, 1, 1, 1, 1, 1]),
+        'P': array([0.716, 1.63, 0.85, 0, 1.25, 0.9, 0, 1, 0]),
+        'Q': array([0, 0, 0, 0, 0.5, 0.3, 0, 0.35, 0])
+    }
+    branch_table = {
+        'from_id': array([1, 4, 5, 4, 6, 7, 3, 8, 2]),
+        'to_id': array([4, 5, 7, 6, 9, 8, 9, 9, 7]),
+        'r': array([0, 0.01, 0.032, 0.017, 0.039, 0.0085, 0, 0.0119, 0]),
+        'x': array([0.0576, 0.085, 0.161, 0.092, 0.17, 0.072, 0.0586, 0.1008, 0.0625]),
+        'charging_b': array([0, 0.176, 0.306, 0.158, 0.358, 0.149, 0, 0.209, 0])
+    }
+    return bus_table, branch_table
+
+
+class TestPSysFromArrays(unittest.TestCase):
+
+    def test_admittance_matrix(self):
+        bus_table, branch_table = create_wecc_9_bus_tables()
+
+        for optimal_ordering, suffix in [(False, ''), (True, '_optimal_ordering')]:
+            n = PSys.from_arrays(bus_table, branch_table, optimal_ordering=optimal_ordering)
+            expected_G = genfromtxt('resources/wecc9_conductance_matrix%s.csv' % suffix, delimiter=',')
+            expected_B = genfromtxt('resources/wecc9_susceptance_matrix%s.csv' % suffix, delimiter=',')
+
+            # built without calling generate_admittance_matrix
+            G, B = n.get_admittance_matrix()
+            assert_array_almost_equal(G.toarray(), expected_G, 8)
+            assert_array_almost_equal(B.toarray(), expected_B, 8)
+            self.assertEqual(n.is_admittance_matrix_index_bus_id_mapping_optimal(), optimal_ordering)
+
+
+    def test_buses(self):
+        n = PSys.from_arrays(*create_wecc_9_bus_tables())
+
+        self.assertEqual(n.get_number_of_power_lines(), 9)
+        self.assertEqual([bus.name for bus in n.buses], range(1, 10))
+        self.assertEqual([type(bus) for bus in n.buses], [PVBus, PVBus, PVBus, Bus, PQBus, PQBus, Bus, PQBus, Bus])
+        self.assertEqual(n.get_slack_bus_id(), n.buses[0].get_id())
+        self.assertAlmostEqual(n.buses[3].shunt_y[1], 0.5*0.176 + 0.5*0.158)
+
+
+    def test_slack_bus_static_flags(self):
+        n = PSys.from_arrays(*create_wecc_9_bus_tables())
+        slack_bus = n.buses[0]
+
+        self.assertEqual(slack_bus.is_voltage_polar_static(), (True, True))
+        self.assertEqual(n.buses[1].is_voltage_polar_static(), (True, False))
+        self.assertEqual(n.buses[4].is_voltage_polar_static(), (False, False))
+
+        # the slack bus is a PV bus, so it keeps a static voltage magnitude once it is no longer the slack bus
+        n.unset_slack_bus()
+        self.assertEqual(slack_bus.is_voltage_polar_static(), (True, False))
+        self.assertRaises(ModelError, slack_bus.model.restore_voltage_polar_static)
+
+
+    def test_voltage_vector_bus_ids(self):
+        n = PSys.from_arrays(*create_wecc_9_bus_tables())
+
+        def get_expected_bus_ids():
+            expected_bus_ids = []
+            for bus_id in n.get_admittance_matrix_index_bus_id_mapping():
+                voltage_magnitude_is_static, voltage_angle_is_static = n.get_bus_by_id(bus_id).is_voltage_polar_static()
+                if voltage_magnitude_is_static is False or voltage_angle_is_static is False:
+                    expected_bus_ids.append(bus_id)
+                if voltage_magnitude_is_static is False:
+                    expected_bus_ids.append(bus_id)
+            return expected_bus_ids
+
+        self.assertEqual(n._get_voltage_vector_bus_ids(), get_expected_bus_ids())
+        self.assertEqual(len(n._get_voltage_vector_bus_ids()), n._get_current_voltage_vector().shape[0])
+
+        # the entries follow the static voltage flags rather than the bus types
+        n.buses[4].model.make_voltage_magnitude_static()
+        n.save_static_vars_list()
+        self.assertEqual(n._get_voltage_vector_bus_ids().count(n.buses[4].get_id()), 1)
+        self.assertEqual(n._get_voltage_vector_bus_ids(), get_expected_bus_ids())
+        self.assertEqual(len(n._get_voltage_vector_bus_ids()), n._get_current_voltage_vector().shape[0])
+
+
+    def test_validation(self):
+        bus_table, branch_table = create_wecc_9_bus_tables()
+
+        invalid_tables = [(dict(bus_table, id=array([1]*9)), branch_table),
+                          (dict(bus_table, type=array([3, 3, 2, 0, 1, 1, 0, 1, 0])), branch_table),
+                          (dict(bus_table, V0=array([0.]*9)), branch_table),
+                          (bus_table, dict(branch_table, to_id=array([4, 5, 7, 6, 9, 8, 9, 9, 10]))),
+                          (bus_table, dict(branch_table, to_id=array([1, 5, 7, 6, 9, 8, 9, 9, 7]))),
+                          (bus_table, dict(branch_table, x=array([0.]*9)))]
+        for invalid_bus_table, invalid_branch_table in invalid_tables:
+            self.assertRaises(PowerNetworkError, PSys.from_arrays, invalid_bus_table, invalid_branch_table)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import unittest
+
+from numpy import array, roll, sin
+from numpy.testing import assert_array_almost_equal
+
+from psyspy.model_components import Model
+from psyspy.simulation_resources import ControllerScheduler, ProportionalFrequencyController, RungeKutta45, \
+                                        SampledDataController, SimulationRoutine
+
+from test_simulation_routine import COUPLING, INITIAL_ANGLES, NATURAL_FREQUENCIES, OscillatorRing
+
+
+class RecordingController(SampledDataController):
+
+    def initialize(self, network):
+        self.measurement_times = []
+        self.compute_times = []
+        self.actuations = []
+
+
+    def measure(self, network):
+        self.measurement_times.append(network.t)
+        return array([network.t])
+
+
+    def compute(self, t, measurements):
+        self.compute_times.append(t)
+        return 2*measurements
+
+
+    def actuate(self, network, outputs):
+        self.actuations.append((network.t, outputs[0]))
+
+
+class Network(object):
+    t = 0.
+
+
+class OscillatorModel(Model):
+    """
+    Exposes the natural frequency of an oscillator of an OscillatorRing as the real power setpoint and its speed as the
+    angular velocity, as generator models do for frequency controllers.
+    """
+
+    def __init__(self):
+        Model.__init__(self, is_dynamic=True)
+        self.network = None
+        self.index = None
+
+
+    def get_current_dynamic_angular_velocity(self):
+        return self.network.get_dynamic_state_time_derivative_array()[self.index]
+
+
+    def get_dynamic_model_real_power_setpoint(self):
+        return self.network.natural_frequencies[self.index]
+
+
+    def change_dynamic_model_real_power_setpoint(self, new_setpoint):
+        self.network.natural_frequencies[self.index] = new_setpoint
+
+
+def create_controlled_oscillator_ring():
+    models = [OscillatorModel() for _ in INITIAL_ANGLES]
+    network = OscillatorRing(NATURAL_FREQUENCIES, INITIAL_ANGLES, coupling=COUPLING, models=models)
+    for index, model in enumerate(models):
+        model.network = network
+        model.index = index
+    return network
+
+
+def run(scheduler, network, time_step, num_steps):
+    scheduler.initialize()
+    for k in range(0, num_steps):
+        network.t = k*time_step
+        scheduler.update(network.t, time_step)
+
+
+class TestControllerScheduler(unittest.TestCase):
+
+    def test_sample_instants_and_latency(self):
+        network = Network()
+        controller = RecordingController(0.01, 1, 1, measurement_latency=0.02, actuation_latency=0.005)
+        run(ControllerScheduler(network, controller), network, 0.001, 50)
+
+        assert_array_almost_equal(controller.measurement_times, [0.01*k for k in range(0, 5)])
+        assert_array_almost_equal(controller.compute_times, [0.01*k + 0.02 for k in range(0, 3)])
+        # each output is applied 25 ms after the measurement it was computed from and held until the next one
+        assert_array_almost_equal(array(controller.actuations),
+                                  [(0.01*k + 0.025, 2*0.01*k) for k in range(0, 3)])
+
+
+    def test_zero_latency_within_one_step(self):
+        network = Network()
+        controller = RecordingController(0.1, 1, 1)
+        run(ControllerScheduler(network, [controller]), network, 0.01, 21)
+
+        assert_array_almost_equal(array(controller.actuations), [(0., 0.), (0.1, 0.2), (0.2, 0.4)])
+
+
+    def test_simulation_with_proportional_frequency_controller(self):
+        network = create_controlled_oscillator_ring()
+        bus_ids = network.get_buses_index_bus_id_mapping()
+        controller = ProportionalFrequencyController(bus_ids, 0.5, 0.05, measurement_latency=0.02)
+        simulation = SimulationRoutine(network, 0.5, time_step=0.01, controller=controller)
+        self.assertIsInstance(simulation.controller, ControllerScheduler)
+        simulation.run_simulation()
+
+        # reference with the speeds measured every 50 ms and the setpoints applied 20 ms later
+        theta = array(INITIAL_ANGLES)
+        natural_frequencies = array(NATURAL_FREQUENCIES)
+        measurements = []
+        for k in range(0, 51):
+            def derivative(current_states):
+                return natural_frequencies + COUPLING*(sin(roll(current_states, 1) - current_states) +
+                                                       sin(roll(current_states, -1) - current_states))
+
+            if k % 5 == 0:
+                measurements.append(derivative(theta))
+            if k % 5 == 2:
+                natural_frequencies = array(NATURAL_FREQUENCIES) - 0.5*measurements.pop(0)
+            theta = RungeKutta45(0.01).get_updated_states(theta, derivative)
+
+        self.assertEqual(controller.num_invocations, 10)
+        assert_array_almost_equal(network.natural_frequencies, natural_frequencies, 12)
+        assert_array_almost_equal(network.get_current_dynamic_states(), theta, 12)
+
+
+    def test_buffers_are_preallocated(self):
+        controller = RecordingController(0.01, 3, 2, measurement_latency=0.025, actuation_latency=0.)
+        self.assertEqual(controller.get_measurement_buffer_capacity(), 4)
+        self.assertEqual(controller.get_output_buffer_capacity(), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
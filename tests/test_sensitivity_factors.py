@@ -0,0 +1,118 @@
+import unittest
+
+from numpy import array, delete, isnan, zeros
+from numpy.linalg import solve
+from numpy.testing import assert_array_almost_equal
+
+from psyspy.model_components import PSys
+from psyspy.model_components.sensitivity_factors import SensitivityFactors
+
+from test_psys_from_arrays import create_wecc_9_bus_tables
+
+
+# meshed 5 bus network with bus 5 only connected through line 15, so outaging that line islands it
+BUS_IDS = [1, 2, 3, 4, 5]
+LINES = [(11, 0, 1, 10.), (12, 0, 2, 5.), (13, 1, 2, 8.), (14, 2, 3, 4.), (15, 3, 4, 6.), (16, 1, 3, 7.)]
+INJECTIONS = array([0., 0.6, -0.3, 0.5, -0.4])
+
+
+def create_sensitivity_factors(lines=LINES, slack_bus_index=0):
+    return SensitivityFactors(BUS_IDS, [line_id for line_id, _, _, _ in lines], [a for _, a, _, _ in lines],
+                              [b for _, _, b, _ in lines], [b_l for _, _, _, b_l in lines], slack_bus_index)
+
+
+def solve_dc_power_flow(num_buses, lines, injections, slack_bus_index):
+    Bbus = zeros((num_buses, num_buses))
+    for _, a, b, b_l in lines:
+        Bbus[a, a] += b_l
+        Bbus[b, b] += b_l
+        Bbus[a, b] -= b_l
+        Bbus[b, a] -= b_l
+    theta = zeros(num_buses)
+    non_slack = [i for i in range(0, num_buses) if i != slack_bus_index]
+    theta[non_slack] = solve(Bbus[non_slack, :][:, non_slack], injections[non_slack])
+    return array([b_l*(theta[a] - theta[b]) for _, a, b, b_l in lines])
+
+
+class TestSensitivityFactors(unittest.TestCase):
+
+    def test_ptdf_matches_dc_power_flow(self):
+        sensitivity_factors = create_sensitivity_factors()
+        flows = solve_dc_power_flow(5, LINES, INJECTIONS, 0)
+        assert_array_almost_equal(sensitivity_factors.get_ptdf().dot(INJECTIONS), flows)
+        # rows of a subset of the lines, computed after the full matrix was cached
+        assert_array_almost_equal(sensitivity_factors.get_ptdf([16, 12]).dot(INJECTIONS), flows[[5, 1]])
+
+
+    def test_post_outage_flows_match_resolved_outage(self):
+        sensitivity_factors = create_sensitivity_factors()
+        base_flows = solve_dc_power_flow(5, LINES, INJECTIONS, 0)
+
+        for outage_positions in [[0], [5], [2, 3]]:
+            remaining_lines = [line for k, line in enumerate(LINES) if k not in outage_positions]
+            expected_flows = solve_dc_power_flow(5, remaining_lines, INJECTIONS, 0)
+            post_outage_flows = sensitivity_factors.get_post_outage_flows(
+                base_flows, [LINES[k][0] for k in outage_positions])
+            assert_array_almost_equal(delete(post_outage_flows, outage_positions), expected_flows)
+            assert_array_almost_equal(post_outage_flows[outage_positions], zeros(len(outage_positions)))
+
+        # single outages through the LODFs
+        lodf = sensitivity_factors.get_lodf(outage_line_ids=[13])
+        remaining_lines = LINES[0:2] + LINES[3:]
+        assert_array_almost_equal(delete(base_flows + lodf[:, 0]*base_flows[2], 2),
+                                  solve_dc_power_flow(5, remaining_lines, INJECTIONS, 0))
+        self.assertAlmostEqual(lodf[2, 0], -1.)
+
+
+    def test_islanding_outages(self):
+        sensitivity_factors = create_sensitivity_factors()
+        base_flows = solve_dc_power_flow(5, LINES, INJECTIONS, 0)
+
+        # apart from the outaged line itself, which loses all of its flow
+        lodf = sensitivity_factors.get_lodf(outage_line_ids=[15])
+        self.assertTrue(isnan(delete(lodf[:, 0], 4)).all())
+        self.assertTrue(isnan(sensitivity_factors.get_post_outage_flows(base_flows, [15])).all())
+        # lines 11 and 12 are the only connections of the slack bus
+        self.assertTrue(isnan(sensitivity_factors.get_post_outage_flows(base_flows, [11, 12], [13, 14])).all())
+
+        flagged = sensitivity_factors.screen_contingencies(base_flows, [(11,), (15,), (14,)], [10.]*6)
+        self.assertEqual([contingency for contingency, _, _ in flagged], [(15,)])
+        self.assertRaises(KeyError, sensitivity_factors.get_line_index, 17)
+
+
+    def test_screen_contingencies(self):
+        sensitivity_factors = create_sensitivity_factors()
+        base_flows = solve_dc_power_flow(5, LINES, INJECTIONS, 0)
+        monitored_line_ids = [11, 13, 16]
+        limits = abs(base_flows[[0, 2, 5]]) + 0.01
+
+        flagged = sensitivity_factors.screen_contingencies(base_flows, [(11,), (12,), (13, 16)], limits,
+                                                           monitored_line_ids=monitored_line_ids)
+        self.assertNotEqual(flagged, [])
+        for contingency, overloaded_line_ids, post_outage_flows in flagged:
+            expected_flows = sensitivity_factors.get_post_outage_flows(base_flows, contingency, monitored_line_ids)
+            assert_array_almost_equal(post_outage_flows, expected_flows)
+            self.assertEqual(overloaded_line_ids, [line_id for line_id, flow, limit
+                                                   in zip(monitored_line_ids, post_outage_flows, limits)
+                                                   if abs(flow) > limit])
+            self.assertNotEqual(overloaded_line_ids, [])
+
+
+    def test_network_ptdf(self):
+        bus_table, branch_table = create_wecc_9_bus_tables()
+        network = PSys.from_arrays(bus_table, branch_table)
+        # the ids of the bus table are the names of the buses, PTDF columns follow the bus order of the network
+        bus_positions = dict((bus.name, position) for position, bus in enumerate(network.buses))
+
+        lines = [(k, bus_positions[a], bus_positions[b], x/(r**2 + x**2)) for k, (a, b, r, x)
+                 in enumerate(zip(branch_table['from_id'], branch_table['to_id'], branch_table['r'], branch_table['x']))]
+        injections = array([0., 1.63, 0.85, 0., -1.25, -0.9, 0., -1., 0.])[[bus.name - 1 for bus in network.buses]]
+        slack_bus_index = network.buses_index_by_bus_id[network.get_slack_bus_id()]
+        injections[slack_bus_index] = 0.
+
+        assert_array_almost_equal(network.get_ptdf().dot(injections),
+                                  solve_dc_power_flow(9, lines, injections, slack_bus_index))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+
+from os.path import exists, join as path_join
+from shutil import rmtree
+from tempfile import mkdtemp
+
+from numpy import arange, column_stack, genfromtxt, sin, zeros
+from numpy.testing import assert_array_almost_equal, assert_array_equal
+
+from psyspy.plot_resources import downsample, export_series
+from psyspy.plot_resources.series_export import get_lttb_indices, get_min_max_indices
+
+
+class TestSeriesExport(unittest.TestCase):
+
+    def setUp(self):
+        self.t = 0.001*arange(10000)
+        self.y = column_stack((sin(self.t), zeros(10000)))
+        # a single-sample spike, which averaging or decimation would lose
+        self.y[6543, 1] = 5.
+
+
+    def test_lttb(self):
+        indices = get_lttb_indices(self.t, self.y, 100)
+
+        self.assertEqual(indices.shape, (100, 2))
+        assert_array_equal(indices[[0, -1]], [[0, 0], [9999, 9999]])
+        self.assertTrue((indices[1:] > indices[0:-1]).all())
+        self.assertTrue(6543 in indices[:, 1])
+
+        t, y = downsample(self.t, self.y[:, 0], num_points=100)
+        assert_array_almost_equal(y[:, 0], sin(t[:, 0]))
+        self.assertEqual(downsample(self.t[0:50], self.y[0:50], num_points=100)[1].shape, (50, 2))
+
+
+    def test_min_max(self):
+        indices = get_min_max_indices(self.y, 100)
+
+        self.assertEqual(indices.shape, (100, 2))
+        self.assertTrue(6543 in indices[:, 1])
+        self.assertTrue((indices[1:] >= indices[0:-1]).all())
+        self.assertEqual(self.y[indices[:, 0], 0].max(), self.y[:, 0].max())
+
+
+    def test_export(self):
+        directory = mkdtemp()
+        try:
+            path = path_join(directory, 'series.tikz')
+            export_series(path, self.t, self.y, ['a', 'b'], tikz_preamble=[r'\begin{tikzpicture}', r'\begin{axis}'],
+                          max_points=200)
+            lines = open(path).read().split('\n')
+            self.assertEqual(len(lines), 2 + 2*(200 + 3) + 2)
+            self.assertEqual(lines[4], '(0.0000, 0.0000)')
+
+            export_series(path, self.t, self.y, ['a', 'b'], export_format='pgfplots', max_points=200)
+            self.assertTrue('table[x=t_b, y=b, col sep=comma] {series.csv}' in open(path).read())
+            table = genfromtxt(path_join(directory, 'series.csv'), delimiter=',', names=True)
+            self.assertEqual(table.dtype.names, ('t_a', 'a', 't_b', 'b'))
+            self.assertEqual(table.shape, (200,))
+            self.assertAlmostEqual(table['b'].max(), 5.)
+
+            self.assertRaises(ValueError, export_series, path, self.t, self.y, ['a'])
+            self.assertRaises(ValueError, export_series, path, self.t, self.y, ['a', 'b'], export_format='png')
+        finally:
+            rmtree(directory)
+        self.assertFalse(exists(directory))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,262 @@
+import unittest
+
+from os.path import join as path_join
+from shutil import rmtree
+from tempfile import mkdtemp
+
+from numpy import arange, array, roll, sin
+from numpy.testing import assert_array_almost_equal
+
+from psyspy import Bus
+from psyspy.model_components import Model, PSys
+from psyspy.simulation_resources import RecordingSpec, RungeKutta45, SimulationRoutine, SteadyStateDetector
+from psyspy.simulation_resources.perturbations import Perturbation
+
+
+class OscillatorRing(PSys):
+    """
+    Ring of Kuramoto oscillators whose states are the bus voltage angles, so that SimulationRoutine can be run without
+    any dynamic models: dtheta_i/dt = w_i + K*(sin(theta_i-1 - theta_i) + sin(theta_i+1 - theta_i)).
+    """
+
+    def __init__(self, natural_frequencies, initial_angles, coupling=1., models=None):
+        if models is None:
+            models = [None]*len(initial_angles)
+        PSys.__init__(self, buses=[Bus(model=model, theta0=theta0) for model, theta0 in zip(models, initial_angles)])
+        self.natural_frequencies = array(natural_frequencies, dtype=float)
+        self.coupling = coupling
+        self._new_states = None
+
+
+    def prepare_for_dynamic_simulation_initial_value_calculation(self):
+        pass
+
+
+    def compute_initial_values_for_dynamic_simulation(self):
+        pass
+
+
+    def initialize_dynamic_model_states(self):
+        self._update_model_speeds(append=False)
+
+
+    def prepare_for_dynamic_simulation(self):
+        pass
+
+
+    def prepare_for_dynamic_state_update(self):
+        pass
+
+
+    def get_current_dynamic_states(self):
+        return array([bus.get_current_voltage_angle() for bus in self.buses])
+
+
+    def get_dynamic_state_time_derivative_array(self, current_states=None):
+        if current_states is None:
+            current_states = self.get_current_dynamic_states()
+        return self.natural_frequencies + self.coupling*(sin(roll(current_states, 1) - current_states) +
+                                                         sin(roll(current_states, -1) - current_states))
+
+
+    def update_dynamic_states(self, numerical_integration_method):
+        self._new_states = numerical_integration_method(self.get_current_dynamic_states(),
+                                                        self.get_dynamic_state_time_derivative_array)
+
+
+    def update_algebraic_states(self, admittance_matrix_recompute_required=False, append=True):
+        for bus, theta in zip(self.buses, self._new_states):
+            bus.update_voltage_angle(theta, replace=(append is False))
+        self._update_model_speeds(append=append)
+
+
+    def _update_model_speeds(self, append):
+        speeds = self.get_dynamic_state_time_derivative_array()
+        for bus, speed in zip(self.buses, speeds):
+            if isinstance(bus.model, SpeedModel) is True:
+                bus.model.w = array(list(bus.model.w) + [speed]) if append is True else array([speed])
+
+
+class SpeedModel(Model):
+    """
+    Dynamic model that only keeps a history of the speed of its bus, as models with a speed state do.
+    """
+
+    def __init__(self):
+        Model.__init__(self, is_dynamic=True)
+        self.w = array([])
+
+
+class NaturalFrequencyChange(Perturbation):
+    """
+    Changes the natural frequency of one oscillator of an OscillatorRing while it is active.
+    """
+
+    def __init__(self, start_time, network, bus_index, new_frequency, end_time=None):
+        Perturbation.__init__(self, start_time, None, end_time=end_time)
+        self.network = network
+        self.bus_index = bus_index
+        self.new_frequency = new_frequency
+        self.activation_times = []
+        self.deactivation_times = []
+
+
+    def _activate(self, t):
+        self.old_frequency = self.network.natural_frequencies[self.bus_index]
+        self.network.natural_frequencies[self.bus_index] = self.new_frequency
+        self.activation_times.append(t)
+
+
+    def _deactivate(self, t):
+        self.network.natural_frequencies[self.bus_index] = self.old_frequency
+        self.deactivation_times.append(t)
+
+
+NATURAL_FREQUENCIES = [1., 0.5, -0.5, -1.]
+INITIAL_ANGLES = [0., 0.3, -0.2, 0.1]
+COUPLING = 2.
+
+
+def create_oscillator_ring(speed_model_bus_indices=()):
+    models = [SpeedModel() if index in speed_model_bus_indices else None for index in range(0, len(INITIAL_ANGLES))]
+    return OscillatorRing(NATURAL_FREQUENCIES, INITIAL_ANGLES, coupling=COUPLING, models=models)
+
+
+def create_perturbed_simulation(network, **kwargs):
+    perturbations = [NaturalFrequencyChange(0.1, network, 1, 2., end_time=0.25),
+                     NaturalFrequencyChange(0.155, network, 3, 0.)]
+    return SimulationRoutine(network, 0.4, time_step=0.01, perturbations=perturbations, **kwargs)
+
+
+def integrate_oscillator_ring(times, get_natural_frequencies):
+    """
+    Reference solution of the oscillator ring with one RK4 step between each pair of times, the natural frequencies
+    are those at the start of the step.
+    """
+    theta = array(INITIAL_ANGLES)
+    for t, next_t in zip(times[0:-1], times[1:]):
+        natural_frequencies = array(get_natural_frequencies(t))
+
+        def derivative(current_states):
+            return natural_frequencies + COUPLING*(sin(roll(current_states, 1) - current_states) +
+                                                   sin(roll(current_states, -1) - current_states))
+
+        theta = RungeKutta45(next_t - t).get_updated_states(theta, derivative)
+    return theta
+
+
+class TestSimulationRoutine(unittest.TestCase):
+
+    def test_events_on_step_grid(self):
+        network = create_oscillator_ring()
+        # on the grid, between two grid points, and ending on the grid
+        perturbations = [NaturalFrequencyChange(0.05, network, 1, 2.), NaturalFrequencyChange(0.023, network, 2, 0.),
+                         NaturalFrequencyChange(0.07, network, 3, -3., end_time=0.12)]
+        simulation = SimulationRoutine(network, 0.2, time_step=0.01, perturbations=perturbations)
+        simulation.run_simulation()
+
+        expected_times = sorted(list(0.01*arange(0, 21)) + [0.023])
+        assert_array_almost_equal(simulation.time_vector, expected_times, 12)
+        self.assertEqual([perturbation.activation_times for perturbation in perturbations], [[0.05], [0.023], [0.07]])
+        self.assertEqual(perturbations[2].deactivation_times, [0.12])
+
+        def get_natural_frequencies(t):
+            natural_frequencies = list(NATURAL_FREQUENCIES)
+            for bus_index, start_time, end_time, new_frequency in [(1, 0.05, None, 2.), (2, 0.023, None, 0.),
+                                                                   (3, 0.07, 0.12, -3.)]:
+                if t >= start_time - 1e-9 and (end_time is None or t < end_time - 1e-9):
+                    natural_frequencies[bus_index] = new_frequency
+            return natural_frequencies
+
+        assert_array_almost_equal(network.get_current_dynamic_states(),
+                                  integrate_oscillator_ring(expected_times + [0.21], get_natural_frequencies), 12)
+
+
+    def test_model_speeds_are_aligned_with_time_vector(self):
+        network = create_oscillator_ring(speed_model_bus_indices=[2])
+        simulation = SimulationRoutine(network, 0.5, time_step=0.01)
+        self.assertEqual(simulation._bus_frequencies, {})
+        simulation.run_simulation()
+
+        num_samples = simulation.time_vector.shape[0]
+        speed_model = network.buses[2].model
+        self.assertEqual(speed_model.w.shape[0], num_samples + 1)
+
+        # entry k is the speed at time_vector[k], i.e., at the angles the backward differences end with
+        frequencies = simulation.get_bus_frequencies()
+        assert_array_almost_equal(frequencies[:, 2], speed_model.w[0:num_samples])
+        assert_array_almost_equal(network.buses[2].w, speed_model.w[0:num_samples])
+
+
+    def test_frequencies_require_recorded_angles(self):
+        network = create_oscillator_ring()
+        simulation = SimulationRoutine(network, 0.1, time_step=0.01, recording_spec=RecordingSpec(quantities=('V',)))
+        self.assertRaises(ValueError, simulation.get_bus_frequencies)
+
+        simulation.run_simulation()
+        self.assertRaises(ValueError, simulation.get_bus_frequencies)
+
+
+    def test_steady_state_termination(self):
+        # the natural frequencies sum to zero, so the ring locks at standstill
+        network = create_oscillator_ring()
+        simulation = SimulationRoutine(network, 20., time_step=0.01,
+                                       steady_state_detector=SteadyStateDetector(0.5, frequency_tolerance=1e-4))
+        simulation.run_simulation()
+
+        self.assertTrue(simulation.terminated_early)
+        self.assertLess(simulation.time_vector[-1], 19.)
+        frequencies = network.get_dynamic_state_time_derivative_array()
+        self.assertLess(abs(frequencies).max(), 1e-4)
+
+
+    def test_resume_from_checkpoint(self):
+        network = create_oscillator_ring()
+        simulation = create_perturbed_simulation(network)
+        simulation.run_simulation()
+
+        checkpoint_directory = mkdtemp()
+        try:
+            # the only periodic checkpoint is written at 0.3, after the first perturbation has ended
+            checkpoint_path = path_join(checkpoint_directory, 'checkpoint.npz')
+            periodic_simulation = create_perturbed_simulation(create_oscillator_ring(), checkpoint_path=checkpoint_path,
+                                                              checkpoint_interval=0.3)
+            periodic_simulation.run_simulation()
+
+            resumed_network = create_oscillator_ring()
+            resumed_simulation = create_perturbed_simulation(resumed_network)
+            resumed_simulation.load_checkpoint(checkpoint_path)
+            self.assertAlmostEqual(resumed_simulation.current_time, 0.3)
+            self.assertEqual([perturbation.active for perturbation in resumed_simulation.perturbations], [False, True])
+            resumed_simulation.run_simulation(resume=True)
+
+            num_resumed_steps = resumed_simulation.time_vector.shape[0]
+            self.assertEqual(num_resumed_steps, 11)
+            assert_array_almost_equal(resumed_simulation.time_vector, simulation.time_vector[-num_resumed_steps:], 12)
+            assert_array_almost_equal(resumed_network.get_current_dynamic_states(), network.get_current_dynamic_states(),
+                                      12)
+            self.assertEqual(resumed_simulation.perturbations[0].deactivation_times, [])
+
+            # a run stopped at end_time and saved explicitly, while both perturbations are active
+            interrupted_simulation = create_perturbed_simulation(create_oscillator_ring())
+            interrupted_simulation.run_simulation(end_time=0.2)
+            interrupted_simulation.save_checkpoint(checkpoint_path)
+
+            resumed_network = create_oscillator_ring()
+            resumed_simulation = create_perturbed_simulation(resumed_network)
+            resumed_simulation.load_checkpoint(checkpoint_path)
+            self.assertEqual([perturbation.active for perturbation in resumed_simulation.perturbations], [True, True])
+            resumed_simulation.run_simulation(resume=True)
+
+            num_resumed_steps = resumed_simulation.time_vector.shape[0]
+            self.assertEqual(num_resumed_steps, 21)
+            assert_array_almost_equal(resumed_simulation.time_vector, simulation.time_vector[-num_resumed_steps:], 12)
+            assert_array_almost_equal(resumed_network.get_current_dynamic_states(), network.get_current_dynamic_states(),
+                                      12)
+            self.assertEqual(resumed_simulation.perturbations[0].deactivation_times, [0.25])
+        finally:
+            rmtree(checkpoint_directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
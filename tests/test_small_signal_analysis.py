@@ -0,0 +1,258 @@
+import unittest
+
+from math import pi
+
+from numpy import argsort, array, conj, cos, diag, imag, real, sin, sort_complex, zeros
+from numpy.linalg import eigvals, solve
+from numpy.testing import assert_array_almost_equal
+from scipy.sparse import block_diag, csr_matrix, isspmatrix_csr
+
+from psyspy import Bus, PQBus, PVBus
+from psyspy.model_components import Model, PSys
+from psyspy.simulation_resources import SmallSignalAnalysis
+
+
+class LinearNetwork(object):
+    """
+    Stands in for a power network that has already been linearized, each bus has one state.
+    """
+
+    def __init__(self, A):
+        self.A = csr_matrix(A)
+        self.dynamic_state_bus_index_mapping = [(bus_id, 1) for bus_id in range(1, self.A.shape[0] + 1)]
+
+
+    def get_state_matrix(self, kron_elimination=None, perturbation=1e-6):
+        return self.A, None
+
+
+def oscillator(damping, frequency):
+    # state matrix block with eigenvalues -damping +- 2j*pi*frequency
+    w = 2*pi*frequency
+    return array([[-damping, w], [-w, -damping]])
+
+
+def create_linear_network():
+    # a slow real mode (-0.1) just ahead of a pair (-0.2 +- 0.05 Hz), better damped modes behind them, the closer a mode
+    # is to zero the less damped it is
+    return LinearNetwork(block_diag([array([[-0.1]]), oscillator(0.2, 0.05), oscillator(0.5, 0.1), oscillator(1., 0.2),
+                                     array([[-3.]]), array([[-4.]]), oscillator(2., 0.5)]).toarray())
+
+
+class ClassicalGeneratorModel(Model):
+    """
+    Generator with a constant internal voltage E behind the reactance xd, its states are the rotor angle and speed.
+    """
+
+    def __init__(self, E, xd, M, D, Pm, delta0):
+        Model.__init__(self, is_dynamic=True, is_generator=True)
+        self.E, self.xd, self.M, self.D, self.Pm = E, xd, M, D, Pm
+        self.states = array([delta0, 0.])
+
+
+    def prepare_for_dynamic_simulation_initial_value_calculation(self):
+        pass
+
+
+    def initialize_dynamic_states(self):
+        pass
+
+
+    def prepare_for_dynamic_simulation(self):
+        pass
+
+
+    def prepare_for_dynamic_state_update(self):
+        pass
+
+
+    def get_internal_voltage_angle(self):
+        return self.states[0]
+
+
+    def shift_dynamic_internal_voltage_angle(self, angle_to_shift):
+        self.states[0] -= angle_to_shift
+
+
+    def get_current_dynamic_state_array(self):
+        return self.states.copy()
+
+
+    def save_new_dynamic_state_array(self, new_state_array):
+        self.states = array(new_state_array, dtype=float)
+
+
+    def get_dynamic_state_time_derivative_array(self, current_states=None):
+        if current_states is None:
+            current_states = self.states
+        delta, w = current_states
+        V, theta = self.get_polar_voltage_from_bus()
+        P = self.E*V*sin(delta - theta)/self.xd
+        return array([w, (self.Pm - P - self.D*w)/self.M])
+
+
+    def _get_angle_difference(self):
+        V, theta = self.get_polar_voltage_from_bus()
+        return V, self.states[0] - theta
+
+
+    def _get_real_power_injection(self):
+        V, angle = self._get_angle_difference()
+        return self.E*V*sin(angle)/self.xd
+
+
+    def _get_reactive_power_injection(self):
+        V, angle = self._get_angle_difference()
+        return (self.E*V*cos(angle) - V**2)/self.xd
+
+
+    def _dP_dtheta_model(self):
+        V, angle = self._get_angle_difference()
+        return -self.E*V*cos(angle)/self.xd
+
+
+    def _dP_dV_model(self):
+        _, angle = self._get_angle_difference()
+        return self.E*sin(angle)/self.xd
+
+
+    def _dQ_dtheta_model(self):
+        V, angle = self._get_angle_difference()
+        return self.E*V*sin(angle)/self.xd
+
+
+    def _dQ_dV_model(self):
+        V, angle = self._get_angle_difference()
+        return (self.E*cos(angle) - 2*V)/self.xd
+
+
+    def _dP_dx_model(self):
+        V, angle = self._get_angle_difference()
+        return array([self.E*V*cos(angle)/self.xd, 0.])
+
+
+    def _dQ_dx_model(self):
+        V, angle = self._get_angle_difference()
+        return array([-self.E*V*sin(angle)/self.xd, 0.])
+
+
+def create_generator_network():
+    # the generator at bus 4 is only connected to the load bus
+    b1 = PVBus(P=0.5, V=1.02, theta0=0)
+    b2 = Bus(model=ClassicalGeneratorModel(1.1, 0.3, 0.1, 0.05, 0.6, 0.4))
+    b3 = PQBus(P=1.2, Q=0.3)
+    b4 = Bus(model=ClassicalGeneratorModel(1.05, 0.25, 0.08, 0.02, 0.4, 0.2))
+
+    n = PSys(buses=[b1, b2, b3, b4], solver_tolerance=1e-10)
+    _ = n.connect_buses(b1, b2, z=(0.01, 0.1))
+    _ = n.connect_buses(b2, b3, z=(0.02, 0.15))
+    _ = n.connect_buses(b1, b3, z=(0.01, 0.12))
+    _ = n.connect_buses(b3, b4, z=(0, 0.08))
+    _ = n.set_slack_bus(b1)
+    _ = n.solve_power_flow(append=False)
+    return n
+
+
+def get_state_matrix_by_finite_differences(n, step=1e-5):
+    """
+    Reduced state matrix from central differences of the state derivatives, solving the power flow for every
+    perturbed state.
+    """
+    generator_buses = [n.buses[1], n.buses[3]]
+    states = n.get_current_dynamic_states()
+    A = zeros((states.shape[0], states.shape[0]))
+    for k in range(0, states.shape[0]):
+        derivatives = []
+        for perturbation in [step, -step]:
+            perturbed_states = states.copy()
+            perturbed_states[k] += perturbation
+            for i, bus in enumerate(generator_buses):
+                bus.save_new_dynamic_state_array(perturbed_states[2*i:(2*i + 2)])
+            _ = n.solve_power_flow(append=False)
+            derivatives.append(n.get_dynamic_state_time_derivative_array())
+        A[:, k] = (derivatives[0] - derivatives[1])/(2*step)
+
+    for i, bus in enumerate(generator_buses):
+        bus.save_new_dynamic_state_array(states[2*i:(2*i + 2)])
+    _ = n.solve_power_flow(append=False)
+    return A
+
+
+class TestStateMatrix(unittest.TestCase):
+
+    def setUp(self):
+        self.network = create_generator_network()
+        _ = self.network.get_current_dynamic_states()
+        self.expected_A = get_state_matrix_by_finite_differences(self.network)
+
+
+    def test_kron_elimination(self):
+        A, E = self.network.get_state_matrix()
+        self.assertTrue(isspmatrix_csr(A))
+        self.assertIs(E, None)
+        assert_array_almost_equal(A.toarray(), self.expected_A, 4)
+
+        # the voltages of a generator's bus only enter its own state derivatives
+        f_x, f_y, g_x, g_y = self.network.get_linearized_dynamic_equations()
+        voltage_vector_bus_ids = self.network._get_voltage_vector_bus_ids()
+        for rows, bus in [(slice(0, 2), self.network.buses[1]), (slice(2, 4), self.network.buses[3])]:
+            columns = [j for j, bus_id in enumerate(voltage_vector_bus_ids) if bus_id != bus.get_id()]
+            self.assertEqual(abs(f_y[rows, :][:, columns]).sum(), 0.)
+            self.assertNotEqual(abs(f_y[rows, :]).sum(), 0.)
+
+
+    def test_descriptor_pair(self):
+        A, E = self.network.get_state_matrix(kron_elimination=False)
+        num_voltages = self.network._get_current_voltage_vector().shape[0]
+        self.assertEqual(A.shape, (4 + num_voltages, 4 + num_voltages))
+        assert_array_almost_equal(diag(E.toarray()), [1.]*4 + [0.]*num_voltages)
+
+        # eliminating the voltages from the descriptor pair gives the reduced state matrix
+        A = A.toarray()
+        reduced_A = A[0:4, 0:4] - A[0:4, 4:].dot(solve(A[4:, 4:], A[4:, 0:4]))
+        assert_array_almost_equal(reduced_A, self.expected_A, 4)
+
+
+class TestSmallSignalAnalysis(unittest.TestCase):
+
+    def test_conjugate_pairs_are_kept_together(self):
+        network = create_linear_network()
+        expected_eigenvalues = eigvals(network.A.toarray())
+        expected_eigenvalues = expected_eigenvalues[argsort(-real(expected_eigenvalues), kind='mergesort')]
+
+        analysis = SmallSignalAnalysis(network)
+        # the second mode would split the pair at -0.2 +- 0.05 Hz
+        eigenvalues = analysis.compute_modes(k=2)
+        self.assertEqual(eigenvalues.shape[0], 3)
+        assert_array_almost_equal(sort_complex(eigenvalues), sort_complex(expected_eigenvalues[0:3]))
+        assert_array_almost_equal(analysis.get_frequencies(), [0., 0.05, 0.05])
+
+        eigenvalues = analysis.compute_modes(k=5)
+        assert_array_almost_equal(sort_complex(eigenvalues), sort_complex(expected_eigenvalues[0:5]))
+        self.assertEqual(analysis.right_eigenvectors.shape, (11, 5))
+
+
+    def test_complex_shift(self):
+        analysis = SmallSignalAnalysis(create_linear_network())
+        # ARPACK only finds the modes near +0.5 Hz, -2 + 0.5 Hz and -1 + 0.2 Hz, their conjugates are added
+        eigenvalues = analysis.compute_modes(k=2, shifts=(2j*pi*0.5,))
+        self.assertEqual(eigenvalues.shape[0], 2)
+        assert_array_almost_equal(eigenvalues[0], conj(eigenvalues[1]))
+        self.assertAlmostEqual(real(eigenvalues[0]), -1.)
+        self.assertAlmostEqual(abs(imag(eigenvalues[0])), 2*pi*0.2)
+
+        participation_factors = analysis.get_participation_factors()
+        assert_array_almost_equal(participation_factors.sum(axis=0), [1., 1.])
+        assert_array_almost_equal(participation_factors[5:7, :], 0.5*array([[1., 1.], [1., 1.]]))
+
+
+    def test_small_systems(self):
+        for A in [array([[-0.5]]), oscillator(0.3, 1.5), block_diag([oscillator(0.3, 1.5), array([[-1.]])]).toarray()]:
+            analysis = SmallSignalAnalysis(LinearNetwork(A))
+            eigenvalues = analysis.compute_modes(k=6)
+            assert_array_almost_equal(sort_complex(eigenvalues), sort_complex(eigvals(A)))
+            self.assertEqual(analysis.get_participation_factors().shape, (A.shape[0], eigenvalues.shape[0]))
+
+
+if __name__ == '__main__':
+    unittest.main()